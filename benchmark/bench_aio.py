@@ -0,0 +1,74 @@
+from argparse import ArgumentParser
+import asyncio
+import time
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.aio import ExporterAsync
+
+from .synthetic import synthetic_notebook
+
+
+# How async services export without the async API: each request pushes a fresh
+# exporter onto a thread of the event loop's default executor.
+async def load_threads(nb, num_requests: int, concurrency: int) -> float:
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def client() -> None:
+        async with limit:
+            await loop.run_in_executor(
+                None,
+                lambda: ArticleHTMLExporter().from_notebook_node(nb)
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(num_requests)])
+    return time.perf_counter() - start
+
+
+async def load_async(
+    nb,
+    num_requests: int,
+    concurrency: int,
+    processes: int
+) -> float:
+    limit = asyncio.Semaphore(concurrency)
+    async with ExporterAsync(processes=processes) as exporter:
+        await exporter.warm_up()
+
+        async def client() -> None:
+            async with limit:
+                await exporter.from_notebook_node(nb)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(num_requests)])
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the throughput of concurrent exports through the async API "
+            "against exports pushed onto threads."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+    nb = synthetic_notebook(args.cells)
+    for name, seconds in [
+        ("threads", asyncio.run(load_threads(nb, args.requests, args.concurrency))),
+        (
+            "async API",
+            asyncio.run(
+                load_async(nb, args.requests, args.concurrency, args.processes)
+            )
+        )
+    ]:
+        print(f"{name:>10}: {args.requests / seconds:7.1f} exports/s")
+
+
+if __name__ == "__main__":
+    main()
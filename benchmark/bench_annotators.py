@@ -0,0 +1,63 @@
+from argparse import ArgumentParser
+from importlib import import_module
+import time
+
+from nbconvert_article_html import CollectorLabels, RendererAnnotations
+import nbconvert_article_html.preprocessors as preprocessors
+
+from .synthetic import synthetic_notebook
+
+
+# Annotator resolution as it stood before the annotator registry: the descriptor is
+# parsed and its module looked up for every labelled cell.
+def get_annotator_uncached(counter: str, scheme_annotator: str = ""):
+    if not scheme_annotator:
+        scheme_annotator = preprocessors.REFERABLE[counter]["annotation"]
+    name_module, name_annotator = scheme_annotator.split(":")
+    module = import_module(
+        preprocessors.__package__ if name_module == "." else name_module
+    )
+    return getattr(module, name_annotator)
+
+
+def measure(nb, resources, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        RendererAnnotations().preprocess(nb, dict(resources))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare annotation with annotators resolved through the registry "
+            "against annotators resolved anew for each labelled cell."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=40_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    nb = synthetic_notebook(
+        args.cells,
+        label_density=0.9,
+        reference_density=0.0,
+        section_density=0.3
+    )
+    _, resources = CollectorLabels().preprocess(nb, {})
+    num_labels = sum(len(cell.metadata.get("label", {})) for cell in nb.cells)
+    print(f"{len(nb.cells)} cells, {num_labels} labels")
+    get_annotator = preprocessors._get_annotator
+    try:
+        preprocessors._get_annotator = get_annotator_uncached  # type: ignore
+        uncached = measure(nb, resources, args.repeat)
+    finally:
+        preprocessors._get_annotator = get_annotator
+    registry = measure(nb, resources, args.repeat)
+    print(f"{'uncached':>10}: {uncached * 1000:7.1f} ms")
+    print(f"{'registry':>10}: {registry * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from argparse import ArgumentParser
+from pathlib import Path
+import random
+import re
+import tempfile
+import time
+from typing import *
+
+import nbformat
+from nbformat import NotebookNode
+from nbformat.v4 import new_markdown_cell, new_notebook
+
+from nbconvert_article_html import ArticleHTMLExporter, RX_REFERENCE
+from nbconvert_article_html.book import export_book
+
+from .synthetic import synthetic_notebook
+
+
+# Chapters of a book, whose labels are made distinct across chapters, and each of
+# which cites a few labels of the chapters before it.
+def synthetic_book(num_chapters: int, num_cells: int) -> List[NotebookNode]:
+    rng = random.Random(0)
+    chapters: List[NotebookNode] = []
+    labels: List[str] = []
+    for k in range(num_chapters):
+        nb = synthetic_notebook(num_cells, seed=k)
+
+        def rename(m: re.Match) -> str:
+            return f"^[{m['text']}]({m['counter']}:ch{k}-{m['unique']})"
+
+        for cell in nb.cells:
+            label = cell.metadata.get("label")
+            if label:
+                cell.metadata.label = {c: f"ch{k}-{u}" for c, u in label.items()}
+                labels.extend(f"{c}:ch{k}-{u}" for c, u in label.items())
+            if cell.cell_type == "markdown":
+                cell.source = RX_REFERENCE.sub(rename, cell.source)
+        if k > 0:
+            cited = rng.sample(labels, min(5, len(labels)))
+            nb.cells.append(
+                new_markdown_cell(" ".join(f"See ^[]({label})." for label in cited))
+            )
+        chapters.append(nb)
+    return chapters
+
+
+def concatenated(chapters: Sequence[NotebookNode]) -> NotebookNode:
+    return new_notebook(
+        cells=[cell for nb in chapters for cell in nb.cells],
+        metadata=chapters[0].metadata
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare exporting a book as one concatenated notebook against exporting "
+            "it chapter by chapter in book mode, then rebuilding it after no change "
+            "and after editing one chapter."
+        )
+    )
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--cells", type=int, default=200)
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    args = parser.parse_args()
+    chapters = synthetic_book(args.chapters, args.cells)
+
+    exporter = ArticleHTMLExporter()
+    exporter.template
+    start = time.perf_counter()
+    exporter.from_notebook_node(concatenated(chapters))
+    print(f"Concatenated notebook: {time.perf_counter() - start:7.2f} s")
+
+    with tempfile.TemporaryDirectory() as dir_:
+        dir_book = Path(dir_) / "book"
+        dir_book.mkdir()
+        paths = [dir_book / f"{k:04d}.ipynb" for k in range(len(chapters))]
+        for nb, path in zip(chapters, paths):
+            nbformat.write(nb, path)
+        dir_output = Path(dir_) / "html"
+        for name in ["Book, full build", "Book, no change"]:
+            report = export_book(paths, dir_output, args.processes)
+            print(f"{name + ':':<22} {report.seconds:7.2f} s  ({report.summary()})")
+
+        edited = chapters[len(chapters) // 2]
+        edited.cells[1].source += " Edited."
+        nbformat.write(edited, paths[len(chapters) // 2])
+        report = export_book(paths, dir_output, args.processes)
+        print(f"{'Book, one edit:':<22} {report.seconds:7.2f} s  ({report.summary()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from argparse import ArgumentParser
+import json
+import re
+import time
+from typing import *
+
+from bs4 import BeautifulSoup
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+from .synthetic import synthetic_notebook
+
+
+# Time to parse HTML into a document tree, and the number of its elements: a proxy
+# for the work a browser does before it first renders the page.
+def parse(html: str) -> Tuple[float, int]:
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, features="html.parser")
+    return time.perf_counter() - start, len(soup.find_all(True))
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare what a browser must load and parse before it first renders a "
+            "long article, exported whole and split into chunks at its sections."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=5000)
+    parser.add_argument("--image-bytes", type=int, default=20000)
+    parser.add_argument("--level", type=int, default=1)
+    args = parser.parse_args()
+    nb = synthetic_notebook(
+        args.cells,
+        image_bytes=args.image_bytes,
+        section_density=0.02
+    )
+
+    exporter = ArticleHTMLExporter()
+    start = time.perf_counter()
+    html, _ = exporter.from_notebook_node(nb)
+    seconds_whole = time.perf_counter() - start
+
+    exporter = ArticleHTMLExporter(
+        config=Config({"ArticleHTMLExporter": {"chunk_level": args.level}})
+    )
+    start = time.perf_counter()
+    index, resources = exporter.from_notebook_node(nb, {"unique_key": "bench"})
+    seconds_chunked = time.perf_counter() - start
+    script = resources["outputs"].get("bench_chunks/0000.js", b"").decode("utf-8")
+    m = re.fullmatch(r"articleHtmlChunk\(\d+, (.*)\);\n", script, re.S)
+    first = json.loads(m[1]) if m else ""
+
+    print(f"Export, whole:   {seconds_whole:7.2f} s")
+    print(
+        f"Export, chunked: {seconds_chunked:7.2f} s  "
+        f"({resources['chunks']['chunks']} chunks at level {args.level})"
+    )
+    for name, pages in [
+        ("Whole document", [html]),
+        ("Index + 1st chunk", [index, first]),
+    ]:
+        parsed = [parse(page) for page in pages]
+        size = sum(len(page.encode("utf-8")) for page in pages) / 2 ** 20
+        print(
+            f"{name + ':':<19} {size:7.2f} MB, parsed in "
+            f"{sum(s for s, _ in parsed):6.3f} s, {sum(n for _, n in parsed)} elements"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from argparse import ArgumentParser
+from copy import deepcopy
+import time
+import tracemalloc
+from typing import *
+
+import nbconvert_article_html.preprocessors as nah
+from nbconvert_article_html import RendererAnnotations, SolverReferences
+
+from .synthetic import synthetic_notebook
+
+
+def copy_cell_deep(node):
+    copy = deepcopy(node)
+    if "id" in copy:
+        del copy["id"]
+    return copy
+
+
+def measure(nb, deep: bool) -> Dict[str, float]:
+    copy_cell = nah.copy_cell
+    if deep:
+        nah.copy_cell = copy_cell_deep
+    try:
+        resources: Dict = {"language": "en"}
+        nb, resources = nah.CollectorLabels().preprocess(nb, resources)
+        tracemalloc.start()
+        start = time.perf_counter()
+        nb, resources = SolverReferences().preprocess(nb, resources)
+        nb, resources = RendererAnnotations().preprocess(nb, resources)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        nah.copy_cell = copy_cell
+    return {"seconds": seconds, "peak_bytes": peak}
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Measure the allocations of reference solving and annotation rendering "
+            "with copy-on-write cells, against deep-copied cells."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=2000)
+    parser.add_argument("--image-bytes", type=int, default=50_000)
+    args = parser.parse_args()
+    nb = synthetic_notebook(
+        args.cells,
+        label_density=0.5,
+        code_density=0.3,
+        image_bytes=args.image_bytes
+    )
+    for name, deep in [("deepcopy", True), ("copy-on-write", False)]:
+        r = measure(deepcopy(nb), deep)
+        print(
+            f"{name:>14}: {r['seconds'] * 1000:8.1f} ms, "
+            f"peak {r['peak_bytes'] / 2 ** 20:8.2f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from argparse import ArgumentParser
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import *
+
+import nbformat
+
+from nbconvert_article_html.daemon import Daemon, request
+
+from .synthetic import synthetic_notebook
+
+
+def latency_subprocess(path: Path, repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "nbconvert",
+                "--to",
+                "article-html",
+                "--stdout",
+                str(path)
+            ],
+            check=True,
+            capture_output=True
+        )
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies)
+
+
+def latency_daemon(notebook: bytes, repeat: int, processes: int) -> float:
+    daemon = Daemon(processes=processes)
+    daemon.warm_up()
+    server = daemon.server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        _, port = cast(Tuple[str, int], server.server_address)
+        address = f"127.0.0.1:{port}"
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            request(address, notebook)
+            latencies.append(time.perf_counter() - start)
+        return statistics.median(latencies)
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the median latency of converting a small notebook through a "
+            "nbconvert subprocess against converting it through the daemon."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--processes", type=int, default=2)
+    args = parser.parse_args()
+    nb = synthetic_notebook(args.cells)
+    notebook = nbformat.writes(nb).encode("utf-8")
+    with tempfile.TemporaryDirectory() as dir_:
+        path = Path(dir_) / "small.ipynb"
+        path.write_bytes(notebook)
+        subprocess_ = latency_subprocess(path, args.repeat)
+    daemon = latency_daemon(notebook, args.repeat * 20, args.processes)
+    print(f"{len(nb.cells)} cells")
+    print(f"{'subprocess':>10}: {subprocess_ * 1000:7.1f} ms (median)")
+    print(f"{'daemon':>10}: {daemon * 1000:7.1f} ms (median)")
+
+
+if __name__ == "__main__":
+    main()
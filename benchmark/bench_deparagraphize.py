@@ -0,0 +1,66 @@
+from argparse import ArgumentParser
+import time
+from typing import *
+
+import nbconvert_article_html.exporter as nah
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.markup import _deparagraphize_soup, deparagraphize
+
+from .synthetic import synthetic_notebook
+
+
+def notes_rendered(num_cells: int) -> List[str]:
+    sources = []
+
+    def recording(source):
+        sources.append(source)
+        return deparagraphize(source)
+
+    nah.deparagraphize, original = recording, nah.deparagraphize
+    try:
+        ArticleHTMLExporter().from_notebook_node(
+            synthetic_notebook(num_cells, note_density=0.5)
+        )
+    finally:
+        nah.deparagraphize = original
+    return sources
+
+
+def measure(sources: List[str], filter: Callable[[str], str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source in sources:
+            filter(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the streaming deparagraphize filter to its BeautifulSoup "
+            "fallback, over the notes of a synthetic notebook."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sources = notes_rendered(args.cells)
+    # Notes with inline markup exercise the tokenizer, rather than the shortcut for
+    # plain paragraphs.
+    markup = [
+        s.replace("</p>", " <em>and</em> <a href='#x'>more</a></p>") for s in sources
+    ]
+    for name, corpus in [("plain notes", sources), ("notes with markup", markup)]:
+        assert all(deparagraphize(s) == _deparagraphize_soup(s) for s in corpus)
+        soup = measure(corpus, _deparagraphize_soup, args.repeat)
+        streaming = measure(corpus, deparagraphize, args.repeat)
+        print(
+            f"{name} ({len(corpus)}): BeautifulSoup {soup * 1000:.1f} ms, "
+            f"streaming {streaming * 1000:.1f} ms ({soup / streaming:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from argparse import ArgumentParser
+from copy import deepcopy
+import time
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+from .synthetic import synthetic_notebook
+
+
+def time_preprocessing(exporter: ArticleHTMLExporter, nb, repeat: int) -> float:
+    # Times the preprocessors alone, leaving out the notebook copy and validation
+    # performed around them by the exporter.
+    best = float("inf")
+    for _ in range(repeat):
+        nb_copy = deepcopy(nb)
+        resources = exporter._init_resources(None)
+        start = time.perf_counter()
+        for preprocessor in exporter._preprocessors:
+            nb_copy, resources = preprocessor(nb_copy, resources)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the preprocessing time of the chain of article-html "
+            "preprocessors against the fused pipeline."
+        )
+    )
+    parser.add_argument("--cells", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    c = Config()
+    c.ArticleHTMLExporter.fused_pipeline = True
+    exporter_fused = ArticleHTMLExporter(config=c)
+    exporter_chain = ArticleHTMLExporter()
+
+    print(f"{'cells':>8} {'chain (ms)':>12} {'fused (ms)':>12}")
+    for num_cells in args.cells:
+        nb = synthetic_notebook(num_cells)
+        chain = time_preprocessing(exporter_chain, nb, args.repeat)
+        fused = time_preprocessing(exporter_fused, nb, args.repeat)
+        print(f"{num_cells:>8} {chain * 1000:>12.1f} {fused * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from argparse import ArgumentParser
+import random
+import tempfile
+import time
+
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_notebook
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+
+NAMES = ["data", "model", "frame", "result", "values", "weights", "batch", "total"]
+
+
+def _function(rng: random.Random, index: int, num_lines: int) -> str:
+    a, b, c = rng.sample(NAMES, 3)
+    lines = [f"def step_{index}({a}, {b}=None):", f'    """Step {index}."""']
+    for k in range(num_lines):
+        lines.append(
+            rng.choice(
+                [
+                    f"    {c} = [{a}[i] * {k} for i in range(len({a}))]",
+                    f"    if {b} is not None and {k} > len({a}):",
+                    f"        {c} = {{'k': {k}, 'v': {b}}}  # Keep {k}.",
+                    f"    {a} = sum({c}) / max(1, len({c})) + {k}.5",
+                    f"    print(f'{{{a}!r}} at {k}')",
+                ]
+            )
+        )
+    lines.append(f"    return {a}")
+    return "\n".join(lines)
+
+
+def notebook_code(num_cells: int, num_lines: int, seed: int = 0):
+    rng = random.Random(seed)
+    cells = []
+    for i in range(num_cells):
+        cells.append(new_markdown_cell(f"Step {i} of the analysis."))
+        cells.append(new_code_cell(_function(rng, i, num_lines)))
+    return new_notebook(
+        cells=cells,
+        metadata={"language": "en", "language_info": {"name": "python"}}
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Time exporting a code-heavy notebook with a cold highlighting cache, "
+            "then again with the same exporter, from the cache on disk with a fresh "
+            "exporter (as a new batch worker would), and after editing one cell."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=30)
+    args = parser.parse_args()
+    nb = notebook_code(args.cells, args.lines)
+
+    with tempfile.TemporaryDirectory() as dir_:
+        config = Config({"ArticleHTMLExporter": {"render_cache_dir": dir_}})
+        exporter = ArticleHTMLExporter(config=config)
+        exporter.template
+        fresh = ArticleHTMLExporter(config=config)
+        fresh.template
+
+        def edit():
+            nb.cells[1].source += "\n# Edited."
+            return exporter
+
+        for name, get_exporter in [
+            ("Cold cache", lambda: exporter),
+            ("Warm cache, memory", lambda: exporter),
+            ("Warm cache, disk", lambda: fresh),
+            ("One cell edited", edit),
+        ]:
+            exporter_run = get_exporter()
+            start = time.perf_counter()
+            _, resources = exporter_run.from_notebook_node(nb)
+            seconds = time.perf_counter() - start
+            stats = resources["highlight_cache"]["highlight_code"]
+            print(
+                f"{name + ':':<20} {seconds:6.2f} s  "
+                f"({stats['hits']} hits, {stats['misses']} misses)"
+            )
+
+
+if __name__ == "__main__":
+    main()
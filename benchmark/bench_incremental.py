@@ -0,0 +1,42 @@
+from argparse import ArgumentParser
+from copy import deepcopy
+import time
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.incremental import IncrementalArticleHTMLExporter
+
+from .synthetic import synthetic_notebook
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare full and incremental re-exports of a notebook after editing "
+            "one of its cells."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=500)
+    args = parser.parse_args()
+    nb = synthetic_notebook(args.cells)
+    nb_edited = deepcopy(nb)
+    nb_edited.cells[len(nb.cells) // 2].source += " Edited."
+
+    exporter = ArticleHTMLExporter()
+    exporter.from_notebook_node(nb)
+    start = time.perf_counter()
+    exporter.from_notebook_node(nb_edited)
+    print(f"Full re-export:        {time.perf_counter() - start:.3f} s")
+
+    incremental = IncrementalArticleHTMLExporter()
+    incremental.from_notebook_node(nb)
+    start = time.perf_counter()
+    _, resources = incremental.from_notebook_node(nb_edited)
+    print(
+        f"Incremental re-export: {time.perf_counter() - start:.3f} s "
+        f"({resources['incremental']['rendered']} cells rendered, "
+        f"{resources['incremental']['reused']} reused)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+from argparse import ArgumentParser
+import re
+import time
+from typing import *
+
+from nbconvert_article_html import (
+    CollectorLabels,
+    NUM_LEVELS_COUNTER_HIERARCHY,
+    REFERABLE,
+    SolverReferences
+)
+
+from .synthetic import synthetic_notebook
+
+
+# Label collection as it stood before the label registry: nested dicts of numbers,
+# formatted for every label.
+class CollectorLabelsNested(CollectorLabels):
+
+    def preprocess_cell(self, cell, resources, index):
+        for c, unique in cell["metadata"].get("label", {}).items():
+            counters = resources.setdefault("counters", {})
+            if c not in counters:
+                counters[c] = [0] * NUM_LEVELS_COUNTER_HIERARCHY
+            counter = counters[c]
+            i = 1
+            if rx := REFERABLE.get(c, {}).get("hierarchy", ""):
+                if m := re.match(rx, cell["source"]):
+                    i = len(m["count"])
+            counter[i - 1] += 1
+            number = ".".join(str(n) for n in counter[:i])
+            for j in range(i, NUM_LEVELS_COUNTER_HIERARCHY):
+                counter[j] = 0
+            resources.setdefault("labels", {}).setdefault(c, {})[unique] = number
+        return cell, resources
+
+
+def measure(nb, collector: CollectorLabels, repeat: int) -> Tuple[float, float]:
+    best_collect = best_solve = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, resources = collector.preprocess(nb, {})
+        middle = time.perf_counter()
+        SolverReferences().preprocess(nb, resources)
+        end = time.perf_counter()
+        best_collect = min(best_collect, middle - start)
+        best_solve = min(best_solve, end - middle)
+    return best_collect, best_solve
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare label collection and reference solving with the label registry "
+            "against nested dictionaries of labels."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=40_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    nb = synthetic_notebook(
+        args.cells,
+        label_density=0.8,
+        reference_density=0.9,
+        section_density=0.3,
+        depth_max=4
+    )
+    num_labels = sum(len(cell.metadata.get("label", {})) for cell in nb.cells)
+    print(f"{len(nb.cells)} cells, {num_labels} labels")
+    for name, collector in [
+        ("nested dicts", CollectorLabelsNested()),
+        ("registry", CollectorLabels())
+    ]:
+        collect, solve = measure(nb, collector, args.repeat)
+        print(
+            f"{name:>12}: collection {collect * 1000:7.1f} ms, "
+            f"solving {solve * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from argparse import ArgumentParser
+import random
+import tempfile
+import time
+
+from nbformat.v4 import new_markdown_cell, new_notebook
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+
+SYMBOLS = ["x", "y", "\\alpha", "\\beta", "\\lambda", "n", "k"]
+
+
+def _expression(rng: random.Random) -> str:
+    a, b, c = (rng.choice(SYMBOLS) for _ in range(3))
+    return rng.choice(
+        [
+            f"\\frac{{{a}^2 + {b}}}{{{c}}}",
+            f"\\sum_{{{a}=1}}^{{{b}}} {c}_{{{a}}}",
+            f"\\int_0^\\infty e^{{-{a} {b}}} \\, d{b}",
+            f"\\sqrt{{{a}^2 + {b}^2}} \\leq {c}",
+        ]
+    )
+
+
+def notebook_math(num_cells: int, seed: int = 0):
+    rng = random.Random(seed)
+    cells = []
+    for i in range(num_cells):
+        if i % 4 == 0:
+            cells.append(
+                new_markdown_cell(
+                    f"$${_expression(rng)}$$",
+                    metadata={"label": {"eq": f"eq{i}"}}
+                )
+            )
+        else:
+            cells.append(
+                new_markdown_cell(
+                    f"Since ${_expression(rng)}$ and ${_expression(rng)}$, "
+                    f"we get ^[](eq:eq{i - i % 4})."
+                )
+            )
+    return new_notebook(cells=cells, metadata={"language": "en"})
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare exporting a math-heavy notebook with MathJax left to typeset "
+            "its equations in the browser, against typesetting them into MathML at "
+            "export time, with a cold then a warm equation cache."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=400)
+    args = parser.parse_args()
+    nb = notebook_math(args.cells)
+
+    with tempfile.TemporaryDirectory() as dir_:
+        for name, config in [
+            ("MathJax in the browser", {}),
+            ("MathML, cold cache", {"math_prerender": True}),
+            ("MathML, warm cache", {"math_prerender": True}),
+        ]:
+            exporter = ArticleHTMLExporter(
+                config=Config(
+                    {"ArticleHTMLExporter": {**config, "render_cache_dir": dir_}}
+                )
+            )
+            exporter.template
+            start = time.perf_counter()
+            html, resources = exporter.from_notebook_node(nb)
+            seconds = time.perf_counter() - start
+            math = resources.get("math", {})
+            print(
+                f"{name:>22}: {seconds:6.2f} s, {len(html) / 2 ** 10:7.1f} kB, "
+                f"{math.get('typeset', 0)} expressions typeset, "
+                f"MathJax {'included' if math.get('mathjax', True) else 'left out'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
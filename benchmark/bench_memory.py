@@ -0,0 +1,115 @@
+from argparse import ArgumentParser, SUPPRESS
+import json
+import os
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import *
+
+import nbformat
+
+from .synthetic import synthetic_notebook
+
+
+MODES = {
+    "baseline": "exporter loaded, no export",
+    "normal": "from_filename, to a string",
+    "low-memory": "low_memory, to a string",
+    "low-memory-stream": "low_memory, streamed to a file",
+}
+
+
+# Runs in a fresh process, so that its peak RSS measures one mode only.
+def child(mode: str, path: str, path_output: str) -> None:
+    from traitlets.config import Config
+    from nbconvert_article_html import ArticleHTMLExporter
+    exporter = ArticleHTMLExporter(
+        config=Config(
+            {"ArticleHTMLExporter": {"low_memory": mode.startswith("low-memory")}}
+        )
+    )
+    exporter.template
+    start = time.perf_counter()
+    if mode == "low-memory-stream":
+        with open(path_output, "wb") as file:
+            exporter.stream_from_filename(path, file)
+    elif mode != "baseline":
+        html, _ = exporter.from_filename(path)
+        with open(path_output, "w", encoding="utf-8") as file:
+            file.write(html)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak": peak_rss()}))
+
+
+# Peak resident memory of this process. On Linux, ru_maxrss carries over the peak of
+# the parent process across exec, so that /proc is read instead.
+def peak_rss() -> int:
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 2 ** 10
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 2 ** 10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def measure(mode: str, path: Path, path_output: Path) -> Dict[str, float]:
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmark.bench_memory",
+            "--child",
+            mode,
+            str(path),
+            str(path_output)
+        ],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the peak resident memory of exporting a notebook with large "
+            "embedded images normally, in low-memory mode, and in low-memory mode "
+            "streaming to a file. Each export runs in a process of its own."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=200)
+    parser.add_argument("--image-bytes", type=int, default=1_000_000)
+    parser.add_argument("--child", nargs=3, help=SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    nb = synthetic_notebook(
+        args.cells,
+        code_density=0.5,
+        image_bytes=args.image_bytes
+    )
+    with tempfile.TemporaryDirectory() as dir_:
+        path = Path(dir_) / "large.ipynb"
+        nbformat.write(nb, path)
+        path_output = Path(dir_) / "large.html"
+        print(f"Notebook: {os.path.getsize(path) / 2 ** 20:.1f} MB")
+        for mode, description in MODES.items():
+            result = measure(mode, path, path_output)
+            print(
+                f"{mode:>17}: {result['seconds']:6.2f} s, "
+                f"peak RSS {result['peak'] / 2 ** 20:8.1f} MB  ({description})"
+            )
+
+
+if __name__ == "__main__":
+    main()
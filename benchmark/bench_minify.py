@@ -0,0 +1,40 @@
+from argparse import ArgumentParser
+import logging as lg
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+from .synthetic import synthetic_notebook
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Report the size of the article HTML of a synthetic notebook as is, "
+            "minified, and compressed, and the time minification takes."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=1000)
+    parser.add_argument("--code-density", type=float, default=0.3)
+    args = parser.parse_args()
+    lg.disable(lg.WARNING)
+    nb = synthetic_notebook(args.cells, code_density=args.code_density)
+    exporter = ArticleHTMLExporter(minify=True, compress=["gz", "br"], instrument=True)
+    _, resources = exporter.from_notebook_node(nb)
+    report = resources["minify"]
+    print(f"{len(nb.cells)} cells")
+    print(f"{'original':>10}: {report['size']:>10} bytes")
+    print(
+        f"{'minified':>10}: {report['size_minified']:>10} bytes "
+        f"({report['rules_pruned']} style rules pruned)"
+    )
+    for format in ["gz", "br"]:
+        if f"size_{format}" in report:
+            print(f"{format:>10}: {report[f'size_{format}']:>10} bytes")
+    seconds = resources["timings"]["minify"]["seconds"]
+    export = resources["timings"]["export"]["seconds"]
+    print(f"Minification and compression: {seconds * 1000:.1f} ms ", end="")
+    print(f"(export: {export * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
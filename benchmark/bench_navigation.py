@@ -0,0 +1,98 @@
+from argparse import ArgumentParser
+import gzip
+import json
+import random
+import re
+import time
+
+from bs4 import BeautifulSoup
+from nbformat import NotebookNode
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+from .synthetic import synthetic_notebook
+
+
+# Swaps the few words of synthetic notebooks for pseudo-words drawn from a larger
+# vocabulary, with the skewed frequencies of natural language, so that the search
+# index gets a realistic size.
+def diversify(nb: NotebookNode, num_words: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(num_words)
+    ]
+    weights = [1.0 / (rank + 1) for rank in range(num_words)]
+
+    def swap(m: re.Match) -> str:
+        return rng.choices(vocabulary, weights)[0]
+
+    for cell in nb.cells:
+        if cell.cell_type == "markdown":
+            cell.source = re.sub(r"(?<![-:#\w])[a-z]{2,}(?![\w:)])", swap, cell.source)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Measure what the table of contents and search index add to an export, "
+            "the size of the index, and how much faster loading it is than parsing "
+            "the document for its sections, as a viewer would otherwise."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=3000)
+    parser.add_argument("--words", type=int, default=20000)
+    args = parser.parse_args()
+    nb = synthetic_notebook(args.cells, section_density=0.02)
+    diversify(nb, args.words)
+
+    exporter = ArticleHTMLExporter()
+    exporter.template
+    start = time.perf_counter()
+    html, _ = exporter.from_notebook_node(nb)
+    seconds_plain = time.perf_counter() - start
+    exporter = ArticleHTMLExporter(
+        config=Config(
+            {
+                "ArticleHTMLExporter": {
+                    "table_of_contents": True,
+                    "search_index": "sidecar"
+                }
+            }
+        )
+    )
+    exporter.template
+    start = time.perf_counter()
+    _, resources = exporter.from_notebook_node(nb, {"unique_key": "bench"})
+    seconds_navigation = time.perf_counter() - start
+    data = resources["outputs"]["./bench.search.json"]
+
+    print(f"Export, plain:              {seconds_plain:7.2f} s")
+    print(f"Export, contents + search:  {seconds_navigation:7.2f} s")
+    print(
+        f"Search index: {len(resources['search']['terms'])} words over "
+        f"{len(resources['search']['sections'])} sections, {len(data) / 2**10:.1f} kB, "
+        f"{len(gzip.compress(data)) / 2**10:.1f} kB compressed"
+    )
+
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, features="html.parser")
+    headings = soup.select("h1, h2, h3, h4, h5, h6")
+    seconds_parse = time.perf_counter() - start
+    start = time.perf_counter()
+    sections = json.loads(data)["sections"]
+    seconds_load = time.perf_counter() - start
+    print(
+        f"Sections from parsing the document: {seconds_parse:7.3f} s "
+        f"({len(headings)} headings)"
+    )
+    print(
+        f"Sections from the index:            {seconds_load:7.3f} s "
+        f"({len(sections) - 1} sections)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+from argparse import ArgumentParser
+import logging as lg
+import random
+import re
+import time
+
+from nbconvert_article_html import (
+    CollectorLabels,
+    REFERABLE,
+    RX_REFERENCE,
+    SolverReferences
+)
+from nbconvert_article_html.preprocessors import _dereference, _ref2anchor, copy_cell
+from nbformat import NotebookNode
+from nbformat.v4 import new_markdown_cell, new_notebook
+
+
+# Reference solving as it stood before replacements were computed once per notebook.
+class SolverReferencesPerMatch(SolverReferences):
+
+    def preprocess(self, nb, resources):
+        for index, cell in enumerate(nb.cells):
+            nb.cells[index], resources = self.preprocess_cell(cell, resources, index)
+        return nb, resources
+
+    def preprocess_cell(self, cell, resources, index):
+        def solve(m: re.Match) -> str:
+            template = m["text"].strip() or REFERABLE.get(
+                m["counter"], {}
+            ).get("ref", "")
+            number = _dereference(resources, (m["counter"], m["unique"]), "") or "??"
+            return (
+                f'[{template.format(number)}]('
+                f'#{_ref2anchor(m["counter"], m["unique"])})'
+            )
+
+        if cell.cell_type == "markdown":
+            resolved, num_references = RX_REFERENCE.subn(solve, cell.source)
+            if num_references > 0:
+                cell = copy_cell(cell)
+                cell["source"] = resolved
+        return cell, resources
+
+
+def notebook_references(
+    num_cells: int,
+    num_labels: int,
+    references_per_cell: int,
+    share_citing: float,
+    seed: int = 0
+):
+    rng = random.Random(seed)
+    counters = ["sec", "fig", "eq", "tab"]
+    labels = [(rng.choice(counters), f"l{i}") for i in range(num_labels)]
+    cells = [
+        new_markdown_cell(f"# Label {unique}", metadata={"label": {counter: unique}})
+        for counter, unique in labels
+    ]
+    for _ in range(num_cells):
+        if rng.random() < share_citing:
+            source = " ".join(
+                f"Text ^[]({counter}:{unique})"
+                for counter, unique in rng.choices(labels, k=references_per_cell)
+            )
+        else:
+            source = "Text without any reference. " * references_per_cell
+        cells.append(new_markdown_cell(source))
+    return new_notebook(cells=cells)
+
+
+def measure(nb, solver: SolverReferences, repeat: int) -> float:
+    _, resources = CollectorLabels().preprocess(nb, {})
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        solver.preprocess(NotebookNode({**nb, "cells": list(nb.cells)}), resources)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare reference solving with replacements computed once per label "
+            "against replacements computed for each match."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=20_000)
+    parser.add_argument("--labels", type=int, default=2_000)
+    parser.add_argument("--references-per-cell", type=int, default=10)
+    parser.add_argument("--share-citing", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    lg.disable(lg.ERROR)
+    nb = notebook_references(
+        args.cells,
+        args.labels,
+        args.references_per_cell,
+        args.share_citing
+    )
+    for name, solver in [
+        ("per match", SolverReferencesPerMatch()),
+        ("precomputed", SolverReferences())
+    ]:
+        seconds = measure(nb, solver, args.repeat)
+        print(f"{name:>12}: {seconds * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from argparse import ArgumentParser
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import *
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+from .synthetic import synthetic_notebook
+
+
+def measure(export: Callable[[], None]) -> Tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    export()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the peak memory of exporting a notebook with large embedded "
+            "images to a string, then to a file, against streaming it to the file."
+        )
+    )
+    parser.add_argument("--cells", type=int, default=200)
+    parser.add_argument("--image-bytes", type=int, default=1_000_000)
+    args = parser.parse_args()
+    nb = synthetic_notebook(
+        args.cells,
+        code_density=0.5,
+        image_bytes=args.image_bytes
+    )
+    exporter = ArticleHTMLExporter()
+    exporter.template
+    with tempfile.TemporaryDirectory() as dir_:
+        path = os.path.join(dir_, "out.html")
+
+        def in_memory() -> None:
+            html, _ = exporter.from_notebook_node(nb)
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(html)
+
+        def streaming() -> None:
+            with open(path, "wb") as file:
+                exporter.stream_from_notebook_node(nb, file)
+
+        for name, export in [("in memory", in_memory), ("streaming", streaming)]:
+            seconds, peak = measure(export)
+            print(
+                f"{name:>10}: {seconds:6.2f} s, peak {peak / 2 ** 20:8.1f} MB, "
+                f"output {os.path.getsize(path) / 2 ** 20:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from argparse import ArgumentParser
+import json
+import subprocess
+import sys
+import tempfile
+from typing import *
+
+
+# Loads the template, and renders a small notebook so that the templates it extends
+# are loaded as well, in a fresh process; prints the time it took, then the time
+# taken by a second exporter of the same process.
+MEASURE = """\
+import json, logging, sys, time, warnings
+from nbformat.v4 import new_markdown_cell, new_notebook
+logging.disable(logging.ERROR)
+warnings.simplefilter("ignore")
+from nbconvert_article_html import ArticleHTMLExporter
+nb = new_notebook(cells=[new_markdown_cell("Hello")], metadata={"language": "en"})
+seconds = []
+for _ in range(2):
+    start = time.perf_counter()
+    ArticleHTMLExporter(template_cache_dir=sys.argv[1]).from_notebook_node(nb)
+    seconds.append(time.perf_counter() - start)
+print(json.dumps(seconds))
+"""
+
+
+def measure(dir_cache: str) -> List[float]:
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE, dir_cache],
+        check=True,
+        capture_output=True,
+        text=True
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description=(
+            "Compare the time to load the article-html template and export a small "
+            "notebook with a cold template cache, a warm on-disk cache, and a warm "
+            "in-memory cache."
+        )
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    cold, disk, memory = [], [], []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as dir_cache:
+            first, second = measure(dir_cache)
+            cold.append(first)
+            memory.append(second)
+            first, _ = measure(dir_cache)
+            disk.append(first)
+    for name, seconds in [("cold", cold), ("warm disk", disk), ("warm memory", memory)]:
+        print(f"{name:>12}: {min(seconds) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
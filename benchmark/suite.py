@@ -0,0 +1,191 @@
+from argparse import ArgumentParser
+import datetime as dt
+import json
+import platform
+import sys
+import tracemalloc
+from typing import *
+
+import nbconvert
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.instrument import stage
+
+from .synthetic import synthetic_notebook
+
+
+SCENARIOS: Mapping[str, Mapping[str, Any]] = {
+    "small": {"num_cells": 100},
+    "medium": {"num_cells": 1000},
+    "figures": {"num_cells": 500, "code_density": 0.3, "image_bytes": 20_000},
+    "notes": {"num_cells": 1000, "note_density": 0.3},
+    "references": {"num_cells": 1000, "label_density": 0.5, "reference_density": 0.9},
+    "sections": {"num_cells": 1000, "section_density": 0.3, "depth_max": 6},
+}
+
+
+# Exporter that times each of its preprocessors, as well as template rendering, through
+# its own instrumentation, adding the stages nbconvert runs around the preprocessors:
+# copying the notebook, and validating it after each preprocessor.
+class ExporterTimed(ArticleHTMLExporter):
+
+    def __init__(self, **kw: Any) -> None:
+        super().__init__(**kw)
+        self.instrument = True
+
+    def _preprocess(self, nb, resources):
+        with stage(resources, "preprocess"):
+            return super()._preprocess(nb, resources)
+
+    def _validate_preprocessor(self, nbc, preprocessor):
+        if self._timings is None:
+            return super()._validate_preprocessor(nbc, preprocessor)
+        with self._timings.stage("validation"):
+            return super()._validate_preprocessor(nbc, preprocessor)
+
+    def export_timed(self, nb) -> Tuple[str, Dict[str, float]]:
+        html, resources = self.from_notebook_node(nb)
+        seconds = {
+            name: record["seconds"] for name, record in resources["timings"].items()
+        }
+        timings = {
+            name[len("preprocessor:"):]: s
+            for name, s in seconds.items()
+            if name.startswith("preprocessor:")
+        }
+        timings["validation"] = seconds.get("validation", 0.0)
+        timings["copy"] = seconds["preprocess"] - sum(timings.values())
+        timings["template"] = seconds["template"]
+        timings["postprocessing"] = seconds["export"] - sum(timings.values())
+        timings["total"] = seconds["export"]
+        return html, timings
+
+
+def run_scenario(
+    name: str,
+    params: Mapping[str, Any],
+    repeat: int = 3,
+    memory: bool = True
+) -> Dict[str, Any]:
+    nb = synthetic_notebook(**params)
+    exporter = ExporterTimed()
+    exporter.template  # Keeps template loading out of the measurements.
+    exporter.cache_render.size_max_memory = 0  # Each run renders every cell.
+    runs = []
+    for _ in range(repeat):
+        html, timings = exporter.export_timed(nb)
+        runs.append(timings)
+    # Keep the best time of each stage, as the least disturbed by the system.
+    stages = {stage: min(run[stage] for run in runs) for stage in runs[0]}
+    result: Dict[str, Any] = {
+        "name": name,
+        "params": dict(params),
+        "num_cells": len(nb.cells),
+        "seconds": stages,
+        "size_html": len(html.encode("utf-8")),
+    }
+    if memory:
+        tracemalloc.start()
+        exporter.from_notebook_node(nb)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_memory"] = peak
+    return result
+
+
+def compare(
+    results: Mapping[str, Any],
+    baseline: Mapping[str, Any],
+    threshold: float
+) -> List[str]:
+    regressions = []
+    previous = {s["name"]: s for s in baseline.get("scenarios", [])}
+    for scenario in results["scenarios"]:
+        before = previous.get(scenario["name"])
+        if before is None:
+            continue
+        for metric, now, then in [
+            ("total time", scenario["seconds"]["total"], before["seconds"]["total"]),
+            (
+                "peak memory",
+                scenario.get("peak_memory", 0),
+                before.get("peak_memory", 0)
+            )
+        ]:
+            if then > 0 and now > then * threshold:
+                regressions.append(
+                    f"{scenario['name']}: {metric} went from {then:.4g} to {now:.4g} "
+                    f"({now / then:.2f}x)"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(
+        description=(
+            "Time each stage of article-html exports of synthetic notebooks, and "
+            "report the results as JSON."
+        )
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        default=list(SCENARIOS),
+        help=f"Scenarios to run, among {', '.join(SCENARIOS)} (default: all)."
+    )
+    parser.add_argument(
+        "--custom",
+        type=json.loads,
+        default=None,
+        help=(
+            "Additional scenario, as JSON parameters of the synthetic notebook "
+            "generator, e.g. '{\"num_cells\": 5000, \"image_bytes\": 1000}'."
+        )
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file.")
+    parser.add_argument(
+        "--baseline",
+        help="JSON results of a previous run, to report regressions against."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Ratio above which a measure is deemed a regression (default: 1.2)."
+    )
+    args = parser.parse_args()
+
+    scenarios = {name: SCENARIOS[name] for name in args.scenarios}
+    if args.custom:
+        scenarios["custom"] = args.custom
+    results = {
+        "meta": {
+            "date": dt.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "nbconvert": nbconvert.__version__,
+        },
+        "scenarios": [
+            run_scenario(name, params, args.repeat, not args.no_memory)
+            for name, params in scenarios.items()
+        ]
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
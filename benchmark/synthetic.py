@@ -0,0 +1,125 @@
+import base64
+import random
+from nbformat import NotebookNode
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_notebook, new_output
+from typing import *
+
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat"
+).split()
+
+
+def _sentence(rng: random.Random, num_words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(num_words)).capitalize() + "."
+
+
+# Same as rng.randbytes(size), which only Python 3.9 has.
+def random_bytes(rng: random.Random, size: int) -> bytes:
+    return rng.getrandbits(8 * size).to_bytes(size, "little") if size > 0 else b""
+
+
+def synthetic_notebook(
+    num_cells: int = 100,
+    label_density: float = 0.2,
+    reference_density: float = 0.3,
+    note_density: float = 0.05,
+    section_density: float = 0.05,
+    code_density: float = 0.1,
+    image_bytes: int = 0,
+    depth_max: int = 3,
+    seed: int = 0
+) -> NotebookNode:
+    rng = random.Random(seed)
+    cells = []
+    labels: List[Tuple[str, str]] = []
+    num_labels = 0
+
+    def new_label(counter: str) -> str:
+        nonlocal num_labels
+        num_labels += 1
+        unique = f"{counter}{num_labels}"
+        labels.append((counter, unique))
+        return unique
+
+    def references() -> str:
+        if not labels or rng.random() >= reference_density:
+            return ""
+        counter, unique = rng.choice(labels)
+        return f" See ^[]({counter}:{unique})."
+
+    cells.append(
+        new_markdown_cell(_sentence(rng, 40), metadata={"tags": ["abstract"]})
+    )
+    depth = 1
+    while len(cells) < num_cells:
+        r = rng.random()
+        if r < section_density:
+            depth = max(1, min(depth_max, depth + rng.choice([-1, 0, 1])))
+            cells.append(
+                new_markdown_cell(
+                    f"{'#' * depth} {_sentence(rng, 4)}",
+                    metadata={"label": {"sec": new_label("sec")}}
+                )
+            )
+        elif r < section_density + note_density:
+            cells.append(
+                new_markdown_cell(
+                    _sentence(rng),
+                    metadata={"label": {"note": new_label("note")}}
+                )
+            )
+        elif r < section_density + note_density + code_density:
+            outputs = []
+            if image_bytes > 0:
+                payload = base64.b64encode(random_bytes(rng, image_bytes)).decode()
+                outputs.append(
+                    new_output(
+                        "display_data",
+                        data={"image/png": payload, "text/plain": "<Figure>"}
+                    )
+                )
+            metadata = {}
+            if rng.random() < label_density:
+                metadata = {"label": {"fig": new_label("fig")}}
+            cells.append(
+                new_code_cell(
+                    "\n".join(f"x{i} = {i} ** 2" for i in range(8)),
+                    outputs=outputs,
+                    metadata=metadata
+                )
+            )
+            if metadata:
+                cells.append(
+                    new_markdown_cell(_sentence(rng), metadata={"tags": ["legend"]})
+                )
+        elif rng.random() < label_density:
+            if image_bytes > 0 and rng.random() < 0.5:
+                # Figure embedded as a markdown cell attachment.
+                payload = base64.b64encode(random_bytes(rng, image_bytes)).decode()
+                cell = new_markdown_cell(
+                    "![figure](attachment:figure.png)" + references(),
+                    metadata={"label": {"fig": new_label("fig")}}
+                )
+                cell["attachments"] = {"figure.png": {"image/png": payload}}
+                cells.append(cell)
+                cells.append(
+                    new_markdown_cell(_sentence(rng), metadata={"tags": ["legend"]})
+                )
+            else:
+                cells.append(
+                    new_markdown_cell(
+                        "$$x^2 + y^2 = z^2$$",
+                        metadata={"label": {"eq": new_label("eq")}}
+                    )
+                )
+        else:
+            cells.append(new_markdown_cell(_sentence(rng, 30) + references()))
+
+    nb = new_notebook(cells=cells[:num_cells])
+    nb.metadata["language"] = "en"
+    nb.metadata["title"] = "Synthetic notebook"
+    nb.metadata["authors"] = [{"name": "Benchmark"}]
+    return nb
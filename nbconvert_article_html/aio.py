@@ -0,0 +1,99 @@
+import asyncio
+from concurrent.futures import Executor
+from nbformat import NotebookNode
+import os
+from pathlib import Path
+from traitlets.config import Config
+from typing import *
+
+from . import batch
+
+
+# Exports notebooks from asyncio code. The event loop only reads notebook files (on
+# threads of its default executor) and waits: conversions run on a pool of worker
+# processes with warmed-up exporters (as for article-html-batch), so that the
+# template is compiled once per worker and concurrent exports run in parallel.
+# With no processes, a thread of the current process converts the notebooks, with
+# an exporter of its own, so that exporters of different configurations coexist.
+# Cancelling an export, or running out its deadline, withdraws it if it has not
+# started yet; a worker process cannot be interrupted once it has.
+class ExporterAsync:
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        config: Optional[Config] = None,
+        timeout: Optional[float] = None
+    ) -> None:
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.config = config
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            self._pool = batch.make_pool(self.processes, self.config)
+        return self._pool
+
+    async def warm_up(self) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(self.pool, batch.init_worker, self.config)
+                for _ in range(max(1, self.processes))
+            ]
+        )
+
+    async def from_notebook_node(
+        self,
+        nb: NotebookNode,
+        resources: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, Dict]:
+        return await self._run(nb, resources, timeout)
+
+    async def from_filename(
+        self,
+        filename: Union[str, Path],
+        resources: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, Dict]:
+        path = Path(filename)
+        resources = dict(resources or {})
+        resources["metadata"] = {
+            **(resources.get("metadata") or {}),
+            "name": path.stem,
+            "path": str(path.parent)
+        }
+        notebook = await asyncio.get_running_loop().run_in_executor(
+            None,
+            path.read_bytes
+        )
+        return await self._run(notebook, resources, timeout)
+
+    async def _run(
+        self,
+        nb: Union[NotebookNode, bytes],
+        resources: Optional[Dict],
+        timeout: Optional[float]
+    ) -> Tuple[str, Dict]:
+        future = asyncio.wrap_future(
+            self.pool.submit(batch.export_in_worker, nb, resources)
+        )
+        html, resources_out, _ = await asyncio.wait_for(
+            future,
+            self.timeout if timeout is None else timeout
+        )
+        return html, resources_out
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def __aenter__(self) -> "ExporterAsync":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        self.close()
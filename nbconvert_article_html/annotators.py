@@ -0,0 +1,96 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+import logging as lg
+import threading
+from typing import *
+
+
+log = lg.getLogger(__name__)
+
+
+GROUP_ENTRY_POINTS = "nbconvert_article_html.annotators"
+
+
+def _entry_points(group: str) -> Iterable[Any]:
+    found = entry_points()
+    if hasattr(found, "select"):
+        return found.select(group=group)
+    return cast(Dict[str, Any], found).get(group, [])  # Python < 3.10
+
+
+# Resolves annotator descriptors to the functions they name, once per process.
+# A descriptor is either `module:function', where module `.' stands for this
+# package, or the name of an entry point of group `nbconvert_article_html.annotators'
+# (so that third-party packages may provide annotators).
+class RegistryAnnotators:
+
+    def __init__(self, group: str = GROUP_ENTRY_POINTS) -> None:
+        self.group = group
+        self._resolved: Dict[str, Callable] = {}
+        self._plugins: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def plugins(self) -> Mapping[str, Any]:
+        if self._plugins is None:
+            self._plugins = {ep.name: ep for ep in _entry_points(self.group)}
+        return self._plugins
+
+    def register(self, descriptor: str, annotator: Callable) -> None:
+        with self._lock:
+            self._resolved[descriptor] = annotator
+
+    def resolve(self, descriptor: str) -> Callable:
+        try:
+            return self._resolved[descriptor]
+        except KeyError:
+            pass
+        annotator = self._load(descriptor)
+        if not callable(annotator):
+            raise ValueError(f"Annotator `{descriptor}' is not callable.")
+        self.register(descriptor, annotator)
+        return annotator
+
+    def _load(self, descriptor: str) -> Any:
+        if ":" not in descriptor:
+            if descriptor not in self.plugins():
+                raise ValueError(
+                    f"Annotator descriptor `{descriptor}' neither follows the "
+                    "`module:function' convention, nor names an entry point of group "
+                    f"`{self.group}'."
+                )
+            return self.plugins()[descriptor].load()
+        try:
+            name_module, name_annotator = descriptor.split(":")
+        except ValueError:
+            raise ValueError(
+                f"Annotator descriptor `{descriptor}' does not follow the "
+                "`module:function' convention."
+            )
+        # Annotators of this package are resolved through the package itself, so
+        # that the names it exports are the ones in use.
+        module = import_module(__package__ if name_module == "." else name_module)
+        try:
+            return getattr(module, name_annotator)
+        except AttributeError:
+            raise ValueError(
+                f"Module `{module.__name__}' has no annotator `{name_annotator}'."
+            )
+
+    # Resolves all the given descriptors, each given with the indices of the cells
+    # that use it, raising a single error that lists every one that fails.
+    def check(self, descriptors: Mapping[str, Sequence[int]]) -> None:
+        failures = []
+        for descriptor, cells in descriptors.items():
+            try:
+                self.resolve(descriptor)
+            except (ImportError, ValueError) as err:
+                failures.append(
+                    f"`{descriptor}' (cells {', '.join(str(i) for i in cells)}): {err}"
+                )
+        if failures:
+            raise ValueError(
+                f"Cannot resolve {len(failures)} annotators: " + "; ".join(failures)
+            )
+
+
+ANNOTATORS = RegistryAnnotators()
@@ -0,0 +1,95 @@
+from binascii import a2b_base64
+import hashlib
+import logging as lg
+from nbconvert.preprocessors import Preprocessor
+from nbformat import NotebookNode
+import posixpath
+import traitlets as tl
+from typing import *
+
+from .preprocessors import copy_cell, OutputPreprocessor
+
+
+log = lg.getLogger(__name__)
+
+
+EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/svg+xml": ".svg"}
+
+
+def _payload(mime_type: str, data: Any) -> bytes:
+    if mime_type == "image/svg+xml":
+        return ("".join(data) if isinstance(data, list) else data).encode("utf-8")
+    return a2b_base64(data)
+
+
+# Moves the image outputs of the notebook out of the HTML document: each distinct
+# payload is stored once, under a name derived from the hash of its contents, in
+# resources["outputs"] (which nbconvert's writers save next to the document), and
+# outputs reference it through their `filenames' metadata, as with nbconvert's
+# ExtractOutputPreprocessor. Payloads no larger than `size_inline_max' stay inline.
+class ExtractorAssets(Preprocessor):
+
+    dir_assets = tl.Unicode("assets").tag(config=True)
+    size_inline_max = tl.Int(0).tag(config=True)
+
+    def preprocess(self, nb: NotebookNode, resources: Dict) -> OutputPreprocessor:
+        if not isinstance(resources.get("outputs"), dict):
+            resources["outputs"] = {}
+        self._stats = {"unique": 0, "references": 0, "inline": 0, "size": 0}
+        self._names: Dict[str, str] = {}
+        nb, resources = super().preprocess(nb, resources)
+        resources["assets"] = self._stats
+        log.debug(
+            f"Externalized {self._stats['references']} image outputs as "
+            f"{self._stats['unique']} assets ({self._stats['size']} bytes); "
+            f"{self._stats['inline']} left inline"
+        )
+        return nb, resources
+
+    def preprocess_cell(
+        self,
+        cell: NotebookNode,
+        resources: Dict,
+        index: int
+    ) -> Tuple[NotebookNode, Dict]:
+        if not any(
+            mime_type in output.get("data", {})
+            for output in cell.get("outputs", [])
+            for mime_type in EXTENSIONS
+        ):
+            return cell, resources
+        outputs = [self._extract(output, resources) for output in cell.outputs]
+        if all(new is old for new, old in zip(outputs, cell.outputs)):
+            return cell, resources
+        cell = copy_cell(cell)
+        cell["outputs"] = outputs
+        return cell, resources
+
+    def _extract(self, output: NotebookNode, resources: Dict) -> NotebookNode:
+        filenames = dict(output.get("metadata", {}).get("filenames", {}))
+        payloads = resources.get("payloads")
+        for mime_type, extension in EXTENSIONS.items():
+            if mime_type not in output.get("data", {}) or mime_type in filenames:
+                continue
+            data = output.data[mime_type]
+            if payloads is not None:
+                data = payloads.resolve(data)
+            payload = _payload(mime_type, data)
+            if len(payload) <= self.size_inline_max:
+                self._stats["inline"] += 1
+                continue
+            digest = hashlib.sha256(payload).hexdigest()
+            if digest not in self._names:
+                name = posixpath.join(self.dir_assets, digest[:32] + extension)
+                self._names[digest] = name
+                if name not in resources["outputs"]:
+                    resources["outputs"][name] = payload
+                    self._stats["unique"] += 1
+                    self._stats["size"] += len(payload)
+            filenames[mime_type] = self._names[digest]
+            self._stats["references"] += 1
+        if filenames == output.get("metadata", {}).get("filenames", {}):
+            return output
+        metadata = NotebookNode(output.get("metadata", {}))
+        metadata["filenames"] = filenames
+        return NotebookNode({**output, "metadata": metadata})
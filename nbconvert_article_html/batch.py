@@ -0,0 +1,270 @@
+from argparse import ArgumentParser
+from concurrent.futures import (
+    as_completed,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor
+)
+import logging as lg
+from nbformat import NotebookNode
+from pathlib import Path
+import sys
+import threading
+import time
+from traitlets.config import Config
+from typing import *
+
+
+log = lg.getLogger(__name__)
+
+
+class Conversion(NamedTuple):
+    source: Path
+    output: Optional[Path]
+    size: int
+    seconds: float
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+class ReportBatch(NamedTuple):
+    conversions: Sequence[Conversion]
+    seconds: float
+
+    @property
+    def failures(self) -> Sequence[Conversion]:
+        return [c for c in self.conversions if not c.ok]
+
+    @property
+    def throughput(self) -> float:
+        return len(self.conversions) / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        total = sum(c.size for c in self.conversions)
+        return total / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.conversions) - len(self.failures)} notebooks converted, "
+            f"{len(self.failures)} failed in {self.seconds:.2f} s "
+            f"({self.throughput:.2f} notebooks/s, "
+            f"{self.bytes_per_second / 2 ** 20:.2f} MB/s)"
+        )
+
+
+# Each worker of a pool keeps a single exporter, so that the template environment is
+# loaded and compiled once per worker rather than once per notebook. Workers of
+# in-process pools being threads, the exporter is kept thread-local, so that pools
+# of different configurations do not share it.
+_worker = threading.local()
+
+
+def init_worker(config: Optional[Config]) -> None:
+    from .exporter import ArticleHTMLExporter
+    _worker.exporter = ArticleHTMLExporter(config=config)
+    _worker.exporter.template  # Warms up the Jinja environment.
+
+
+def _exporter_worker() -> Any:
+    if getattr(_worker, "exporter", None) is None:
+        init_worker(None)
+    return _worker.exporter
+
+
+# Converts a notebook, or the JSON text of one, with the exporter of the worker it
+# runs on, in a pool from make_pool; returns the HTML document, the resources that
+# can cross back to the parent process (not functions, mostly), and the time the
+# conversion took.
+def export_in_worker(
+    nb: Union[NotebookNode, bytes],
+    resources: Optional[Dict] = None
+) -> Tuple[str, Dict, float]:
+    import nbformat
+    start = time.perf_counter()
+    node = (
+        nbformat.reads(nb.decode("utf-8"), as_version=4)
+        if isinstance(nb, bytes)
+        else nb
+    )
+    html, resources = _exporter_worker().from_notebook_node(node, resources)
+    return (
+        html,
+        {k: v for k, v in resources.items() if not callable(v)},
+        time.perf_counter() - start
+    )
+
+
+# Pool of workers with warmed-up exporters; with no processes, a single thread of
+# the current process does the work, as exporters are not thread-safe.
+def make_pool(processes: Optional[int], config: Optional[Config]) -> Executor:
+    if processes == 0:
+        return ThreadPoolExecutor(
+            max_workers=1,
+            initializer=init_worker,
+            initargs=(config,)
+        )
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=init_worker,
+        initargs=(config,)
+    )
+
+
+def _convert(
+    source: Path,
+    dir_output: Path,
+    resources: Optional[Dict] = None
+) -> Conversion:
+    from nbconvert.writers import FilesWriter
+    start = time.perf_counter()
+    try:
+        html, resources = _exporter_worker().from_filename(str(source), resources)
+        dir_output.mkdir(parents=True, exist_ok=True)
+        output = FilesWriter(build_directory=str(dir_output)).write(
+            html,
+            resources,
+            notebook_name=source.stem
+        )
+        return Conversion(
+            source,
+            Path(output),
+            len(html.encode("utf-8")),
+            time.perf_counter() - start
+        )
+    except Exception as err:
+        return Conversion(
+            source,
+            None,
+            0,
+            time.perf_counter() - start,
+            f"{type(err).__name__}: {err}"
+        )
+
+
+def _plan(
+    paths: Iterable[Union[str, Path]],
+    dir_output: Path
+) -> Iterator[Tuple[Path, Path]]:
+    for path_ in paths:
+        path = Path(path_)
+        if path.is_dir():
+            for source in sorted(path.rglob("*.ipynb")):
+                if ".ipynb_checkpoints" in source.parts:
+                    continue
+                yield source, dir_output / source.parent.relative_to(path)
+        else:
+            yield path, dir_output
+
+
+def export_batch(
+    paths: Iterable[Union[str, Path]],
+    dir_output: Union[str, Path],
+    processes: Optional[int] = None,
+    config: Optional[Config] = None,
+    on_result: Optional[Callable[[Conversion], None]] = None
+) -> ReportBatch:
+    plan = list(_plan(paths, Path(dir_output)))
+    conversions = []
+    start = time.perf_counter()
+
+    def record(conversion: Conversion) -> None:
+        if not conversion.ok:
+            log.error(f"Failed to convert `{conversion.source}': {conversion.error}")
+        conversions.append(conversion)
+        if on_result is not None:
+            on_result(conversion)
+
+    # With no processes, notebooks are converted serially, in-process: handy for
+    # debugging.
+    with make_pool(processes, config) as pool:
+        futures: Dict[Future, Path] = {
+            pool.submit(_convert, source, dir_dest): source
+            for source, dir_dest in plan
+        }
+        for future in as_completed(futures):
+            try:
+                conversion = future.result()
+            except Exception as err:
+                # The worker died outright (e.g. killed by the OOM killer).
+                conversion = Conversion(
+                    futures[future],
+                    None,
+                    0,
+                    0.0,
+                    f"{type(err).__name__}: {err}"
+                )
+            record(conversion)
+
+    return ReportBatch(conversions, time.perf_counter() - start)
+
+
+# Configuration of the exporter from a file, as for jupyter nbconvert: Python if its
+# name ends with `.py', JSON otherwise.
+def load_config(path: Union[str, Path]) -> Config:
+    from traitlets.config.loader import JSONFileConfigLoader, PyFileConfigLoader
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"No configuration file `{path}'")
+    loader = PyFileConfigLoader if path.suffix == ".py" else JSONFileConfigLoader
+    return loader(path.name, str(path.parent.resolve())).load_config()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = ArgumentParser(
+        description=(
+            "Convert many notebooks, or directories of notebooks, to article-html "
+            "using a pool of worker processes."
+        )
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Notebooks, or directories searched recursively for notebooks."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=".",
+        help="Directory where to write the HTML files (default: current directory)."
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs; 0 runs serially)."
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        default=None,
+        help=(
+            "Configuration file of the exporter, in Python or JSON, as for jupyter "
+            "nbconvert (e.g. c.ArticleHTMLExporter.minify = True)."
+        )
+    )
+    args = parser.parse_args(argv)
+    lg.basicConfig(level=lg.INFO, format="%(levelname)s %(message)s")
+
+    def progress(conversion: Conversion) -> None:
+        if conversion.ok:
+            log.info(
+                f"{conversion.source} -> {conversion.output} "
+                f"({conversion.seconds:.2f} s)"
+            )
+
+    config = load_config(args.config) if args.config else None
+    report = export_batch(args.paths, args.output, args.processes, config, progress)
+    print(report.summary())
+    for failure in report.failures:
+        print(f"FAILED {failure.source}: {failure.error}", file=sys.stderr)
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
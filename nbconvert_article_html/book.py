@@ -0,0 +1,316 @@
+from argparse import ArgumentParser
+from concurrent.futures import Future
+import hashlib
+import json
+import logging as lg
+from pathlib import Path
+import posixpath
+import sys
+import time
+from traitlets.config import Config
+from typing import *
+
+from . import batch
+from .batch import Conversion
+
+
+log = lg.getLogger(__name__)
+
+
+NAME_INDEX = ".article-html-book.json"
+
+
+# What the index of a book remembers of each of its chapters: the labels it defines
+# (with their numbers) and those it cites, and, as of its last export, the documents
+# and numbers its references to other chapters were resolved to. The paths of the
+# HTML documents are relative to the output directory of the book.
+class Chapter(NamedTuple):
+    source: str
+    output: str
+    size: int
+    mtime_ns: int
+    digest: str
+    labels: Dict[str, Dict[str, str]]
+    references: List[str]
+    resolved: Dict[str, List[str]] = {}
+    built: bool = False
+
+
+class IndexBook(NamedTuple):
+    chapters: Dict[str, Chapter] = {}
+
+    def save(self, path: Union[str, Path]) -> None:
+        data = {"chapters": {k: c._asdict() for k, c in self.chapters.items()}}
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IndexBook":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls({k: Chapter(**c) for k, c in data["chapters"].items()})
+
+    # Document and number of each label of the book, indexed by counter then by
+    # unique name. Should chapters define the same label, the first one in the
+    # book's order has it.
+    def labels(self) -> Dict[str, Dict[str, Tuple[str, str]]]:
+        owners: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        duplicates = []
+        for chapter in self.chapters.values():
+            for counter, uniques in chapter.labels.items():
+                owned = owners.setdefault(counter, {})
+                for unique, number in uniques.items():
+                    if unique in owned:
+                        duplicates.append(f"`{counter}:{unique}' in {chapter.source}")
+                    else:
+                        owned[unique] = (chapter.output, number)
+        if duplicates:
+            log.warning(
+                f"Labels defined by more than one chapter: {'; '.join(duplicates)}"
+            )
+        return owners
+
+    # The references of the given chapter to labels of other chapters, with the
+    # relative link to the document defining each and its number there.
+    def resolve(
+        self,
+        chapter: Chapter,
+        owners: Mapping[str, Mapping[str, Tuple[str, str]]]
+    ) -> Dict[str, List[str]]:
+        resolved = {}
+        for label in chapter.references:
+            counter, unique = label.split(":", 1)
+            if unique in chapter.labels.get(counter, {}):
+                continue
+            owner = owners.get(counter, {}).get(unique)
+            if owner is not None:
+                output, number = owner
+                href = posixpath.relpath(output, posixpath.dirname(chapter.output))
+                resolved[label] = [href, number]
+        return resolved
+
+
+# Runs in the worker processes: reads a chapter for the labels it defines and cites.
+def _scan(source: Path, output: str) -> Chapter:
+    import nbformat
+    from .preprocessors import _is_cell_markdown, CollectorLabels, RX_REFERENCE
+    stat = source.stat()
+    data = source.read_bytes()
+    nb = nbformat.reads(data.decode("utf-8"), as_version=4)
+    resources: Dict = {}
+    collector = CollectorLabels()
+    for index, cell in enumerate(nb.cells):
+        collector.preprocess_cell(cell, resources, index)
+    references = {
+        f"{m['counter']}:{m['unique']}"
+        for cell in nb.cells
+        if "^[" in cell.source and _is_cell_markdown(cell)
+        for m in RX_REFERENCE.finditer(cell.source)
+    }
+    return Chapter(
+        str(source),
+        output,
+        stat.st_size,
+        stat.st_mtime_ns,
+        hashlib.sha256(data).hexdigest(),
+        {c: dict(u) for c, u in resources.get("labels", {}).items()},
+        sorted(references)
+    )
+
+
+def _labels_external(resolved: Mapping[str, List[str]]) -> Dict:
+    external: Dict[str, Dict[str, List[str]]] = {}
+    for label, target in resolved.items():
+        counter, unique = label.split(":", 1)
+        external.setdefault(counter, {})[unique] = target
+    return external
+
+
+# Whether the document of a chapter, as last exported, is still current.
+def _is_current(
+    old: Optional[Chapter],
+    chapter: Chapter,
+    resolved: Mapping[str, List[str]],
+    dir_output: Path
+) -> bool:
+    if old is None or not old.built or old.digest != chapter.digest:
+        return False
+    return old.resolved == resolved and (dir_output / chapter.output).is_file()
+
+
+class ReportBook(NamedTuple):
+    chapters: int
+    scanned: int
+    conversions: Sequence[Conversion]
+    seconds: float
+
+    @property
+    def failures(self) -> Sequence[Conversion]:
+        return [c for c in self.conversions if not c.ok]
+
+    def summary(self) -> str:
+        return (
+            f"{self.chapters} chapters: {self.scanned} scanned for labels, "
+            f"{len(self.conversions) - len(self.failures)} converted, "
+            f"{len(self.failures)} failed, "
+            f"{self.chapters - len(self.conversions)} up to date "
+            f"in {self.seconds:.2f} s"
+        )
+
+
+# Exports the chapters of a book, each to its own HTML document, solving references
+# across chapters into links between documents. The notebooks are first scanned for
+# the labels they define and cite, in parallel; the resulting index is kept (in the
+# output directory by default), so that later runs scan again only the notebooks
+# that changed since, and convert only those that changed, or whose references to
+# other chapters now resolve differently.
+def export_book(
+    paths: Iterable[Union[str, Path]],
+    dir_output: Union[str, Path],
+    processes: Optional[int] = None,
+    config: Optional[Config] = None,
+    path_index: Optional[Union[str, Path]] = None,
+    force: bool = False,
+    on_result: Optional[Callable[[Conversion], None]] = None
+) -> ReportBook:
+    start = time.perf_counter()
+    dir_output = Path(dir_output)
+    path_index = Path(path_index) if path_index else dir_output / NAME_INDEX
+    previous = IndexBook.load(path_index) if path_index.is_file() else IndexBook()
+    plan = list(batch._plan(paths, dir_output))
+    conversions = []
+
+    def record(conversion: Conversion) -> None:
+        if not conversion.ok:
+            log.error(f"Failed to convert `{conversion.source}': {conversion.error}")
+        conversions.append(conversion)
+        if on_result is not None:
+            on_result(conversion)
+
+    with batch.make_pool(processes, config) as pool:
+        chapters: Dict[str, Optional[Chapter]] = {}
+        scans: Dict[Future, Path] = {}
+        for source, dir_dest in plan:
+            output = (dir_dest / f"{source.stem}.html").relative_to(dir_output)
+            old = previous.chapters.get(str(source))
+            stat = source.stat()
+            if old is not None and not force and (
+                (old.size, old.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+            ):
+                chapters[str(source)] = old._replace(output=output.as_posix())
+            else:
+                chapters[str(source)] = None
+                scans[pool.submit(_scan, source, output.as_posix())] = source
+        for future, source in scans.items():
+            try:
+                chapters[str(source)] = future.result()
+            except Exception as err:
+                del chapters[str(source)]
+                record(Conversion(source, None, 0, 0.0, f"{type(err).__name__}: {err}"))
+
+        index = IndexBook({k: c for k, c in chapters.items() if c is not None})
+        owners = index.labels()
+        conversions_pending: Dict[Future, Tuple[Chapter, Dict[str, List[str]]]] = {}
+        for key, chapter in index.chapters.items():
+            resolved = index.resolve(chapter, owners)
+            if not force and _is_current(
+                previous.chapters.get(key),
+                chapter,
+                resolved,
+                dir_output
+            ):
+                index.chapters[key] = chapter._replace(resolved=resolved, built=True)
+                continue
+            future = pool.submit(
+                batch._convert,
+                Path(chapter.source),
+                (dir_output / chapter.output).parent,
+                {"labels_external": _labels_external(resolved)}
+            )
+            conversions_pending[future] = (chapter, resolved)
+        for future, (chapter, resolved) in conversions_pending.items():
+            try:
+                conversion = future.result()
+            except Exception as err:
+                # The worker died outright (e.g. killed by the OOM killer).
+                conversion = Conversion(
+                    Path(chapter.source),
+                    None,
+                    0,
+                    0.0,
+                    f"{type(err).__name__}: {err}"
+                )
+            index.chapters[chapter.source] = chapter._replace(
+                resolved=resolved,
+                built=conversion.ok
+            )
+            record(conversion)
+
+    path_index.parent.mkdir(parents=True, exist_ok=True)
+    index.save(path_index)
+    return ReportBook(len(plan), len(scans), conversions, time.perf_counter() - start)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = ArgumentParser(
+        description=(
+            "Convert the chapters of a book, each a notebook, to article-html "
+            "documents whose references to one another's labels are links between "
+            "documents. Only chapters that changed, or whose references to other "
+            "chapters did, are converted again."
+        )
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Chapters, or directories searched recursively for them, in order."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=".",
+        help="Directory where to write the HTML files (default: current directory)."
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs; 0 runs serially)."
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        help=f"Path of the label index (default: {NAME_INDEX} in the output directory)."
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Scan and convert all chapters, regardless of the index."
+    )
+    args = parser.parse_args(argv)
+    lg.basicConfig(level=lg.INFO, format="%(levelname)s %(message)s")
+
+    def progress(conversion: Conversion) -> None:
+        if conversion.ok:
+            log.info(
+                f"{conversion.source} -> {conversion.output} "
+                f"({conversion.seconds:.2f} s)"
+            )
+
+    report = export_book(
+        args.paths,
+        args.output,
+        args.processes,
+        None,
+        args.index,
+        args.force,
+        progress
+    )
+    print(report.summary())
+    for failure in report.failures:
+        print(f"FAILED {failure.source}: {failure.error}", file=sys.stderr)
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+from collections import OrderedDict
+import hashlib
+import jinja2
+from jinja2.bccache import Bucket, BytecodeCache
+import json
+import logging as lg
+import os
+from pathlib import Path
+import tempfile
+import threading
+from types import CodeType
+from typing import *
+
+
+log = lg.getLogger(__name__)
+
+
+def key_content(*parts: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+# Content-addressed cache of rendered text fragments. Fragments are kept in a
+# size-bounded, least-recently-used in-memory tier, backed by an optional on-disk
+# tier (also size-bounded and evicted by least recent use) so that they survive
+# across runs and processes.
+class CacheFragments:
+
+    def __init__(
+        self,
+        dir_: Union[str, Path, None] = None,
+        size_max_memory: int = 16 * 2 ** 20,
+        size_max_disk: int = 256 * 2 ** 20
+    ) -> None:
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._size_memory = 0
+        self.size_max_memory = size_max_memory
+        self.dir = Path(dir_) if dir_ else None
+        self.size_max_disk = size_max_disk
+        self._size_disk = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.dir is not None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._size_disk = sum(p.stat().st_size for p in self._files_disk())
+
+    def _files_disk(self) -> Iterator[Path]:
+        assert self.dir is not None
+        return self.dir.glob("*/*.txt")
+
+    def _path(self, key: str) -> Path:
+        assert self.dir is not None
+        return self.dir / key[:2] / f"{key}.txt"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        if self.dir is not None:
+            path = self._path(key)
+            try:
+                fragment = path.read_text(encoding="utf-8")
+                os.utime(path)  # Marks the entry as recently used.
+            except OSError:
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                self._remember(key, fragment)
+                return fragment
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, fragment: str) -> None:
+        self._remember(key, fragment)
+        if self.dir is not None:
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            fd, name_temp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(fragment)
+            size = os.stat(name_temp).st_size
+            try:
+                size_replaced = path.stat().st_size
+            except OSError:
+                size_replaced = 0
+            os.replace(name_temp, path)
+            with self._lock:
+                self._size_disk += size - size_replaced
+                must_evict = self._size_disk > self.size_max_disk
+            if must_evict:
+                self._evict_disk()
+
+    def get_or_render(self, key: str, render: Callable[[], str]) -> str:
+        fragment = self.get(key)
+        if fragment is None:
+            fragment = render()
+            self.put(key, fragment)
+        return fragment
+
+    def _remember(self, key: str, fragment: str) -> None:
+        size = len(fragment)
+        if size > self.size_max_memory:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = fragment
+            self._size_memory += size
+            while self._size_memory > self.size_max_memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._size_memory -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        # Evict down to 90% of the bound, so as not to evict on every write.
+        entries = []
+        for path in self._files_disk():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        size = sum(size for _, size, _ in entries)
+        target = int(self.size_max_disk * 0.9)
+        for _, size_entry, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            size -= size_entry
+        with self._lock:
+            self._size_disk = size
+        log.debug(f"Evicted render cache entries down to {size} bytes")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Settings of a Jinja environment that shape the code compiled from its templates.
+def _fingerprint_environment(environment: jinja2.Environment) -> Tuple:
+    return (
+        jinja2.__version__,
+        environment.block_start_string,
+        environment.block_end_string,
+        environment.variable_start_string,
+        environment.variable_end_string,
+        environment.comment_start_string,
+        environment.comment_end_string,
+        environment.line_statement_prefix,
+        environment.line_comment_prefix,
+        environment.trim_blocks,
+        environment.lstrip_blocks,
+        environment.newline_sequence,
+        environment.keep_trailing_newline,
+        environment.optimized,
+        environment.is_async,
+        str(environment.autoescape),
+        sorted(environment.extensions),
+        sorted(environment.filters),
+        sorted(environment.tests),
+    )
+
+
+# Cache of the code compiled from Jinja templates, keyed by the hash of each
+# template's source and the settings of the environment that compiles it. Code is
+# kept in memory, so that the environments of all the exporters of a process
+# compile each template once, and optionally on disk, so that it survives across
+# runs and processes.
+class CacheBytecode(BytecodeCache):
+
+    def __init__(self, dir_: Union[str, Path, None] = None) -> None:
+        self._codes: Dict[Tuple[str, str], CodeType] = {}
+        self.dir = Path(dir_) if dir_ else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.dir is not None:
+            self.dir.mkdir(parents=True, exist_ok=True)
+
+    def get_bucket(
+        self,
+        environment: jinja2.Environment,
+        name: str,
+        filename: Optional[str],
+        source: str
+    ) -> Bucket:
+        bucket = Bucket(
+            environment,
+            key_content(_fingerprint_environment(environment), name, filename),
+            self.get_source_checksum(source)
+        )
+        self.load_bytecode(bucket)
+        return bucket
+
+    def _path(self, bucket: Bucket) -> Path:
+        assert self.dir is not None
+        return self.dir / f"{bucket.key}-{bucket.checksum}.cache"
+
+    def load_bytecode(self, bucket: Bucket) -> None:
+        with self._lock:
+            code = self._codes.get((bucket.key, bucket.checksum))
+        if code is None and self.dir is not None:
+            try:
+                with self._path(bucket).open("rb") as file:
+                    bucket.load_bytecode(file)
+            except OSError:
+                pass
+            except Exception as err:
+                log.warning(f"Discarding corrupt compiled template: {err}")
+                bucket.reset()
+            code = bucket.code
+            if code is not None:
+                with self._lock:
+                    self._codes[bucket.key, bucket.checksum] = code
+        with self._lock:
+            if code is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        bucket.code = code
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        if bucket.code is None:
+            return
+        with self._lock:
+            self._codes[bucket.key, bucket.checksum] = bucket.code
+        if self.dir is not None:
+            path = self._path(bucket)
+            try:
+                fd, name_temp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as file:
+                    bucket.write_bytecode(file)
+                os.replace(name_temp, path)
+            except OSError as err:
+                log.warning(f"Cannot store compiled template `{path}': {err}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes.clear()
+        if self.dir is not None:
+            for path in self.dir.glob("*.cache"):
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_caches_bytecode: Dict[Optional[Path], CacheBytecode] = {}
+_lock_caches_bytecode = threading.Lock()
+
+
+# The bytecode cache shared by all the exporters of the process that use the given
+# directory (or none).
+def cache_bytecode(dir_: Union[str, Path, None] = None) -> CacheBytecode:
+    path = Path(dir_).resolve() if dir_ else None
+    with _lock_caches_bytecode:
+        if path not in _caches_bytecode:
+            _caches_bytecode[path] = CacheBytecode(path)
+        return _caches_bytecode[path]
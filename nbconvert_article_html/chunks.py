@@ -0,0 +1,163 @@
+from html import escape
+import json
+import re
+from typing import *
+from urllib.parse import quote
+
+
+# Elements the template puts before each cell starting a chunk, and after the last
+# cell, when chunking: unlike comments, they survive minification.
+MARK_CHUNK = '<template data-article-html-chunk="{}"></template>'
+MARK_CHUNKS_END = '<template data-article-html-chunk=""></template>'
+RX_MARK_CHUNK = re.compile(r'<template data-article-html-chunk="([^"]*)"></template>')
+RX_ANCHOR = re.compile(r'\s(?:name|id)="([^"]+)"')
+
+
+# Loads the chunks of the document as their placeholder nears the viewport, or as
+# the reader follows a link to one of their anchors. Each chunk is a script calling
+# articleHtmlChunk() with its HTML, as scripts load from the local file system,
+# where browsers refuse to fetch().
+SCRIPT_LOADER = """<script>
+(function () {
+  var sections = document.querySelectorAll("section.article-html-chunk");
+  var anchors = JSON.parse(
+    document.getElementById("article-html-anchors").textContent
+  );
+  var waiting = {};
+  window.articleHtmlChunk = function (index, html) {
+    var section = sections[index];
+    section.innerHTML = html;
+    section.removeAttribute("style");
+    section.setAttribute("data-loaded", "");
+    if (window.MathJax) {
+      if (MathJax.typesetPromise) {
+        MathJax.typesetPromise([section]);
+      } else if (MathJax.Hub) {
+        MathJax.Hub.Queue(["Typeset", MathJax.Hub, section]);
+      }
+    }
+    var callbacks = waiting[index] || [];
+    waiting[index] = [];
+    callbacks.forEach(function (callback) { callback(); });
+  };
+  function load(index, callback) {
+    var section = sections[index];
+    if (section.hasAttribute("data-loaded")) {
+      if (callback) callback();
+      return;
+    }
+    if (!(index in waiting)) {
+      waiting[index] = [];
+      var script = document.createElement("script");
+      script.src = section.getAttribute("data-src");
+      document.head.appendChild(script);
+    }
+    if (callback) waiting[index].push(callback);
+  }
+  function reveal(anchor) {
+    var index = anchors[anchor];
+    if (index === undefined || sections[index].hasAttribute("data-loaded")) {
+      return false;
+    }
+    load(index, function () {
+      var target = document.getElementById(anchor)
+        || document.getElementsByName(anchor)[0];
+      if (target) target.scrollIntoView();
+    });
+    return true;
+  }
+  if ("IntersectionObserver" in window) {
+    var observer = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          load(Array.prototype.indexOf.call(sections, entry.target));
+        }
+      });
+    }, {rootMargin: "100% 0px"});
+    sections.forEach(function (section) { observer.observe(section); });
+  } else {
+    sections.forEach(function (section, index) { load(index); });
+  }
+  document.addEventListener("click", function (event) {
+    var link = event.target.closest && event.target.closest('a[href^="#"]');
+    if (!link) return;
+    var anchor = decodeURIComponent(link.getAttribute("href").slice(1));
+    if (reveal(anchor)) {
+      event.preventDefault();
+      history.pushState(null, "", "#" + anchor);
+    }
+  });
+  window.addEventListener("hashchange", function () {
+    reveal(decodeURIComponent(location.hash.slice(1)));
+  });
+  if (location.hash) reveal(decodeURIComponent(location.hash.slice(1)));
+})();
+</script>
+"""
+
+
+class Chunk(NamedTuple):
+    anchor: str
+    path: str
+    html: str
+    anchors: List[str]
+
+    def script(self, index: int) -> bytes:
+        html = json.dumps(self.html, ensure_ascii=False)
+        html = html.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+        return f"articleHtmlChunk({index}, {html});\n".encode("utf-8")
+
+
+# Splits the document at the marks the template put before the cells starting a
+# section, into an index page, which keeps the head of the document, what precedes
+# the first section and what follows the last (such as the notes), and one chunk
+# per section, stored as the script of the given path (relative to the document). In
+# the index page, each chunk is left a placeholder, and the index of the chunk
+# defining each anchor is listed for the loader.
+def split_document(html: str, path_chunks: str) -> Tuple[str, List[Chunk]]:
+    end = html.find(MARK_CHUNKS_END)
+    if end < 0:
+        end = len(html)
+    marks = list(RX_MARK_CHUNK.finditer(html, 0, end))
+    if not marks:
+        return RX_MARK_CHUNK.sub("", html), []
+
+    chunks = []
+    for k, m in enumerate(marks):
+        stop = marks[k + 1].start() if k + 1 < len(marks) else end
+        fragment = html[m.end():stop]
+        chunks.append(
+            Chunk(
+                m[1],
+                f"{path_chunks}/{k:04d}.js",
+                fragment,
+                [a for a in RX_ANCHOR.findall(fragment) if not a.startswith("cell-id=")]
+            )
+        )
+    anchors: Dict[str, int] = {}
+    for k, chunk in enumerate(chunks):
+        for anchor in chunk.anchors:
+            anchors.setdefault(anchor, k)
+    placeholders = "".join(
+        f'<section class="article-html-chunk" data-src="{escape(quote(chunk.path))}" '
+        f'style="min-height: 50vh"></section>\n'
+        for chunk in chunks
+    )
+    index_anchors = json.dumps(anchors).replace("</", "<\\/")
+    rest = RX_MARK_CHUNK.sub("", html[end:])
+    i = rest.rfind("</body>")
+    if i < 0:
+        i = len(rest)
+    index = "".join(
+        [
+            html[:marks[0].start()],
+            placeholders,
+            rest[:i],
+            f'<script type="application/json" id="article-html-anchors">'
+            f"{index_anchors}</script>\n",
+            SCRIPT_LOADER,
+            rest[i:]
+        ]
+    )
+    return index, chunks
@@ -0,0 +1,351 @@
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import Executor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging as lg
+import os
+from pathlib import Path
+import socket
+from socketserver import BaseServer, ThreadingUnixStreamServer
+import stat
+import sys
+import threading
+import time
+from traitlets.config import Config
+from typing import *
+from urllib.parse import urlparse
+
+from . import batch
+
+
+log = lg.getLogger(__name__)
+
+
+# Removes the Unix socket left at the given path, if any, but no other kind of file.
+def _unlink_socket(path: Union[str, Path]) -> None:
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"`{path}' exists and is not a socket; not removing it")
+    os.unlink(path)
+
+
+class Overloaded(Exception):
+    pass
+
+
+# Latencies of the most recent conversions, and counts of all requests since the
+# daemon started.
+class Metrics:
+
+    def __init__(self, size_window: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=size_window)
+        self._conversions: Deque[float] = deque(maxlen=size_window)
+        self.counts = {"ok": 0, "failed": 0, "rejected": 0, "timeout": 0}
+        self.started = time.time()
+
+    def record(
+        self,
+        outcome: str,
+        latency: float = 0.0,
+        conversion: float = 0.0
+    ) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+            if outcome == "ok":
+                self._latencies.append(latency)
+                self._conversions.append(conversion)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            conversions = sorted(self._conversions)
+            counts = dict(self.counts)
+        return {
+            "uptime": time.time() - self.started,
+            "requests": counts,
+            "latency": _percentiles(latencies),
+            "conversion": _percentiles(conversions),
+        }
+
+
+def _percentiles(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    return {
+        **{
+            f"p{q}": values[min(len(values) - 1, len(values) * q // 100)]
+            for q in [50, 90, 99]
+        },
+        "max": values[-1]
+    }
+
+
+# Converts notebooks on a pool of worker processes, each keeping a warmed-up exporter
+# (as article-html-batch does). At most `max_queue' notebooks wait for a worker
+# beyond those being converted; further requests are rejected as overloaded.
+# Conversions taking longer than `timeout' seconds are reported as failures, and
+# withdrawn if they have not started; a worker process cannot be interrupted, and
+# the conversion it keeps running holds its place in the queue until it completes.
+class Daemon:
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        max_queue: int = 64,
+        timeout: float = 30.0,
+        config: Optional[Config] = None
+    ) -> None:
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.config = config
+        self.metrics = Metrics()
+        self._slots = threading.BoundedSemaphore(max(1, self.processes) + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pool = self._make_pool()
+
+    def _make_pool(self) -> Executor:
+        return batch.make_pool(self.processes, self.config)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def warm_up(self) -> None:
+        # Starts the workers and has each load its exporter.
+        for future in [
+            self._pool.submit(time.sleep, 0.05) for _ in range(max(1, self.processes))
+        ]:
+            future.result()
+
+    def convert(self, notebook: bytes) -> str:
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self.metrics.record("rejected")
+            raise Overloaded(
+                f"{self.pending} notebooks are already waiting for conversion"
+            )
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._submit(notebook)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            html, _, seconds = future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            self.metrics.record("timeout")
+            raise
+        except Exception:
+            self.metrics.record("failed")
+            raise
+        self.metrics.record("ok", time.perf_counter() - start, seconds)
+        return html
+
+    # Frees the place of a conversion once it is done, or withdrawn.
+    def _release(self, _: Any = None) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _submit(self, notebook: bytes) -> Any:
+        pool = self._pool
+        try:
+            return pool.submit(batch.export_in_worker, notebook)
+        except BrokenProcessPool:
+            # A worker died outright (e.g. killed by the OOM killer): start afresh.
+            with self._lock:
+                if self._pool is pool:
+                    log.error("The worker pool broke down; restarting it")
+                    self._pool = self._make_pool()
+            return self._pool.submit(batch.export_in_worker, notebook)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.metrics.report(),
+            "processes": self.processes,
+            "pending": self.pending,
+            "max_queue": self.max_queue,
+        }
+
+    def server(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8008,
+        path_socket: Optional[Union[str, Path]] = None
+    ) -> BaseServer:
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format: str, *args: Any) -> None:
+                log.debug(format % args)
+
+            def _send(self, code: int, content_type: str, body: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if urlparse(self.path).path == "/metrics":
+                    self._send(200, "application/json", json.dumps(daemon.report()))
+                else:
+                    self._send(404, "text/plain", "Not found")
+
+            def do_POST(self) -> None:
+                if urlparse(self.path).path != "/convert":
+                    self._send(404, "text/plain", "Not found")
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    if length < 0:
+                        raise ValueError()
+                except ValueError:
+                    self._send(
+                        400,
+                        "text/plain",
+                        "`Content-Length' must be a non-negative integer"
+                    )
+                    return
+                notebook = self.rfile.read(length)
+                try:
+                    html = daemon.convert(notebook)
+                except Overloaded as err:
+                    self._send(503, "text/plain", str(err))
+                except TimeoutError:
+                    self._send(
+                        504,
+                        "text/plain",
+                        f"Conversion took longer than {daemon.timeout} s"
+                    )
+                except Exception as err:
+                    self._send(422, "text/plain", f"{type(err).__name__}: {err}")
+                else:
+                    self._send(200, "text/html", html)
+
+        server: BaseServer
+        if path_socket is None:
+            server = ThreadingHTTPServer((host, port), Handler)
+        else:
+            _unlink_socket(path_socket)
+            server = ThreadingUnixStreamServer(str(path_socket), Handler)
+        server.daemon_threads = True  # type: ignore
+        return server
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+class _ConnectionUnix(HTTPConnection):
+
+    def __init__(self, path_socket: Union[str, Path], timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.path_socket = str(path_socket)
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path_socket)
+
+
+# Opens a connection to a daemon, given either as `host:port' or as the path to its
+# Unix socket.
+def connect(address: str, timeout: float = 60.0) -> HTTPConnection:
+    if os.sep in address or ":" not in address:
+        return _ConnectionUnix(address, timeout)
+    host, port = address.rsplit(":", 1)
+    return HTTPConnection(host, int(port), timeout=timeout)
+
+
+# Converts the given notebook (as JSON) through the daemon at the given address.
+def request(address: str, notebook: bytes, timeout: float = 60.0) -> str:
+    connection = connect(address, timeout)
+    try:
+        connection.request(
+            "POST",
+            "/convert",
+            notebook,
+            {"Content-Type": "application/x-ipynb+json"}
+        )
+        response = connection.getresponse()
+        body = response.read().decode("utf-8")
+        if response.status != 200:
+            raise RuntimeError(f"Daemon answered {response.status}: {body}")
+        return body
+    finally:
+        connection.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = ArgumentParser(
+        description=(
+            "Serve conversions of notebooks to article-html from a pool of warmed-up "
+            "worker processes: POST a notebook to /convert to get its HTML rendering, "
+            "and GET /metrics for request counts and latencies."
+        )
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("-p", "--port", type=int, default=8008, help="Port.")
+    parser.add_argument(
+        "-s",
+        "--socket",
+        default=None,
+        help="Listen on this Unix socket instead of a TCP port."
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs; 0 runs in-process)."
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Number of notebooks that may wait for a worker before rejecting more."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Seconds after which a conversion is reported as failed."
+    )
+    args = parser.parse_args(argv)
+    lg.basicConfig(level=lg.INFO, format="%(levelname)s %(message)s")
+
+    daemon = Daemon(args.processes, args.max_queue, args.timeout)
+    daemon.warm_up()
+    server = daemon.server(args.host, args.port, args.socket)
+    if args.socket is None:
+        print(f"Serving conversions on http://{args.host}:{args.port}/convert")
+    else:
+        print(f"Serving conversions on Unix socket {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.close()
+        if args.socket is not None:
+            _unlink_socket(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
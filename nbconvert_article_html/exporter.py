@@ -0,0 +1,794 @@
+import bleach
+import cProfile
+from html import escape
+import io
+from jinja2 import pass_context
+import mistune
+import nbconvert
+from nbconvert.exporters import HTMLExporter
+from nbconvert.filters import clean_html
+from nbconvert.filters.highlight import Highlight2HTML
+from nbconvert.filters.markdown_mistune import MarkdownWithMath
+from nbconvert.preprocessors import Preprocessor, TagRemovePreprocessor
+from nbformat import NotebookNode
+from pathlib import Path
+import pygments
+import re
+import socket
+import tracemalloc
+import traitlets as tl
+from typing import *
+from urllib.parse import quote
+
+from .assets import ExtractorAssets
+from .cache import cache_bytecode, CacheFragments, key_content
+from .chunks import MARK_CHUNK, split_document
+from .instrument import PreprocessorTimed, stage, TemplateTimed, Timings
+from .lazy import read_lazy
+from .markup import deparagraphize, StreamAccessible
+from .mathml import finish_document, RendererMarkdownMath, RendererMath
+from .navigation import CollectorNavigation, dumps_search, SCRIPT_SEARCH
+from .minify import compress, COMPRESSIONS, minify_html
+from .preprocessors import (
+    _number,
+    _ref2anchor,
+    CollectorAbstract,
+    CollectorLabels,
+    CollectorLanguage,
+    PipelineArticle,
+    RendererAnnotations,
+    SolverReferences
+)
+
+
+_DIR_TEMPLATE = Path(__file__).parent / "template"
+_VERSIONS_RENDERING = (nbconvert.__version__, mistune.__version__)
+_VERSIONS_HIGHLIGHT = (nbconvert.__version__, pygments.__version__)
+_VERSIONS_CLEAN = (nbconvert.__version__, bleach.__version__)
+SIZE_CHUNK_ENCODING = 2 ** 20
+Sink = Union[IO[str], IO[bytes], socket.socket]
+
+
+def _writer(sink: Sink) -> Callable[[str], Any]:
+    if isinstance(sink, io.TextIOBase):
+        return sink.write
+    write: Callable[[bytes], Any] = (
+        sink.sendall if isinstance(sink, socket.socket) else cast(IO[bytes], sink).write
+    )
+
+    def write_encoded(text: str) -> None:
+        # Large chunks, such as embedded images, are encoded a slice at a time.
+        for i in range(0, len(text), SIZE_CHUNK_ENCODING):
+            write(text[i:i + SIZE_CHUNK_ENCODING].encode("utf-8"))
+
+    return write_encoded
+
+
+# Stands in for the template as HTMLExporter prepares an export, keeping the
+# arguments of the rendering so that a streaming export may then generate the
+# document from them, chunk by chunk.
+class _TemplateDeferred:
+
+    def __init__(self, template: Any) -> None:
+        self.template = template
+        self.args: Tuple = ()
+        self.kwargs: Dict[str, Any] = {}
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        self.args, self.kwargs = args, kwargs
+        return ""
+
+    def generate(self) -> Iterator[str]:
+        return self.template.generate(*self.args, **self.kwargs)
+
+
+# Caches the HTML a filter makes, keyed by the parts of its arguments that bear on
+# it, as given by the `key' function. Hits and misses are counted into `stats'.
+class _FilterCached:
+
+    def __init__(
+        self,
+        name: str,
+        filter_: Callable[..., str],
+        cache: CacheFragments,
+        key: Callable[..., Sequence],
+        stats: Dict[str, int]
+    ) -> None:
+        self.name = name
+        self.filter = filter_
+        self.cache = cache
+        self.key = key
+        self.stats = stats
+
+    def __call__(self, *args: Any, **kwargs: Any) -> str:
+        key = key_content(self.name, *self.key(*args, **kwargs))
+        html = self.cache.get(key)
+        if html is None:
+            self.stats["misses"] += 1
+            html = self.filter(*args, **kwargs)
+            self.cache.put(key, html)
+        else:
+            self.stats["hits"] += 1
+        return html
+
+
+def _key_highlight(highlighter: Highlight2HTML) -> Callable[..., Sequence]:
+    def key(
+        source: str,
+        language: Optional[str] = None,
+        metadata: Optional[Mapping] = None
+    ) -> Sequence:
+        return (
+            _VERSIONS_HIGHLIGHT,
+            highlighter.pygments_lexer,
+            highlighter.extra_formatter_options,
+            language,
+            (metadata or {}).get("magics_language", ""),
+            source
+        )
+
+    return key
+
+
+def _key_clean(element: Union[str, bytes]) -> Sequence:
+    return (
+        _VERSIONS_CLEAN,
+        element.decode() if isinstance(element, bytes) else str(element)
+    )
+
+
+# Base name of the files of the document, as nbconvert's writers name it.
+def _name_document(resources: Mapping) -> str:
+    metadata = resources.get("metadata", {})
+    return resources.get("unique_key") or metadata.get("name") or "notebook"
+
+
+def _outputs(resources: Dict) -> Dict[str, bytes]:
+    if not isinstance(resources.get("outputs"), dict):
+        resources["outputs"] = {}
+    return resources["outputs"]
+
+
+# Marks the cells starting a section of the level at which the document is split into
+# chunks, or above.
+@pass_context
+def _chunk_mark(context, cell):
+    resources = context.get("resources", {})
+    level = resources.get("chunk_level", 0)
+    unique = cell.get("metadata", {}).get("label", {}).get("sec")
+    if not level or not unique:
+        return ""
+    number = _number(resources.get("labels", {}), "sec", unique)
+    if not number or number.count(".") >= level:
+        return ""
+    return MARK_CHUNK.format(_ref2anchor("sec", unique))
+
+
+@pass_context
+def _deparagraphize(context, source):
+    with stage(context.get("resources"), "filter:deparagraphize"):
+        return deparagraphize(source)
+
+
+class ArticleHTMLExporter(HTMLExporter):
+
+    export_from_notebook = "Article (HTML)"
+
+    exclude_anchor_links = tl.Bool(True).tag(config=True)
+
+    render_cache_dir = tl.Unicode(
+        "",
+        help=(
+            "Directory of the on-disk cache of rendered Markdown fragments, shared "
+            "across runs. Leave empty to cache only in memory."
+        )
+    ).tag(config=True)
+
+    render_cache_size = tl.Int(
+        256 * 2 ** 20,
+        help="Size bound, in bytes, of the on-disk cache of rendered fragments."
+    ).tag(config=True)
+
+    template_cache_dir = tl.Unicode(
+        "",
+        help=(
+            "Directory of the on-disk cache of compiled templates, shared across "
+            "runs. Leave empty to share compiled templates only between the "
+            "exporters of a process."
+        )
+    ).tag(config=True, affects_environment=True)
+
+    fused_pipeline = tl.Bool(
+        False,
+        help=(
+            "Run the preprocessors of the article-html template (language, labels, "
+            "references, annotations, abstract and tag removal) as a single "
+            "preprocessor that scans the notebook twice, rather than once each."
+        )
+    ).tag(config=True)
+
+    instrument = tl.Bool(
+        False,
+        help=(
+            "Record the wall time and number of calls of each stage of the export "
+            "(preprocessors, annotators, filters, template rendering) into "
+            "resources[\"timings\"]."
+        )
+    ).tag(config=True)
+
+    instrument_memory = tl.Bool(
+        False,
+        help=(
+            "When instrumenting, also record the peak of bytes allocated by each "
+            "stage over what was allocated as it started (from Python 3.9). This "
+            "slows exports down considerably."
+        )
+    ).tag(config=True)
+
+    profile_output = tl.Unicode(
+        "",
+        help=(
+            "Path of a profile of the export to write: a Chrome trace if it ends with "
+            "`.json', otherwise cProfile statistics. Implies `instrument'."
+        )
+    ).tag(config=True)
+
+    assets_dir = tl.Unicode(
+        "",
+        help=(
+            "Directory, relative to the HTML document, where to store image outputs "
+            "rather than embedding them in the document. Each distinct image is "
+            "stored once, named after the hash of its contents. Leave empty to "
+            "embed all images."
+        )
+    ).tag(config=True)
+
+    assets_inline_max = tl.Int(
+        0,
+        help=(
+            "When storing images in `assets_dir', size in bytes up to which images "
+            "are embedded in the document nonetheless."
+        )
+    ).tag(config=True)
+
+    minify = tl.Bool(
+        False,
+        help=(
+            "Minify the HTML document and its style sheets, dropping the style rules "
+            "that match no element of the document (see `minify_prune_css')."
+        )
+    ).tag(config=True)
+
+    minify_prune_css = tl.Bool(
+        True,
+        help="When minifying, drop the style rules that match no element."
+    ).tag(config=True)
+
+    minify_keep_selectors = tl.Unicode(
+        "",
+        help=(
+            "Regular expression matching the CSS selectors to keep when pruning "
+            "style rules, for elements that scripts add to the document."
+        )
+    ).tag(config=True)
+
+    compress = tl.List(
+        tl.Enum(list(COMPRESSIONS)),
+        [],
+        help=(
+            "Compressed copies of the HTML document to write next to it: `gz' for "
+            "gzip, `br' for Brotli (which requires the brotli package)."
+        )
+    ).tag(config=True)
+
+    math_prerender = tl.Bool(
+        False,
+        help=(
+            "Typeset LaTeX expressions into MathML at export time, rather than with "
+            "MathJax as the document is displayed, caching them along with rendered "
+            "Markdown. The MathJax script is left out of documents whose expressions "
+            "are all typeset. Requires the latex2mathml package."
+        )
+    ).tag(config=True)
+
+    low_memory = tl.Bool(
+        False,
+        help=(
+            "Read notebooks without their large image outputs, which stay in the "
+            "notebook file until the document is written out (see "
+            "`low_memory_threshold'). Only applies to exports from files."
+        )
+    ).tag(config=True)
+
+    low_memory_threshold = tl.Int(
+        64 * 2 ** 10,
+        help="Size in bytes of the base64 image outputs left in the notebook file."
+    ).tag(config=True)
+
+    chunk_level = tl.Int(
+        0,
+        help=(
+            "Split the document into an index page and one fragment per section of "
+            "this level or above (1 for top-level sections), which the page loads as "
+            "the reader scrolls to it or follows a link into it. Fragments are "
+            "stored as scripts next to the document. 0 keeps the document whole."
+        )
+    ).tag(config=True)
+
+    table_of_contents = tl.Bool(
+        False,
+        help=(
+            "Put a table of contents after the abstract, listing the sections "
+            "labeled `sec' with their numbers."
+        )
+    ).tag(config=True)
+
+    search_index = tl.Enum(
+        ["none", "embedded", "sidecar"],
+        "none",
+        help=(
+            "Build an index of the words of the cells, by section, which a search "
+            "box of the document looks up as the reader types. `embedded' puts it "
+            "in the document; `sidecar' writes it to a JSON file next to it, which "
+            "the document fetches when served over HTTP."
+        )
+    ).tag(config=True)
+
+    _cache_render: Optional[CacheFragments] = None
+    _renderer_math: Optional[RendererMath] = None
+    _cache_highlight: Optional[CacheFragments] = None
+    _stats_highlight: Optional[Dict[str, Dict[str, int]]] = None
+    _timings: Optional[Timings] = None
+    _streaming = False
+    _deferred: Optional[_TemplateDeferred] = None
+
+    def _template_name_default(self):
+        return str(_DIR_TEMPLATE / "article-html")
+
+    @property
+    def cache_render(self) -> CacheFragments:
+        if self._cache_render is None:
+            self._cache_render = CacheFragments(
+                self.render_cache_dir or None,
+                size_max_disk=self.render_cache_size
+            )
+        return self._cache_render
+
+    # Highlighted code, and the HTML sanitized by clean_html, are cached apart from
+    # rendered Markdown, in a subdirectory of the render cache's.
+    @property
+    def cache_highlight(self) -> CacheFragments:
+        if self._cache_highlight is None:
+            self._cache_highlight = CacheFragments(
+                Path(self.render_cache_dir) / "highlight"
+                if self.render_cache_dir
+                else None,
+                size_max_disk=self.render_cache_size
+            )
+        return self._cache_highlight
+
+    # Hits and misses of the cache, for each of the filters it serves.
+    @property
+    def stats_highlight(self) -> Dict[str, Dict[str, int]]:
+        if self._stats_highlight is None:
+            self._stats_highlight = {
+                name: {"hits": 0, "misses": 0}
+                for name in ["highlight_code", "clean_html"]
+            }
+        return self._stats_highlight
+
+    def _stats_highlight_since(self, before: Mapping) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {k: n - before[name][k] for k, n in stats.items()}
+            for name, stats in self.stats_highlight.items()
+        }
+
+    def register_filter(self, name, jinja_filter):
+        # HTMLExporter registers the highlighter of each notebook's language as it
+        # exports it.
+        if name == "highlight_code" and isinstance(jinja_filter, Highlight2HTML):
+            jinja_filter = _FilterCached(
+                name,
+                jinja_filter,
+                self.cache_highlight,
+                _key_highlight(jinja_filter),
+                self.stats_highlight[name]
+            )
+        return super().register_filter(name, jinja_filter)
+
+    @property
+    def renderer_math(self) -> Optional[RendererMath]:
+        if not self.math_prerender:
+            return None
+        if self._renderer_math is None:
+            self._renderer_math = RendererMath(self.cache_render)
+            if not self._renderer_math.available:
+                self.log.warning(
+                    "Typesetting math at export time requires package `latex2mathml' "
+                    "(pip install latex2mathml); leaving it to MathJax"
+                )
+        return self._renderer_math if self._renderer_math.available else None
+
+    def _create_environment(self):
+        environment = super()._create_environment()
+        environment.bytecode_cache = cache_bytecode(self.template_cache_dir or None)
+        return environment
+
+    @pass_context
+    def markdown2html(self, context, source):
+        cell = context.get("cell", {})
+        resources = context.get("resources", {})
+        key = key_content(
+            "markdown2html",
+            _VERSIONS_RENDERING,
+            resources.get("language", ""),
+            self.anchor_link_text,
+            self.exclude_anchor_links,
+            self.embed_images,
+            self.lexer_options,
+            resources.get("metadata", {}).get("path", "") if self.embed_images else "",
+            cell.get("attachments", {}) if "attachment:" in source else {},
+            self.renderer_math is not None,
+            source
+        )
+        with stage(resources, "filter:markdown2html"):
+            return self.cache_render.get_or_render(
+                key,
+                lambda: self._markdown2html(context, source)
+            )
+
+    def _markdown2html(self, context, source):
+        math = self.renderer_math
+        if math is None:
+            return HTMLExporter.markdown2html(self, context, source)
+        renderer = RendererMarkdownMath(
+            math,
+            escape=False,
+            attachments=context.get("cell", {}).get("attachments", {}),
+            embed_images=self.embed_images,
+            path=context.get("resources", {}).get("metadata", {}).get("path", ""),
+            anchor_link_text=self.anchor_link_text,
+            exclude_anchor_links=self.exclude_anchor_links,
+            **self.lexer_options
+        )
+        return MarkdownWithMath(renderer=renderer).render(source)
+
+    def _prerender_math(self, latex: str) -> str:
+        math = self.renderer_math
+        if math is None:
+            return escape(latex, quote=False)
+        return math.render_latex(latex)
+
+    def _init_resources(self, resources):
+        resources = super()._init_resources(resources)
+        resources["math_prerender"] = self.renderer_math is not None
+        resources["chunk_level"] = 0 if self._streaming else self.chunk_level
+        return resources
+
+    def default_filters(self):
+        yield from super().default_filters()
+        yield ("deparagraphize", _deparagraphize)
+        yield ("prerender_math", self._prerender_math)
+        yield ("chunk_mark", _chunk_mark)
+        # Highlighted code goes through clean_html, which costs more than Pygments.
+        yield (
+            "clean_html",
+            _FilterCached(
+                "clean_html",
+                clean_html,
+                self.cache_highlight,
+                _key_clean,
+                self.stats_highlight["clean_html"]
+            )
+        )
+
+    def _init_preprocessors(self):
+        super()._init_preprocessors()
+        if self.fused_pipeline:
+            self._fuse_preprocessors()
+        if self.assets_dir:
+            self._preprocessors.append(
+                ExtractorAssets(
+                    dir_assets=self.assets_dir,
+                    size_inline_max=self.assets_inline_max,
+                    enabled=True
+                )
+            )
+        if self.table_of_contents or self.search_index != "none":
+            self._preprocessors.append(
+                CollectorNavigation(
+                    contents=self.table_of_contents,
+                    search=self.search_index != "none",
+                    enabled=True
+                )
+            )
+
+    def _fuse_preprocessors(self):
+
+        stages: Dict[str, Preprocessor] = {}
+        fused = []
+        for p in self._preprocessors:
+            for name, cls in [
+                ("language", CollectorLanguage),
+                ("labels", CollectorLabels),
+                ("references", SolverReferences),
+                ("annotations", RendererAnnotations),
+                ("abstract", CollectorAbstract)
+            ]:
+                if type(p) is cls:
+                    stages[name] = p
+                    fused.append(p)
+            if "abstract" in stages and type(p) is TagRemovePreprocessor:
+                # Tag removal of the template, which follows abstract collection.
+                stages["tag_remove"] = p
+                fused.append(p)
+                break
+        if not fused:
+            return
+        i = self._preprocessors.index(fused[0])
+        self._preprocessors = [p for p in self._preprocessors if p not in fused]
+        self._preprocessors.insert(i, PipelineArticle(**stages, enabled=True))
+
+    @property
+    def template(self):
+        template = super().template
+        if self._timings is not None:
+            template = TemplateTimed(template, self._timings)
+        if self._streaming:
+            self._deferred = _TemplateDeferred(template)
+            return self._deferred
+        return template
+
+    def from_notebook_node(  # type: ignore[override]
+        self,
+        nb: NotebookNode,
+        resources: Optional[Dict] = None,
+        **kw: Any
+    ) -> Tuple[str, Dict]:
+        hits, misses = self.cache_render.hits, self.cache_render.misses
+        highlight = {k: dict(v) for k, v in self.stats_highlight.items()}
+        if self.instrument or self.profile_output:
+            html, resources = self._from_notebook_node_instrumented(nb, resources, **kw)
+        else:
+            html, resources = super().from_notebook_node(nb, resources, **kw)
+        resources["render_cache"] = {
+            "hits": self.cache_render.hits - hits,
+            "misses": self.cache_render.misses - misses
+        }
+        resources["highlight_cache"] = self._stats_highlight_since(highlight)
+        if resources.get("math_prerender") and not self._streaming:
+            with stage(resources, "math"):
+                html, num_pending = finish_document(html)
+            resources["math"] = {
+                "typeset": html.count("<math "),
+                "pending": num_pending,
+                "mathjax": num_pending > 0
+            }
+        payloads = resources.get("payloads")
+        if payloads is not None and not self._streaming:
+            with stage(resources, "payloads"):
+                html = payloads.splice(html)
+            payloads.close()
+            del resources["payloads"]
+        if not self._streaming:
+            sizes = [f"{len(html.encode('utf-8'))} bytes"]
+            if self.minify:
+                with stage(resources, "minify"):
+                    html = self._minify(html, resources, sizes)
+            if "search" in resources:
+                with stage(resources, "search"):
+                    html = self._embed_search(html, resources)
+            if resources.get("chunk_level"):
+                with stage(resources, "chunks"):
+                    html = self._split(html, resources, sizes)
+            if self.compress:
+                with stage(resources, "compress"):
+                    self._compress(html, resources, sizes)
+            if len(sizes) > 1:
+                self.log.info("Article HTML: %s", ", ".join(sizes))
+        return html, resources
+
+    def from_file(  # type: ignore[override]
+        self,
+        file_stream: Any,
+        resources: Optional[Dict] = None,
+        **kw: Any
+    ) -> Tuple[str, Dict]:
+        if not self.low_memory:
+            return super().from_file(file_stream, resources, **kw)
+        # Payloads are read once the document is rendered: from the path of the
+        # file if it has one, as streamed documents are written out after
+        # from_filename has closed it.
+        path = getattr(file_stream, "name", None)
+        source = (
+            path
+            if isinstance(path, str) and Path(path).is_file()
+            else getattr(file_stream, "buffer", file_stream)
+        )
+        nb, payloads = read_lazy(source, self.low_memory_threshold)
+        resources = dict(resources or {})
+        resources["payloads"] = payloads
+        return self.from_notebook_node(nb, resources, **kw)
+
+    def _minify(self, html: str, resources: Dict, sizes: List[str]) -> str:
+        keep = self.minify_keep_selectors
+        html, minified = minify_html(
+            html,
+            self.minify_prune_css,
+            re.compile(keep) if keep else None
+        )
+        resources["minify"] = {
+            "size": minified.size,
+            "size_minified": minified.size_minified,
+            "rules_pruned": minified.rules_pruned
+        }
+        sizes.append(
+            f"{minified.size_minified} minified "
+            f"({minified.rules_pruned} style rules pruned)"
+        )
+        return html
+
+    def _embed_search(self, html: str, resources: Dict) -> str:
+        data = dumps_search(resources["search"])
+        if self.search_index == "sidecar":
+            path = f"{_name_document(resources)}.search.json"
+            _outputs(resources)[f"./{path}"] = data.encode("utf-8")
+            element = (
+                '<script type="application/json" id="article-html-search" '
+                f'data-src="{escape(quote(path))}"></script>\n'
+            )
+        else:
+            data = data.replace("</", "<\\/")
+            element = (
+                '<script type="application/json" id="article-html-search">'
+                f"{data}</script>\n"
+            )
+        i = html.rfind("</body>")
+        if i < 0:
+            i = len(html)
+        return "".join([html[:i], element, SCRIPT_SEARCH, html[i:]])
+
+    def _split(self, html: str, resources: Dict, sizes: List[str]) -> str:
+        html, chunks = split_document(html, f"{_name_document(resources)}_chunks")
+        outputs = _outputs(resources)
+        size_chunks = 0
+        for k, chunk in enumerate(chunks):
+            script = chunk.script(k)
+            outputs[chunk.path] = script
+            size_chunks += len(script)
+        size_index = len(html.encode("utf-8"))
+        resources["chunks"] = {
+            "chunks": len(chunks),
+            "size_index": size_index,
+            "size_chunks": size_chunks
+        }
+        sizes.append(
+            f"{size_index} in the index page and {size_chunks} in {len(chunks)} "
+            "chunks"
+        )
+        return html
+
+    def _compress(self, html: str, resources: Dict, sizes: List[str]) -> None:
+        data = html.encode("utf-8")
+        name = _name_document(resources)
+        extension = resources.get("output_extension", ".html")
+        outputs = _outputs(resources)
+        report = resources.setdefault("minify", {"size": len(data)})
+        for format in self.compress:
+            compressed = compress(data, format)
+            if compressed is not None:
+                # nbconvert's FilesWriter needs a directory to create, even the
+                # current one.
+                path = f"./{name}{extension}{COMPRESSIONS[format]}"
+                outputs[path] = compressed
+                report[f"size_{format}"] = len(compressed)
+                sizes.append(f"{len(compressed)} as {path[2:]}")
+
+    def _from_notebook_node_instrumented(
+        self,
+        nb: NotebookNode,
+        resources: Optional[Dict],
+        **kw: Any
+    ) -> Tuple[str, Dict]:
+        is_trace = self.profile_output.endswith(".json")
+        timings = Timings(memory=self.instrument_memory, trace=is_trace)
+        resources = dict(resources or {})
+        resources["timings"] = timings
+        tracing_memory = self.instrument_memory and not tracemalloc.is_tracing()
+        profile = cProfile.Profile() if self.profile_output and not is_trace else None
+        preprocessors = self._preprocessors
+        self._preprocessors = [PreprocessorTimed(p) for p in preprocessors]
+        self._timings = timings
+        try:
+            if tracing_memory:
+                tracemalloc.start()
+            if profile is not None:
+                profile.enable()
+            with timings.stage("export"):
+                html, resources = super().from_notebook_node(nb, resources, **kw)
+        finally:
+            if profile is not None:
+                profile.disable()
+            if tracing_memory:
+                tracemalloc.stop()
+            self._preprocessors = preprocessors
+            self._timings = None
+
+        if profile is not None:
+            profile.dump_stats(self.profile_output)
+        elif is_trace:
+            timings.write_trace(self.profile_output)
+        return html, resources
+
+    def stream_from_notebook_node(
+        self,
+        nb: NotebookNode,
+        sink: Sink,
+        resources: Optional[Dict] = None,
+        **kw: Any
+    ) -> Dict:
+        return self._stream(sink, lambda: self.from_notebook_node(nb, resources, **kw))
+
+    def stream_from_filename(
+        self,
+        filename: str,
+        sink: Sink,
+        resources: Optional[Dict] = None,
+        **kw: Any
+    ) -> Dict:
+        return self._stream(sink, lambda: self.from_filename(filename, resources, **kw))
+
+    def _stream(self, sink: Sink, export: Callable[[], Tuple[str, Dict]]) -> Dict:
+        if self.minify or self.compress:
+            self.log.warning("Streamed documents are neither minified nor compressed.")
+        if self.chunk_level:
+            self.log.warning("Streamed documents are not split into chunks.")
+        if self.search_index != "none":
+            self.log.warning("Streamed documents have no search index.")
+        if self.math_prerender:
+            self.log.warning("Streamed documents keep the MathJax script.")
+        hits, misses = self.cache_render.hits, self.cache_render.misses
+        highlight = {k: dict(v) for k, v in self.stats_highlight.items()}
+        self._streaming = True
+        try:
+            _, resources = export()
+        finally:
+            self._streaming = False
+        assert self._deferred is not None
+        deferred, self._deferred = self._deferred, None
+
+        write = _writer(sink)
+        accessible = StreamAccessible()
+        payloads = resources.pop("payloads", None)
+
+        def emit(text: str) -> None:
+            if payloads is None:
+                write(text)
+            else:
+                for piece in payloads.feed(text):
+                    write(piece)
+
+        leading = True
+        try:
+            for chunk in deferred.generate():
+                if leading:
+                    chunk = chunk.lstrip("\r\n")
+                    leading = not chunk
+                emit(accessible.feed(chunk))
+            emit(accessible.close())
+            if payloads is not None:
+                write(payloads.flush())
+        finally:
+            if payloads is not None:
+                payloads.close()
+        if accessible.num_alt_missing:
+            self.log.warning(
+                "Alternative text is missing on %s image(s).",
+                accessible.num_alt_missing
+            )
+        resources["render_cache"] = {
+            "hits": self.cache_render.hits - hits,
+            "misses": self.cache_render.misses - misses
+        }
+        resources["highlight_cache"] = self._stats_highlight_since(highlight)
+        return resources
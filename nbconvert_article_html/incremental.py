@@ -0,0 +1,176 @@
+from html import escape
+import json
+import logging as lg
+from nbformat import NotebookNode
+from pathlib import Path
+import re
+import traitlets as tl
+from typing import *
+
+from .cache import key_content
+from .exporter import ArticleHTMLExporter
+from .preprocessors import RX_REFERENCE
+
+
+log = lg.getLogger(__name__)
+
+
+RX_FRAGMENT = re.compile(
+    r"<!--article-html-cell:(?P<key>[0-9a-f]+):(?P<id>[^>]*?)-->"
+    r"(?P<html>.*?)"
+    r"<!--/article-html-cell-->",
+    re.DOTALL
+)
+# Stands for the ID attribute of the cell in its remembered HTML, as cells of the
+# same contents share it.
+MARK_ID = "\x00article-html-cell-id\x00"
+
+
+def _attribute_id(id_: str) -> str:
+    return f'id="cell-id={escape(id_)}"'
+
+
+def _labels_plain(labels: Mapping) -> Dict[str, Dict[str, str]]:
+    return {counter: dict(uniques) for counter, uniques in labels.items()}
+
+
+def _references(nb: NotebookNode) -> Dict[str, List[int]]:
+    graph: Dict[str, List[int]] = {}
+    for index, cell in enumerate(nb.cells):
+        if "^[" not in cell.source:
+            continue
+        for m in RX_REFERENCE.finditer(cell.source):
+            citing = graph.setdefault(f"{m['counter']}:{m['unique']}", [])
+            if not citing or citing[-1] != index:
+                citing.append(index)
+    return graph
+
+
+# What an incremental export remembers of the previous one: the label table, the
+# reference graph (which cells cite each `counter:unique' label) and the HTML of
+# each rendered cell, indexed by a hash of the cell as it stands after
+# preprocessing, within a given rendering context.
+class StateIncremental(NamedTuple):
+    context: str = ""
+    labels: Dict[str, Dict[str, str]] = {}
+    references: Dict[str, List[int]] = {}
+    fragments: Dict[str, str] = {}
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(json.dumps(self._asdict()), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "StateIncremental":
+        return cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# Strips the cell delimiters from the rendered template, gathering the HTML of each
+# cell on the way. This must happen before HTMLExporter runs its BeautifulSoup pass,
+# which would otherwise normalize the whitespace around the delimiters.
+class _TemplateSplicing:
+
+    def __init__(self, template: Any) -> None:
+        self.template = template
+        self.fragments: Dict[str, str] = {}
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        def splice(m: re.Match) -> str:
+            html = m["html"]
+            if m["id"]:
+                html = html.replace(_attribute_id(m["id"]), MARK_ID, 1)
+            self.fragments[m["key"]] = html
+            return m["html"]
+
+        return RX_FRAGMENT.sub(splice, self.template.render(*args, **kwargs))
+
+
+class IncrementalArticleHTMLExporter(ArticleHTMLExporter):
+
+    export_from_notebook = "Article (HTML, incremental)"
+
+    state: StateIncremental = StateIncremental()
+
+    # Validating the notebook after each preprocessor costs more than rendering the
+    # few cells that changed; validate once, after the last preprocessor.
+    @tl.default("optimistic_validation")
+    def _optimistic_validation_default(self) -> bool:
+        return True
+
+    def _context(self, nb: NotebookNode) -> str:
+        return key_content(
+            {
+                name: getattr(self, name)
+                for name in sorted(self.trait_names(config=True))
+            },
+            nb.metadata
+        )
+
+    def _preprocess(
+        self,
+        nb: NotebookNode,
+        resources: Dict
+    ) -> Tuple[NotebookNode, Dict]:
+        if self._streaming:
+            return super()._preprocess(nb, resources)
+        references = _references(nb)
+        nb, resources = super()._preprocess(nb, resources)
+        labels = _labels_plain(resources.get("labels", {}))
+        context = self._context(nb)
+        state = self.state if self.state.context == context else StateIncremental()
+
+        renumbered = sorted(
+            f"{counter}:{unique}"
+            for counter, uniques in labels.items()
+            for unique, number in uniques.items()
+            if state.labels.get(counter, {}).get(unique, number) != number
+        )
+        affected = sorted(
+            {index for label in renumbered for index in references.get(label, [])}
+        )
+        num_reused = 0
+        for cell in nb.cells:
+            # The HTML of a cell is remembered without its ID (see _TemplateSplicing),
+            # which is put back as it is reused.
+            key = key_content({k: v for k, v in cell.items() if k != "id"})
+            cell.metadata["article_html_key"] = key
+            if key in state.fragments:
+                cell.metadata["article_html_fragment"] = state.fragments[key].replace(
+                    MARK_ID,
+                    _attribute_id(cell.get("id", "")),
+                    1
+                )
+                num_reused += 1
+
+        resources["incremental"] = {
+            "reused": num_reused,
+            "rendered": len(nb.cells) - num_reused,
+            "renumbered": renumbered,
+            "affected": affected
+        }
+        self._pending = StateIncremental(context, labels, references, {})
+        return nb, resources
+
+    # Streamed exports are rendered whole, as the document goes out before the HTML
+    # of its cells could be gathered; they leave the state as it is.
+    @property
+    def template(self) -> Any:
+        if self._streaming:
+            return super().template
+        self._splicing = _TemplateSplicing(super().template)
+        return self._splicing
+
+    def from_notebook_node(  # type: ignore[override]
+        self,
+        nb: NotebookNode,
+        resources: Optional[Dict] = None,
+        **kw: Any
+    ) -> Tuple[str, Dict]:
+        html, resources = super().from_notebook_node(nb, resources, **kw)
+        if self._streaming:
+            return html, resources
+        self.state = self._pending._replace(fragments=self._splicing.fragments)
+        log.debug(
+            f"Incremental export: {resources['incremental']['rendered']} cells "
+            f"rendered, {resources['incremental']['reused']} reused"
+        )
+        return html, resources
@@ -0,0 +1,113 @@
+from contextlib import contextmanager, nullcontext
+import json
+import os
+from pathlib import Path
+import threading
+import time
+import tracemalloc
+from typing import *
+
+
+# Wall time, number of calls and bytes allocated for each stage of an export. It is
+# carried in resources["timings"], and survives the deep copies nbconvert makes of
+# the resources as they are handed to preprocessors, so that every stage of the
+# export records into the same object. When tracing, the start and duration of each
+# call is also kept, to be written out in Chrome's trace event format.
+#
+# With memory, each stage also records, as "bytes", the most memory each of its calls
+# allocated at once beyond what was allocated as it started, summed over its calls:
+# tracemalloc's peak is reset for each call (from Python 3.9 on, which has
+# tracemalloc.reset_peak).
+class Timings(dict):
+
+    def __init__(self, memory: bool = False, trace: bool = False) -> None:
+        super().__init__()
+        self.memory = memory
+        # Peaks of the stages under way, as resetting the peak for a nested stage
+        # forgets that of the enclosing ones.
+        self._peaks: List[int] = []
+        self.events: Optional[List[Dict[str, Any]]] = [] if trace else None
+        self._origin = time.perf_counter()
+
+    def __deepcopy__(self, memo: Dict) -> "Timings":
+        return self
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        memory = all(
+            [self.memory, tracemalloc.is_tracing(), hasattr(tracemalloc, "reset_peak")]
+        )
+        if memory:
+            allocated_before, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            self._peaks.append(allocated_before)
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            record = self.setdefault(
+                name,
+                {"seconds": 0.0, "calls": 0, "bytes": 0}
+            )
+            record["seconds"] += end - start
+            record["calls"] += 1
+            if memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                record["bytes"] += peak - allocated_before
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+            if self.events is not None:
+                self.events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start - self._origin) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident()
+                    }
+                )
+
+    def write_trace(self, path: Union[str, Path]) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.events or []}, file)
+
+
+def stage(resources: Optional[Mapping], name: str) -> ContextManager:
+    timings = resources.get("timings") if resources is not None else None
+    if isinstance(timings, Timings):
+        return timings.stage(name)
+    return nullcontext()
+
+
+class PreprocessorTimed:
+
+    def __init__(self, preprocessor: Callable) -> None:
+        self.preprocessor = preprocessor
+
+    def __call__(self, nb: Any, resources: Dict) -> Tuple[Any, Dict]:
+        if not getattr(self.preprocessor, "enabled", True):
+            return self.preprocessor(nb, resources)
+        with stage(resources, f"preprocessor:{type(self.preprocessor).__name__}"):
+            return self.preprocessor(nb, resources)
+
+    def __repr__(self) -> str:
+        return repr(self.preprocessor)
+
+
+class TemplateTimed:
+
+    def __init__(self, template: Any, timings: Timings) -> None:
+        self.template = template
+        self.timings = timings
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        with self.timings.stage("template"):
+            return self.template.render(*args, **kwargs)
+
+    def generate(self, *args: Any, **kwargs: Any) -> Iterator[str]:
+        with self.timings.stage("template"):
+            yield from self.template.generate(*args, **kwargs)
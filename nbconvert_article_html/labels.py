@@ -0,0 +1,145 @@
+import re
+from typing import *
+
+
+class _LabelsCounter(Mapping[str, str]):
+
+    def __init__(self, num_levels: int) -> None:
+        self.state = [0] * num_levels
+        self.depth = 0
+        self.slots: Dict[str, int] = {}
+        self.vectors: List[Tuple[int, ...]] = []
+        self.cells: List[Optional[int]] = []
+        self.numbers: Dict[int, str] = {}
+        self.citing: Dict[int, List[int]] = {}
+
+    def add(self, unique: str, level: int, index: Optional[int]) -> None:
+        state = self.state
+        state[level - 1] += 1
+        # Levels deeper than the last label's are still zero.
+        for j in range(level, self.depth):
+            state[j] = 0
+        self.depth = level
+        vector = tuple(state[:level])
+        slot = self.slots.setdefault(unique, len(self.vectors))
+        if slot == len(self.vectors):
+            self.vectors.append(vector)
+            self.cells.append(index)
+        else:
+            self.vectors[slot] = vector
+            self.cells[slot] = index
+            self.numbers.pop(slot, None)
+
+    def number(self, slot: int) -> str:
+        number = self.numbers.get(slot)
+        if number is None:
+            number = self.numbers[slot] = ".".join(str(n) for n in self.vectors[slot])
+        return number
+
+    def __getitem__(self, unique: str) -> str:
+        return self.number(self.slots[unique])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.slots)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+# Numbers of the labels of a notebook, indexed by counter, then by unique name, as
+# collected in resources["labels"]. Each label is stored as the vector of its
+# hierarchical counter values, and its number is only formatted when it is looked
+# up. As a mapping of mappings, it compares equal to the equivalent nested dicts.
+# It also remembers which cell defines each label and which cells cite it.
+class LabelRegistry(Mapping[str, Mapping[str, str]]):
+
+    def __init__(self, referable: Mapping[str, Mapping], num_levels: int) -> None:
+        self.num_levels = num_levels
+        self._counters: Dict[str, _LabelsCounter] = {}
+        self._hierarchies = {
+            counter: re.compile(spec["hierarchy"])
+            for counter, spec in referable.items()
+            if spec.get("hierarchy", "")
+        }
+
+    # Level of the hierarchical counter at which a label set on the given source is
+    # numbered; None if the counter is hierarchical, but the source does not tell
+    # the level.
+    def level(self, counter: str, source: str) -> Optional[int]:
+        rx = self._hierarchies.get(counter)
+        if rx is None:
+            return 1
+        m = rx.match(source)
+        if m is None:
+            return None
+        g = m.groupdict()
+        if "count" in g:
+            return len(g["count"])
+        elif "number" in g:
+            return int(g["number"])
+        raise ValueError(
+            f"The regular expression `{rx.pattern}' used to express how to derive "
+            "the hierarchical counter level is invalid. Its match must return either "
+            "a group of name `count' or a group of name `number'."
+        )
+
+    def add(
+        self,
+        counter: str,
+        unique: str,
+        level: int = 1,
+        index: Optional[int] = None
+    ) -> None:
+        if counter not in self._counters:
+            self._counters[counter] = _LabelsCounter(self.num_levels)
+        self._counters[counter].add(unique, level, index)
+
+    def number(self, counter: str, unique: str, default: str = "") -> str:
+        labels = self._counters.get(counter)
+        if labels is None:
+            return default
+        slot = labels.slots.get(unique)
+        if slot is None:
+            return default
+        return labels.number(slot)
+
+    def vector(self, counter: str, unique: str) -> Optional[Tuple[int, ...]]:
+        labels = self._counters.get(counter)
+        if labels is None or unique not in labels.slots:
+            return None
+        return labels.vectors[labels.slots[unique]]
+
+    def cell(self, counter: str, unique: str) -> Optional[int]:
+        labels = self._counters.get(counter)
+        if labels is None or unique not in labels.slots:
+            return None
+        return labels.cells[labels.slots[unique]]
+
+    # Indices of the cells citing the given label, in order. For a bound label, the
+    # list is the registry's own, which cite() keeps up to date: it may be held on
+    # to, so as to record further citations without looking the label up again.
+    def citing(self, counter: str, unique: str) -> List[int]:
+        labels = self._counters.get(counter)
+        if labels is None or unique not in labels.slots:
+            return []
+        return labels.citing.setdefault(labels.slots[unique], [])
+
+    def cite(self, counter: str, unique: str, index: int) -> None:
+        citing = self.citing(counter, unique)
+        if not citing or citing[-1] != index:
+            citing.append(index)
+
+    def __getitem__(self, counter: str) -> Mapping[str, str]:
+        return self._counters[counter]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._counters)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({ {c: dict(u) for c, u in self.items()} })"
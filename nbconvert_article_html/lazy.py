@@ -0,0 +1,208 @@
+import json
+import logging as lg
+import nbformat
+from nbformat import NotebookNode
+import re
+import secrets
+from typing import *
+
+
+log = lg.getLogger(__name__)
+
+
+# Payloads of these types are only ever emitted verbatim into the document, as
+# base64-encoded images, so the template may handle stand-ins for them instead.
+MIME_TYPES_LAZY = ("image/png", "image/jpeg")
+RX_KEY_LAZY = re.compile(
+    rb'"(?:' + b"|".join(re.escape(t.encode()) for t in MIME_TYPES_LAZY) + rb')"'
+    rb'[ \t\r\n]*:[ \t\r\n]*"'
+)
+LEN_KEY_LAZY_MAX = 64
+PREFIX_MARKER = "article-html-payload"
+RX_MARKER = re.compile(PREFIX_MARKER + r":([0-9a-f]{16}):([0-9]+)")
+LEN_MARKER_MAX = len(PREFIX_MARKER) + 1 + 16 + 1 + 10
+SIZE_CHUNK = 2 ** 20
+
+
+def _backslashes_before(data: bytes, i: int) -> int:
+    j = i
+    while j > 0 and data[j - 1] == ord("\\"):
+        j -= 1
+    return i - j
+
+
+# Payloads left in the notebook file, and the markers standing for them in the
+# notebook read without them. A payload is read from the file (one at a time) when
+# the document that holds its marker is written out.
+class Payloads:
+
+    def __init__(self, source: Union[str, IO[bytes]]) -> None:
+        self.source = source
+        self.token = secrets.token_hex(8)
+        self.spans: List[Tuple[int, int]] = []
+        self._file: Optional[IO[bytes]] = None
+        self._pending = ""
+
+    def add(self, offset: int, length: int) -> str:
+        self.spans.append((offset, length))
+        return f"{PREFIX_MARKER}:{self.token}:{len(self.spans) - 1}"
+
+    def _open(self) -> IO[bytes]:
+        if self._file is None:
+            if isinstance(self.source, str):
+                self._file = open(self.source, "rb")
+            else:
+                self._file = self.source
+        return self._file
+
+    def load(self, index: int) -> str:
+        offset, length = self.spans[index]
+        file = self._open()
+        file.seek(offset)
+        return json.loads(file.read(length))
+
+    def _substitute(self, m: re.Match) -> str:
+        if m[1] != self.token:
+            return m[0]
+        return self.load(int(m[2]))
+
+    def resolve(self, value: Any) -> Any:
+        if isinstance(value, str) and value.startswith(PREFIX_MARKER):
+            m = RX_MARKER.fullmatch(value)
+            if m is not None:
+                return self._substitute(m)
+        return value
+
+    def splice(self, text: str) -> str:
+        return RX_MARKER.sub(self._substitute, text)
+
+    # Splices payloads into a document as it streams by, holding back the end of
+    # chunks that could be the start of a marker.
+    def feed(self, chunk: str) -> Iterator[str]:
+        text = self._pending + chunk
+        cut = max(0, len(text) - (LEN_MARKER_MAX - 1))
+        i = 0
+        for m in RX_MARKER.finditer(text):
+            if m.start() >= cut:
+                break
+            yield text[i:m.start()]
+            yield self._substitute(m)
+            i = m.end()
+        cut = max(cut, i)
+        yield text[i:cut]
+        self._pending = text[cut:]
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return self.splice(text)
+
+    def close(self) -> None:
+        if self._file is not None and isinstance(self.source, str):
+            self._file.close()
+        self._file = None
+
+
+# Copies the JSON of a notebook, replacing the image payloads larger than the given
+# threshold with markers, read back from the file only when needed. The JSON is
+# read a chunk at a time, so that only the copy is ever held in memory.
+def _elide(
+    file: IO[bytes],
+    payloads: Payloads,
+    threshold: int,
+    size_chunk: int = SIZE_CHUNK
+) -> bytes:
+    skeleton = []
+    buffer = b""
+    offset = 0  # Offset of the buffer in the file.
+    eof = False
+
+    def fill(size: int) -> None:
+        nonlocal buffer, eof
+        while not eof and len(buffer) < size:
+            more = file.read(max(size_chunk, size - len(buffer)))
+            if not more:
+                eof = True
+            buffer += more
+
+    def consume(n: int, keep: bool) -> None:
+        nonlocal buffer, offset
+        if keep:
+            skeleton.append(buffer[:n])
+        buffer = buffer[n:]
+        offset += n
+
+    def escaped(i: int) -> bool:
+        num = _backslashes_before(buffer, i)
+        if num == i and skeleton:
+            num += _backslashes_before(skeleton[-1], len(skeleton[-1]))
+        return num % 2 == 1
+
+    while True:
+        fill(size_chunk)
+        m = RX_KEY_LAZY.search(buffer)
+        while m is not None and escaped(m.start()):
+            m = RX_KEY_LAZY.search(buffer, m.start() + 1)
+        if m is None:
+            if eof:
+                consume(len(buffer), True)
+                break
+            # The end of the buffer may hold the start of a key.
+            consume(max(0, len(buffer) - LEN_KEY_LAZY_MAX), True)
+            fill(len(buffer) + size_chunk)
+            continue
+
+        start = m.end() - 1  # Opening quote of the payload.
+        consume(start, True)
+        fill(threshold + 2)
+        end = _end_string(buffer, 1)
+        if end is not None and end <= threshold + 2:
+            consume(end, True)
+            continue
+        # The payload is large: skip over it.
+        offset_payload = offset
+        while end is None:
+            if eof:
+                raise ValueError(f"Unterminated string at offset {offset_payload}")
+            # Keep the trailing backslashes, which may escape what follows.
+            num = len(buffer) - _backslashes_before(buffer, len(buffer))
+            consume(max(1, num), False)
+            fill(size_chunk)
+            end = _end_string(buffer, 0)
+        consume(end, False)
+        marker = payloads.add(offset_payload, offset - offset_payload)
+        skeleton.append(json.dumps(marker).encode("utf-8"))
+    return b"".join(skeleton)
+
+
+# Index just past the closing quote of the string whose contents start at index i of
+# the buffer; None if the buffer ends first.
+def _end_string(buffer: bytes, i: int) -> Optional[int]:
+    while True:
+        j = buffer.find(b'"', i)
+        if j < 0:
+            return None
+        if _backslashes_before(buffer, j) % 2 == 0:
+            return j + 1
+        i = j + 1
+
+
+# Reads a notebook, leaving in the file the image payloads larger than `threshold'
+# bytes: the notebook gets markers instead, which Payloads.splice replaces in the
+# rendered document.
+def read_lazy(
+    source: Union[str, IO[bytes]],
+    threshold: int = 2 ** 16
+) -> Tuple[NotebookNode, Payloads]:
+    payloads = Payloads(source)
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            skeleton = _elide(file, payloads, threshold)
+    else:
+        source.seek(0)
+        skeleton = _elide(source, payloads, threshold)
+    nb = nbformat.reads(skeleton.decode("utf-8"), as_version=4)
+    log.debug(
+        f"Left {len(payloads.spans)} payloads "
+        f"({sum(length for _, length in payloads.spans)} bytes) in the notebook file"
+    )
+    return nb, payloads
@@ -0,0 +1,252 @@
+from html.entities import name2codepoint
+from html.parser import HTMLParser
+import re
+from typing import *
+
+
+# Elements BeautifulSoup serializes as empty-element tags, e.g. <br/>.
+_VOID = frozenset(
+    {
+        "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+        "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+        "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr"
+    }
+)
+# Elements whose content BeautifulSoup would not escape.
+_CDATA = frozenset({"script", "style"})
+# Elements within which BeautifulSoup keeps strings of whitespace as they are.
+_PRESERVE_WHITESPACE = frozenset({"pre", "textarea"})
+_SPACES_ASCII = " \n\t\f\r"
+RX_PARAGRAPH_PLAIN = re.compile(r"\s*<p>([^<&]*)</p>\s*")
+RX_REFERENCE_CHARACTER = re.compile(r"&(?:#([0-9]+)|#[xX]([0-9a-fA-F]+)|(\w+));")
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _Done(Exception):
+    pass
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _attribute(name: str, value: Optional[str]) -> str:
+    value = _escape(value or "")
+    if '"' in value:
+        if "'" in value:
+            return f'{name}="{value.replace(chr(34), "&quot;")}"'
+        return f"{name}='{value}'"
+    return f'{name}="{value}"'
+
+
+def _references_character_plain(source: str) -> bool:
+    # Character references BeautifulSoup and html.unescape decode the same way.
+    # Anything more exotic, including a bare ampersand in front of a word, is left
+    # to BeautifulSoup.
+    i = source.find("&")
+    while i >= 0:
+        m = RX_REFERENCE_CHARACTER.match(source, i)
+        if m is None:
+            if i + 1 < len(source) and not source[i + 1].isspace():
+                return False
+        elif m[3] is not None:
+            if m[3] not in name2codepoint:
+                return False
+        else:
+            codepoint = int(m[1]) if m[1] is not None else int(m[2], 16)
+            if codepoint < 0x20 or 0x7f <= codepoint < 0xa0:
+                return False
+            if 0xd800 <= codepoint < 0xe000 or codepoint > 0x10ffff:
+                return False
+        i = source.find("&", i + 1)
+    return True
+
+
+# Streams through the tokens of a HTML fragment, serializing the contents of its
+# first paragraph the way BeautifulSoup would, without building a tree. Markup
+# BeautifulSoup would have to repair (unbalanced or misnested tags, paragraphs
+# within the paragraph, a paragraph left open) raises _Unsupported.
+class _ParserParagraph(HTMLParser):
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._open: List[str] = []
+        self._inside = False
+
+    def handle_starttag(
+        self,
+        tag: str,
+        attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        if not self._inside:
+            self._inside = tag == "p"
+            return
+        if tag == "p" or tag in _CDATA:
+            raise _Unsupported()
+        names = [name for name, _ in attrs]
+        if len(set(names)) < len(names):
+            raise _Unsupported()
+        for _, value in attrs:
+            # Multi-valued attributes such as class get their whitespace normalized.
+            if value and value != " ".join(value.split()):
+                raise _Unsupported()
+        rendered = "".join(
+            f" {_attribute(name, value)}" for name, value in sorted(attrs)
+        )
+        if tag in _VOID:
+            self.parts.append(f"<{tag}{rendered}/>")
+        else:
+            self.parts.append(f"<{tag}{rendered}>")
+            self._open.append(tag)
+
+    def handle_startendtag(
+        self,
+        tag: str,
+        attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        if tag not in _VOID:
+            raise _Unsupported()
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._inside:
+            return
+        if not self._open:
+            if tag == "p":
+                raise _Done()
+            raise _Unsupported()
+        if self._open[-1] != tag:
+            raise _Unsupported()
+        self._open.pop()
+        self.parts.append(f"</{tag}>")
+
+    def handle_data(self, data: str) -> None:
+        if self._inside:
+            # BeautifulSoup collapses strings made only of whitespace.
+            collapsing = not _PRESERVE_WHITESPACE.intersection(self._open)
+            if data and collapsing and not data.strip(_SPACES_ASCII):
+                data = "\n" if "\n" in data else " "
+            # BeautifulSoup renders the strings directly within the paragraph as they
+            # are, but escapes those nested in other elements.
+            self.parts.append(_escape(data) if self._open else data)
+
+    def handle_comment(self, data: str) -> None:
+        if self._inside:
+            self.parts.append(f"<!--{data}-->" if self._open else data)
+
+    def handle_decl(self, decl: str) -> None:
+        raise _Unsupported()
+
+    def handle_pi(self, data: str) -> None:
+        raise _Unsupported()
+
+    def unknown_decl(self, data: str) -> None:
+        raise _Unsupported()
+
+
+def _deparagraphize_soup(source: str) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(source, "html.parser")
+    if soup.p is None:
+        return source
+    return "".join(str(x) for x in soup.p.contents)
+
+
+# Contents of the first paragraph of the given HTML fragment, or the fragment itself
+# if it has no paragraph.
+def deparagraphize(source: str) -> str:
+    m = RX_PARAGRAPH_PLAIN.fullmatch(source)
+    if m:
+        return m[1]
+    if "<p" not in source and "<P" not in source:
+        return source
+    if not _references_character_plain(source):
+        return _deparagraphize_soup(source)
+    parser = _ParserParagraph()
+    try:
+        parser.feed(source)
+        parser.close()
+    except _Done:
+        return "".join(parser.parts)
+    except _Unsupported:
+        return _deparagraphize_soup(source)
+    if not parser._inside:
+        return source
+    # The paragraph was left open.
+    return _deparagraphize_soup(source)
+
+
+RX_TAG_ACCESSIBLE = re.compile(
+    r"""<(img|div)(?=[\s/>])((?:[^>"']|"[^"]*"|'[^']*')*)>""",
+    re.I
+)
+RX_TAG_ACCESSIBLE_START = re.compile(r"<(?:img|div)(?:[\s/>]|$)", re.I)
+RX_ATTRIBUTE = re.compile(
+    r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?"""
+)
+ALT_MISSING = "No description has been provided for this image"
+CLASSES_FOCUSABLE = frozenset({"jp-Cell-inputWrapper", "jp-OutputArea-output"})
+
+
+# Adds to the HTML of an export, as it streams by, what HTMLExporter adds once the
+# whole document is rendered: alternative text for images that lack it, and keyboard
+# focus for cell inputs and outputs. Chunks are held back only as long as they end
+# within a tag.
+class StreamAccessible:
+
+    def __init__(self) -> None:
+        self.num_alt_missing = 0
+        self._pending: List[str] = []
+
+    def _fix(self, m: re.Match) -> str:
+        name, attributes = m[1].lower(), m[2]
+        values = {
+            a[1].lower(): next((v for v in a.groups()[1:] if v is not None), "")
+            for a in RX_ATTRIBUTE.finditer(attributes)
+        }
+        slash = "/" if attributes.endswith("/") else ""
+        if slash:
+            attributes = attributes[:-1]
+        if name == "img":
+            if "alt" in values:
+                return m[0]
+            self.num_alt_missing += 1
+            return f'<{m[1]}{attributes} alt="{ALT_MISSING}"{slash}>'
+        if "tabindex" in values or not (
+            CLASSES_FOCUSABLE & set(values.get("class", "").split())
+        ):
+            return m[0]
+        return f'<{m[1]}{attributes} tabindex="0"{slash}>'
+
+    def feed(self, chunk: str) -> str:
+        if self._pending:
+            if ">" not in chunk:
+                self._pending.append(chunk)
+                return ""
+            self._pending.append(chunk)
+            text = "".join(self._pending)
+            self._pending = []
+        else:
+            text = chunk
+        i = text.rfind("<")
+        if i >= 0 and self._is_tag_cut(text, i):
+            self._pending = [text[i:]]
+            text = text[:i]
+        return RX_TAG_ACCESSIBLE.sub(self._fix, text)
+
+    def _is_tag_cut(self, text: str, i: int) -> bool:
+        # Only the tags we fix need be held back whole.
+        if len(text) - i < len("<img "):
+            return ">" not in text[i:]
+        return bool(RX_TAG_ACCESSIBLE_START.match(text, i)) and not (
+            RX_TAG_ACCESSIBLE.match(text, i)
+        )
+
+    def close(self) -> str:
+        text = "".join(self._pending)
+        self._pending = []
+        return RX_TAG_ACCESSIBLE.sub(self._fix, text)
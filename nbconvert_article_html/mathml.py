@@ -0,0 +1,157 @@
+from html import escape, unescape
+import logging as lg
+from nbconvert.filters.markdown_mistune import IPythonRenderer
+import re
+from typing import *
+
+from .cache import CacheFragments, key_content
+
+
+log = lg.getLogger(__name__)
+
+
+# Comes before each expression left for MathJax to typeset, so that the exporter
+# tells whether the document still needs it, even from cached fragments.
+MARK_PENDING = "<!--article-html-math-pending-->"
+RX_MATHJAX = re.compile(
+    r"<!--article-html-mathjax-->(.*?)<!--/article-html-mathjax-->",
+    re.S
+)
+# Delimiters of the expressions MathJax would typeset in raw HTML and LaTeX outputs.
+RX_MATH = re.compile(
+    r"\$\$(?P<display>.+?)\$\$"
+    r"|\\\[(?P<display_bracket>.+?)\\\]"
+    r"|(?P<environment>\\begin\{(?P<name>[a-zA-Z*]+)\}.*?\\end\{(?P=name)\})"
+    r"|\\\((?P<inline_paren>.+?)\\\)"
+    r"|(?<![\\$])\$(?P<inline>[^$\s](?:[^$]*?[^$\s])?)\$(?!\d)",
+    re.S
+)
+RX_TAG = re.compile(r"""(<(?:[^>"']|"[^"]*"|'[^']*')*>)""")
+RX_TAG_VERBATIM = re.compile(r"<(/?)(pre|code|script|style|textarea|math)\b", re.I)
+# What latex2mathml makes of the commands it does not know.
+RX_COMMAND_UNKNOWN = re.compile(r">\\[a-zA-Z]+<")
+
+
+def _engine() -> Optional[Callable[..., str]]:
+    try:
+        from latex2mathml.converter import convert
+    except ImportError:
+        return None
+    return convert
+
+
+def _version_engine() -> str:
+    try:
+        from importlib.metadata import version
+        return version("latex2mathml")
+    except Exception:
+        return ""
+
+
+# Typesets LaTeX expressions into MathML with latex2mathml, a pure-Python engine,
+# caching the results by their source. Expressions it cannot typeset, or that use
+# commands it does not know, yield None, and are left to MathJax.
+class RendererMath:
+
+    def __init__(self, cache: Optional[CacheFragments] = None) -> None:
+        self.cache = cache if cache is not None else CacheFragments()
+        self._convert = _engine()
+        self._version = _version_engine()
+
+    @property
+    def available(self) -> bool:
+        return self._convert is not None
+
+    def render(self, tex: str, display: bool) -> Optional[str]:
+        if self._convert is None:
+            return None
+        key = key_content("math", self._version, display, tex)
+        mathml = self.cache.get_or_render(key, lambda: self._typeset(tex, display))
+        return mathml or None
+
+    def _typeset(self, tex: str, display: bool) -> str:
+        assert self._convert is not None
+        try:
+            mathml = self._convert(tex, display="block" if display else "inline")
+        except Exception as err:
+            log.debug(f"Cannot typeset `{tex}': {type(err).__name__}: {err}")
+            return ""
+        if RX_COMMAND_UNKNOWN.search(mathml):
+            log.debug(f"Cannot typeset `{tex}': unknown command")
+            return ""
+        return mathml
+
+    # The MathML for an expression given as its source with its delimiters, or the
+    # source marked as pending.
+    def html(self, tex: str, source: str, display: bool) -> str:
+        mathml = self.render(tex, display)
+        if mathml is None:
+            return MARK_PENDING + source
+        return mathml
+
+    def _substitute(self, m: re.Match) -> str:
+        for group, display in [
+            ("display", True),
+            ("display_bracket", True),
+            ("environment", True),
+            ("inline_paren", False),
+            ("inline", False)
+        ]:
+            if m[group] is not None:
+                return self.html(unescape(m[group]), m[0], display)
+        return m[0]
+
+    # Typesets the expressions in the text of an HTML fragment, leaving alone those in
+    # code and the like.
+    def render_html(self, html: str) -> str:
+        if "$" not in html and "\\" not in html:
+            return html
+        parts = RX_TAG.split(html)
+        depth = 0
+        # parts alternates text and tags, starting and ending with text.
+        for i, part in enumerate(parts):
+            if i % 2 == 1:
+                m = RX_TAG_VERBATIM.match(part)
+                if m is not None and not part.endswith("/>"):
+                    depth = max(0, depth - 1) if m[1] else depth + 1
+            elif depth == 0 and part:
+                parts[i] = RX_MATH.sub(self._substitute, part)
+        return "".join(parts)
+
+    # Typesets a LaTeX output, which MathJax would otherwise render.
+    def render_latex(self, latex: str) -> str:
+        return self.render_html(escape(latex, quote=False))
+
+
+# Markdown renderer that typesets the expressions Mistune parses, and those of raw
+# HTML blocks (such as the equations the `margin' annotator wraps).
+class RendererMarkdownMath(IPythonRenderer):
+
+    def __init__(self, math: RendererMath, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.math = math
+
+    def block_math(self, body: str) -> str:
+        return self.math.html(body, super().block_math(body), True)
+
+    def latex_environment(self, name: str, body: str) -> str:
+        return self.math.html(
+            f"\\begin{{{name}}}{body}\\end{{{name}}}",
+            super().latex_environment(name, body),
+            True
+        )
+
+    def inline_math(self, body: str) -> str:
+        return self.math.html(body, super().inline_math(body), False)
+
+    def block_html(self, html: str) -> str:
+        return self.math.render_html(super().block_html(html))
+
+
+# Drops the MathJax script from a document whose expressions are all typeset, and
+# the marks left by RendererMath. Returns the document and the number of
+# expressions left to MathJax.
+def finish_document(html: str) -> Tuple[str, int]:
+    num_pending = html.count(MARK_PENDING)
+    html = RX_MATHJAX.sub(lambda m: m[1] if num_pending else "", html)
+    return html.replace(MARK_PENDING, ""), num_pending
@@ -0,0 +1,325 @@
+import gzip
+import logging as lg
+import re
+from typing import *
+
+from .markup import RX_ATTRIBUTE
+
+
+log = lg.getLogger(__name__)
+
+
+# Elements whose contents are left alone, as whitespace is significant in them, or
+# is part of code; style sheets are minified on their own.
+RX_VERBATIM = re.compile(
+    r"""(<(pre|textarea|script|style)(?=[\s>])(?:[^>"']|"[^"]*"|'[^']*')*>)"""
+    r"(.*?)(</\2\s*>)",
+    re.I | re.S
+)
+RX_TAG = re.compile(r"""(<(?:[^>"']|"[^"]*"|'[^']*')*>)""")
+RX_TAG_NAME = re.compile(r"</?([a-zA-Z][\w:-]*)")
+RX_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+RX_WHITESPACE = re.compile(r"\s+")
+# Whitespace next to these elements does not show.
+BLOCKS = frozenset(
+    """
+    address article aside blockquote body br caption col colgroup dd details dialog
+    div dl dt fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6 head header
+    hr html li link main meta nav noscript ol option p pre script section style
+    summary table tbody td tfoot th thead title tr ul
+    """.split()
+)
+
+
+def _whitespace(m: re.Match) -> str:
+    return "\n" if "\n" in m[0] else " "
+
+
+def _is_block(tag: str) -> bool:
+    if tag.startswith("<!"):
+        return True
+    m = RX_TAG_NAME.match(tag)
+    return m is not None and m[1].lower() in BLOCKS
+
+
+def _minify_markup(html: str) -> str:
+    parts = RX_TAG.split(RX_COMMENT.sub("", html))
+    # parts alternates text and tags, starting and ending with text.
+    for i in range(0, len(parts), 2):
+        text = RX_WHITESPACE.sub(_whitespace, parts[i])
+        if i > 0 and _is_block(parts[i - 1]):
+            text = text.lstrip()
+        if i + 1 < len(parts) and _is_block(parts[i + 1]):
+            text = text.rstrip()
+        parts[i] = text
+    return "".join(parts)
+
+
+RX_CSS_TOKEN = re.compile(
+    r""""(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|/\*.*?(?:\*/|$)|\s+|[{};,>:]"""
+    r"""|[^"'/\s{};,>:]+|/""",
+    re.S
+)
+AT_RULES_NESTING = frozenset({"media", "supports", "layer", "container", "document"})
+# Whitespace next to these is not significant; nor around colons, in declarations.
+CSS_TIGHT = "{};,>"
+
+
+def _holds_declarations(prelude: str) -> bool:
+    m = re.match(r"\s*@([\w-]+)", prelude)
+    return m is None or not (
+        m[1].lower() in AT_RULES_NESTING or m[1].lower().endswith("keyframes")
+    )
+
+
+def minify_css(css: str) -> str:
+    tokens = [
+        " " if token[0].isspace() else token
+        for token in RX_CSS_TOKEN.findall(css)
+        if not token.startswith("/*")
+    ]
+    minified: List[str] = []
+    # Whether each block we are in holds declarations, rather than rules.
+    blocks: List[bool] = []
+    start_prelude = 0
+    for i, token in enumerate(tokens):
+        if token == " ":
+            if not minified or i + 1 == len(tokens):
+                continue
+            if minified[-1] in CSS_TIGHT or minified[-1] == ":":
+                continue
+            if tokens[i + 1] in CSS_TIGHT:
+                continue
+            if tokens[i + 1] == ":" and blocks and blocks[-1]:
+                continue
+        elif token == "{":
+            blocks.append(_holds_declarations("".join(minified[start_prelude:])))
+        elif token == "}":
+            if minified and minified[-1] == ";":
+                minified.pop()
+            if blocks:
+                blocks.pop()
+        minified.append(token)
+        if token in "{};":
+            start_prelude = len(minified)
+    return "".join(minified)
+
+
+class UsageDocument(NamedTuple):
+    tags: Set[str]
+    classes: Set[str]
+    ids: Set[str]
+
+
+RX_TAG_START = re.compile(
+    r"""<([a-zA-Z][\w:-]*)((?:[^>"']|"[^"]*"|'[^']*')*)>"""
+)
+
+
+def usage_document(html: str) -> UsageDocument:
+    usage = UsageDocument(set(), set(), set())
+    for m in RX_TAG_START.finditer(RX_VERBATIM.sub(r"\1\4", html)):
+        usage.tags.add(m[1].lower())
+        for a in RX_ATTRIBUTE.finditer(m[2]):
+            name = a[1].lower()
+            value = next((v for v in a.groups()[1:] if v is not None), "")
+            if name == "class":
+                usage.classes.update(value.split())
+            elif name == "id":
+                usage.ids.add(value)
+    return usage
+
+
+RX_SELECTOR_ATTRIBUTE = re.compile(r"\[[^\]]*\]")
+RX_SELECTOR_ARGUMENTS = re.compile(r"\([^()]*\)")
+RX_SELECTOR_CLASS = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+RX_SELECTOR_ID = re.compile(r"#(-?[_a-zA-Z][\w-]*)")
+RX_SELECTOR_TYPE = re.compile(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)")
+# Elements that scripts add to the document as it is displayed (diagrams, equations,
+# widgets), so that their style must be kept.
+RX_SELECTOR_DYNAMIC = re.compile(
+    r"jp-RenderedMermaid|mjx-|MathJax|jupyter-widgets|widget-|lm-|p-Widget"
+)
+
+
+# Whether a selector may match some element of the document. Only the elements,
+# classes and identifiers the selector names are checked; the arguments of
+# pseudo-classes, such as :not(.class), are not, so that selectors are kept in case
+# of doubt.
+def may_match(selector: str, usage: UsageDocument) -> bool:
+    if "\\" in selector:
+        return True
+    simplified = RX_SELECTOR_ATTRIBUTE.sub("", selector)
+    while "(" in simplified:
+        reduced = RX_SELECTOR_ARGUMENTS.sub("", simplified)
+        if reduced == simplified:
+            return True
+        simplified = reduced
+    if not all(c in usage.classes for c in RX_SELECTOR_CLASS.findall(simplified)):
+        return False
+    if not all(i in usage.ids for i in RX_SELECTOR_ID.findall(simplified)):
+        return False
+    return all(t.lower() in usage.tags for t in RX_SELECTOR_TYPE.findall(simplified))
+
+
+def _skip_string(css: str, i: int) -> int:
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == "\\" else 1
+    return i + 1
+
+
+# Index of the first of the given characters at the top level of the CSS, from index
+# i: outside of strings, parentheses and blocks.
+def _find_top(css: str, i: int, chars: str) -> int:
+    depth = 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if depth == 0 and c in chars:
+            return i
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        i += 1
+    return len(css)
+
+
+def _statements(css: str) -> Iterator[Tuple[str, Optional[str]]]:
+    i = 0
+    while i < len(css):
+        j = _find_top(css, i, "{;}")
+        if j == len(css) or css[j] != "{":
+            if css[i:j].strip():
+                yield css[i:j].strip(), None
+            i = j + 1
+            continue
+        k = _find_top(css, j + 1, "}")
+        yield css[i:j].strip(), css[j + 1:k]
+        i = k + 1
+
+
+def _selectors(prelude: str) -> List[str]:
+    selectors = []
+    i = 0
+    while i < len(prelude):
+        j = _find_top(prelude, i, ",")
+        selectors.append(prelude[i:j].strip())
+        i = j + 1
+    return selectors
+
+
+def _is_kept(selector: str, usage: UsageDocument, keep: Optional[Pattern]) -> bool:
+    if RX_SELECTOR_DYNAMIC.search(selector):
+        return True
+    if keep is not None and keep.search(selector):
+        return True
+    return may_match(selector, usage)
+
+
+# Drops the rules of a style sheet whose selectors match no element of the document,
+# and the selectors of the other rules that match none. Returns the pruned style
+# sheet and the number of rules dropped.
+def prune_css(
+    css: str,
+    usage: UsageDocument,
+    keep: Optional[Pattern] = None
+) -> Tuple[str, int]:
+    kept = []
+    num_pruned = 0
+    for prelude, body in _statements(css):
+        if body is None:
+            kept.append(f"{prelude};")
+        elif prelude.startswith("@"):
+            m = re.match(r"@([\w-]+)", prelude)
+            if m is not None and m[1].lower() in AT_RULES_NESTING:
+                inner, num = prune_css(body, usage, keep)
+                num_pruned += num
+                if inner:
+                    kept.append(f"{prelude}{{{inner}}}")
+            else:
+                kept.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = [s for s in _selectors(prelude) if _is_kept(s, usage, keep)]
+            if selectors:
+                kept.append(f"{','.join(selectors)}{{{body}}}")
+            else:
+                num_pruned += 1
+    return "".join(kept), num_pruned
+
+
+class ReportMinify(NamedTuple):
+    size: int
+    size_minified: int
+    rules_pruned: int
+
+    def summary(self) -> str:
+        saved = 1.0 - self.size_minified / self.size if self.size else 0.0
+        return (
+            f"minified from {self.size} to {self.size_minified} bytes "
+            f"({saved:.0%} smaller), {self.rules_pruned} CSS rules pruned"
+        )
+
+
+# Minifies an HTML document: comments go, whitespace runs shrink to one character
+# (none at all next to block elements), and style sheets are minified, and pruned of
+# the rules that match no element of the document when `prune' is set. The contents
+# of <pre>, <textarea> and <script> elements are kept as they are.
+def minify_html(
+    html: str,
+    prune: bool = True,
+    keep: Optional[Pattern] = None
+) -> Tuple[str, ReportMinify]:
+    usage = usage_document(html) if prune else None
+    num_pruned = 0
+    parts = []
+    i = 0
+    after_block = False
+    for m in RX_VERBATIM.finditer(html):
+        is_block = m[2].lower() in BLOCKS
+        before = _minify_markup(html[i:m.start()])
+        if after_block:
+            before = before.lstrip()
+        parts.append(before.rstrip() if is_block else before)
+        after_block = is_block
+        contents = m[3]
+        if m[2].lower() == "style":
+            contents = minify_css(contents)
+            if usage is not None:
+                contents, num = prune_css(contents, usage, keep)
+                num_pruned += num
+        parts.append(f"{_minify_markup(m[1])}{contents}{m[4]}")
+        i = m.end()
+    rest = _minify_markup(html[i:])
+    parts.append(rest.lstrip() if after_block else rest)
+    minified = "".join(parts).strip()
+    return minified, ReportMinify(
+        len(html.encode("utf-8")),
+        len(minified.encode("utf-8")),
+        num_pruned
+    )
+
+
+COMPRESSIONS = {"gz": ".gz", "br": ".br"}
+
+
+# Compresses the document with gzip (`gz') or Brotli (`br'); the latter requires
+# the brotli package, and yields None when it is missing.
+def compress(data: bytes, format: str) -> Optional[bytes]:
+    if format == "gz":
+        return gzip.compress(data, 9, mtime=0)
+    if format == "br":
+        try:
+            import brotli
+        except ImportError:
+            log.warning(
+                "Brotli compression requires package `brotli' (pip install brotli); "
+                "skipping it"
+            )
+            return None
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"Unknown compression format `{format}'")
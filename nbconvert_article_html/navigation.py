@@ -0,0 +1,189 @@
+from html import unescape
+import json
+import logging as lg
+from nbconvert.preprocessors import Preprocessor
+from nbformat import NotebookNode
+import re
+import traitlets as tl
+from typing import *
+import unicodedata
+
+from .labels import LabelRegistry
+from .preprocessors import (
+    _number,
+    _ref2anchor,
+    NUM_LEVELS_COUNTER_HIERARCHY,
+    OutputPreprocessor
+)
+
+
+log = lg.getLogger(__name__)
+
+
+RX_HEADING = re.compile(r"\s*#+\s*(?P<title>.*)")
+RX_TAG = re.compile(r"<[^>]*>")
+RX_LINK_TARGET = re.compile(r"\]\([^)]*\)")
+RX_WORD = re.compile(r"[^\W_]{2,}")
+RX_MARKUP = re.compile(r"[*_`$\\]")
+
+
+# Words of a text, as the search script splits queries: lowercase, without accents,
+# at least two letters or digits long, and not all digits.
+def words(text: str) -> Iterator[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.category(c).startswith("M"))
+    for word in RX_WORD.findall(text):
+        if not word.isdigit():
+            yield word
+
+
+def _text(source: str) -> str:
+    return unescape(RX_LINK_TARGET.sub("]", RX_TAG.sub(" ", source)))
+
+
+def _title(source: str, number: str) -> str:
+    m = RX_HEADING.match(RX_TAG.sub("", source.strip().split("\n", 1)[0]))
+    title = m["title"] if m else ""
+    if number and title.startswith(f"{number}. "):
+        title = title[len(number) + 2:]
+    return title.strip()
+
+
+# Collects, from the annotated notebook, the sections it is divided in, into
+# resources["contents"] (for the table of contents), and an inverted index of the
+# words of its cells into resources["search"]. The index maps each word to the
+# sections whose cells hold it, which are listed in the order of the document, the
+# first being whatever precedes the first section; it lists the indices of these
+# sections as differences to the previous one, to keep it compact. The depth of the
+# section hierarchy goes into resources["contents_depth"], for the template to
+# indent entries by their level.
+class CollectorNavigation(Preprocessor):
+
+    contents = tl.Bool(True).tag(config=True)
+    search = tl.Bool(True).tag(config=True)
+
+    def preprocess(self, nb: NotebookNode, resources: Dict) -> OutputPreprocessor:
+        labels = resources.get("labels", {})
+        title = nb.metadata.get("title", "") or resources.get("metadata", {}).get(
+            "name",
+            ""
+        )
+        sections: List[List[str]] = [["", "", title]]
+        entries = []
+        postings: Dict[str, List[int]] = {}
+        last: Dict[str, int] = {}
+        for cell in nb.cells:
+            unique = cell.metadata.get("label", {}).get("sec")
+            if unique and cell.cell_type == "markdown":
+                number = _number(labels, "sec", unique)
+                anchor = _ref2anchor("sec", unique)
+                title = _title(cell.source, number)
+                plain = RX_MARKUP.sub("", unescape(title))
+                sections.append([anchor, number, plain])
+                entries.append(
+                    {
+                        "anchor": anchor,
+                        "number": number,
+                        "level": number.count(".") + 1 if number else 1,
+                        "title": title
+                    }
+                )
+            if not self.search or cell.cell_type not in {"markdown", "code"}:
+                continue
+            k = len(sections) - 1
+            for word in words(_text(cell.source)):
+                if word not in last:
+                    postings[word] = [k]
+                    last[word] = k
+                elif last[word] != k:
+                    postings[word].append(k - last[word])
+                    last[word] = k
+        if self.contents:
+            resources["contents"] = entries
+            resources["contents_depth"] = (
+                labels.num_levels
+                if isinstance(labels, LabelRegistry)
+                else NUM_LEVELS_COUNTER_HIERARCHY
+            )
+        if self.search:
+            resources["search"] = {"sections": sections, "terms": postings}
+            log.debug(
+                f"Indexed {len(postings)} words over {len(sections)} sections for "
+                "search"
+            )
+        return nb, resources
+
+
+def dumps_search(search: Mapping) -> str:
+    return json.dumps(search, ensure_ascii=False, separators=(",", ":"))
+
+
+# Searches the index of the document as the reader types, for the sections holding
+# all the words of the query, the last of which may be incomplete. The index is
+# either embedded in the element of ID article-html-search, or fetched from the file
+# its data-src attribute names.
+SCRIPT_SEARCH = """<script>
+(function () {
+  var box = document.querySelector("div.article-html-search");
+  var data = document.getElementById("article-html-search");
+  if (!box || !data) return;
+  function words(text) {
+    text = text.normalize("NFKD").replace(/\\p{M}/gu, "").toLowerCase();
+    return (text.match(/[\\p{L}\\p{N}]{2,}/gu) || []).filter(function (word) {
+      return !/^\\p{N}+$/u.test(word);
+    });
+  }
+  function has(object, key) {
+    return Object.prototype.hasOwnProperty.call(object, key);
+  }
+  function sections(index, term) {
+    var k = 0;
+    return index.terms[term].map(function (delta) { return k += delta; });
+  }
+  function start(index) {
+    var terms = Object.keys(index.terms);
+    var input = box.querySelector("input");
+    var results = box.querySelector("ol");
+    box.hidden = false;
+    input.addEventListener("input", function () {
+      var query = words(input.value);
+      var found = null;
+      results.innerHTML = "";
+      query.forEach(function (word, i) {
+        var matching = i < query.length - 1
+          ? (has(index.terms, word) ? [word] : [])
+          : terms.filter(function (term) { return term.indexOf(word) === 0; });
+        var holding = {};
+        matching.forEach(function (term) {
+          sections(index, term).forEach(function (k) { holding[k] = true; });
+        });
+        found = found === null ? holding : Object.keys(found).reduce(
+          function (both, k) {
+            if (has(holding, k)) both[k] = true;
+            return both;
+          },
+          {}
+        );
+      });
+      Object.keys(found || {}).map(Number).sort(function (a, b) { return a - b; })
+        .slice(0, 50).forEach(function (k) {
+          var section = index.sections[k];
+          var item = document.createElement("li");
+          var link = document.createElement("a");
+          link.href = "#" + section[0];
+          link.textContent = (section[1] ? section[1] + ". " : "") + section[2];
+          item.appendChild(link);
+          results.appendChild(item);
+        });
+    });
+  }
+  var src = data.getAttribute("data-src");
+  if (src) {
+    fetch(src).then(function (response) { return response.json(); }).then(start)
+      .catch(function () {});
+  } else {
+    start(JSON.parse(data.textContent));
+  }
+})();
+</script>
+"""
@@ -0,0 +1,612 @@
+import datetime as dt
+import logging as lg
+from nbconvert.preprocessors import Preprocessor, TagRemovePreprocessor
+from nbformat import NotebookNode
+import re
+from typing import *
+
+from .annotators import ANNOTATORS
+from .instrument import stage
+from .labels import LabelRegistry
+
+
+log = lg.getLogger(__name__)
+
+
+OutputPreprocessor = Tuple[NotebookNode, Dict]
+Annotator = Callable[
+    [NotebookNode, Dict, int],
+    Tuple[Sequence[NotebookNode], Dict, int]
+]
+
+
+LOCALIZED = {
+    "en": {
+        "classification": "classification",
+        "U": "unclassified",
+        "OUO": "official use only",
+        "abstract": "abstract",
+        "notes": "notes and references",
+        "and": "and",
+        "contents": "contents",
+        "search": "search"
+    },
+    "fr": {
+        "classification": "classification",
+        "U": "non classifié",
+        "OUO": "pour usage officiel seulement",
+        "abstract": "résumé",
+        "notes": "notes et références",
+        "and": "et",
+        "contents": "table des matières",
+        "search": "rechercher"
+    }
+}
+
+
+def _is_cell_markdown(cell: NotebookNode) -> bool:
+    return cell.cell_type.lower() == "markdown"
+
+
+def _cell_tags_norm(cell: NotebookNode) -> Sequence[str]:
+    return [t.lower() for t in cell.metadata.get("tags", [])]
+
+
+def copy_cell(node: NotebookNode) -> NotebookNode:
+    # Copy-on-write: the new cell shares all its values with the original, save for
+    # its metadata dictionary. Callers must assign new values to the fields they
+    # modify (such as `source' or `metadata.tags'), rather than mutate them in place,
+    # so that large fields like outputs and attachments are never duplicated.
+    copy = NotebookNode({k: v for k, v in node.items() if k != "id"})
+    if "metadata" in copy:
+        copy["metadata"] = NotebookNode(copy["metadata"])
+    return copy
+
+
+class CollectorLanguage(Preprocessor):
+
+    def preprocess(self, nb: NotebookNode, resources: Dict) -> OutputPreprocessor:
+        resources["language"] = nb.metadata.get("language", "") or nb.metadata.get(
+            "lang",
+            ""
+        )
+        if not resources["language"]:
+            log.warning(
+                "The language of this notebook is not explicitly defined in its "
+                "metadata; we will assume it is English (en)"
+            )
+            resources["language"] = "en"
+        resources["localized"] = LOCALIZED[resources["language"]]
+        resources["today"] = dt.datetime.today().strftime("%Y-%m-%d")
+        return nb, resources
+
+
+class CollectorAbstract(Preprocessor):
+
+    def preprocess_cell(
+        self,
+        cell: NotebookNode,
+        resources: Dict,
+        index: int
+    ) -> OutputPreprocessor:
+        if _is_cell_markdown(cell) and "abstract" in _cell_tags_norm(cell):
+            resources.setdefault("abstract", []).append("".join(cell.source))
+        return cell, resources
+
+
+REFERABLE: Mapping[str, Mapping] = {
+    "note": {
+        "ref": "<sup>{}</sup>",
+        "annotation": ".:cut"
+    },
+    "fig": {
+        "ref": "{}",
+        "name": {
+            "en": "Figure {}",
+            "fr": "Figure {}"
+        },
+        "annotation": ".:legend"
+    },
+    "tab": {
+        "ref": "{}",
+        "name": {
+            "en": "Table {}",
+            "fr": "Tableau {}"
+        },
+        "annotation": ".:legend"
+    },
+    "eq": {
+        "ref": "{}",
+        "annotation": ".:margin"
+    },
+    "sec": {
+        "ref": "{}",
+        "hierarchy": r"^(?P<count>#+)",
+        "annotation": ".:number"
+    }
+}
+
+
+NUM_LEVELS_COUNTER_HIERARCHY = 10
+
+
+class CollectorLabels(Preprocessor):
+
+    def preprocess_cell(
+        self,
+        cell: NotebookNode,
+        resources: Dict,
+        index: int
+    ) -> OutputPreprocessor:
+        labels = cell["metadata"].get("label", {})
+        if not labels:
+            return cell, resources
+        registry = resources.get("labels")
+        if not isinstance(registry, LabelRegistry):
+            registry = resources["labels"] = LabelRegistry(
+                REFERABLE,
+                NUM_LEVELS_COUNTER_HIERARCHY
+            )
+        for c, unique in labels.items():
+            i = registry.level(c, cell["source"])
+            if i is None:
+                log.error(
+                    f"For cell {index}, the numbering is hierarchical, but the "
+                    "convention for deducing the counter level is not "
+                    "followed properly. Defaulting to the root counter."
+                )
+                i = 1
+            registry.add(c, unique, i, index)
+        return cell, resources
+
+
+RX_REFERENCE = re.compile(
+    r"\^\[(?P<text>.*?)\]\((?P<counter>[a-z]+):(?P<unique>[-_a-zA-Z0-9]+)\)"
+)
+
+
+def _ref2anchor(counter: str, unique: str) -> str:
+    return f"{counter}-{unique}"
+
+
+def _dereference(
+    resources: Dict,
+    x: Union[NotebookNode, Tuple[str, str]],
+    default: str = "??"
+) -> str:
+    if isinstance(x, NotebookNode):
+        counter, unique = _get_label0(cast(NotebookNode, x))
+    elif hasattr(x, "__iter__") and hasattr(x, "__len__") and len(x) == 2:
+        counter, unique = x
+    else:
+        raise ValueError(f"Unsuitable reference holder: {repr(x)}")
+
+    return _number(resources.get("labels", {}), counter, unique, default)
+
+
+def _number(labels: Mapping, counter: str, unique: str, default: str = "") -> str:
+    if isinstance(labels, LabelRegistry):
+        return labels.number(counter, unique, default)
+    return labels.get(counter, {}).get(unique, default)
+
+
+# Replaces each reference `^[template](counter:unique)' of Markdown cells with a
+# link to the label's anchor, its text the template formatted with the label's
+# number. Labels the notebook does not define are looked up in
+# resources["labels_external"], which maps them to the document defining them and
+# their number there (see the book module). The replacement for each distinct
+# reference is computed once per notebook, and references to unknown labels are
+# reported all at once at the end.
+class SolverReferences(Preprocessor):
+
+    _labels: Optional[Mapping] = None
+    _external: Mapping[str, Mapping[str, Sequence[str]]] = {}
+    _index = 0
+    _unbound: Optional[Dict[str, List[int]]] = None
+
+    def __init__(self, **kw: Any) -> None:
+        super().__init__(**kw)
+        self._replacements: Dict[str, Tuple[str, Optional[List[int]]]] = {}
+
+    def preprocess(self, nb: NotebookNode, resources: Dict) -> OutputPreprocessor:
+        self._begin()
+        try:
+            return super().preprocess(nb, resources)
+        finally:
+            self._end()
+
+    def _begin(self) -> None:
+        self._labels = None
+        self._unbound = {}
+
+    def _end(self) -> None:
+        unbound, self._unbound = self._unbound or {}, None
+        if unbound:
+            where = "; ".join(
+                f"`{label}' in cells {', '.join(str(i) for i in sorted(set(cells)))}"
+                for label, cells in unbound.items()
+            )
+            log.error(
+                f"{sum(len(cells) for cells in unbound.values())} references to "
+                f"{len(unbound)} unbound labels: {where}"
+            )
+
+    def preprocess_cell(
+        self,
+        cell: NotebookNode,
+        resources: Dict,
+        index: int
+    ) -> OutputPreprocessor:
+        if "^[" not in cell.source or not _is_cell_markdown(cell):
+            return cell, resources
+        labels = resources.get("labels", {})
+        external = resources.get("labels_external", {})
+        if labels is not self._labels or external is not self._external:
+            self._labels = labels
+            self._external = external
+            self._replacements = {}
+        self._index = index
+        resolved, num_references = RX_REFERENCE.subn(self._solve, cell.source)
+        if num_references > 0:
+            cell = copy_cell(cell)
+            cell["source"] = resolved
+        return cell, resources
+
+    def _solve(self, m: re.Match) -> str:
+        reference = m[0]
+        if reference not in self._replacements:
+            self._replacements[reference] = self._replacement(m)
+        replacement, citing = self._replacements[reference]
+        if citing is None:
+            label = f"{m['counter']}:{m['unique']}"
+            if self._unbound is None:
+                log.error(f"Reference label `{label}' is unbound.")
+            else:
+                self._unbound.setdefault(label, []).append(self._index)
+        elif not citing or citing[-1] != self._index:
+            citing.append(self._index)
+        return replacement
+
+    # Replacement for the given reference, along with the list of the cells citing
+    # its label (which _solve keeps up to date), or None if the label is unbound.
+    def _replacement(self, m: re.Match) -> Tuple[str, Optional[List[int]]]:
+        template = m["text"].strip() or REFERABLE.get(m["counter"], {}).get("ref", "")
+        if not template:
+            log.warning(
+                f"No template string provided for reference `{m.group(0)}' in cell "
+                f"{self._index}, and the counter `{m['counter']}' does not suggest a "
+                "default template; will simply put out the number"
+            )
+            template = "{}"
+        number = _number(self._labels or {}, m["counter"], m["unique"])
+        href = ""
+        if not number:
+            href, number = self._external.get(m["counter"], {}).get(
+                m["unique"],
+                ("", "")
+            )
+        citing: Optional[List[int]] = None
+        if number:
+            citing = (
+                self._labels.citing(m["counter"], m["unique"])
+                if isinstance(self._labels, LabelRegistry)
+                else []
+            )
+        return (
+            f'[{template.format(number or "??")}]'
+            f'({href}#{_ref2anchor(m["counter"], m["unique"])})',
+            citing
+        )
+
+
+def _descriptor_annotator(counter: str, scheme_annotator: str = "") -> str:
+    if scheme_annotator:
+        return scheme_annotator
+    return REFERABLE.get(counter, {}).get("annotation", "")
+
+
+def _get_annotator(counter: str, scheme_annotator: str = "") -> Annotator:
+    descriptor = _descriptor_annotator(counter, scheme_annotator)
+    if not descriptor:
+        log.error(
+            f"The label counter `{counter}' is not associated to a known "
+            "annotator routine; we default to no cell modification (no-op) "
+        )
+        return unchanged
+    return ANNOTATORS.resolve(descriptor)
+
+
+def _get_label0(cell: NotebookNode) -> Tuple[str, str]:
+    assert len(cell.metadata.label) > 0
+    return [(c, u) for c, u in cell.metadata.label.items()][0]
+
+
+class RendererAnnotations(Preprocessor):
+
+    def preprocess(self, nb: NotebookNode, resources: Dict) -> OutputPreprocessor:
+        self.check(nb)
+        nb_new = NotebookNode({k: v for k, v in nb.items() if k != "cells"})
+        nb_new["cells"] = []
+        i = 0
+        while i < len(nb.cells):
+            cells_new, resources, delta = self.annotate(nb, resources, i)
+            nb_new.cells += cells_new
+            i += delta
+        return nb_new, resources
+
+    # Resolves all the annotators the notebook calls for up front, so that any that
+    # cannot be are all reported at once, before any annotation.
+    def check(self, nb: NotebookNode) -> None:
+        descriptors: Dict[str, List[int]] = {}
+        for i, cell in enumerate(nb.cells):
+            if _is_cell_markdown(cell) and cell.metadata.get("label", {}):
+                counter, _ = _get_label0(cell)
+                descriptor = _descriptor_annotator(
+                    counter.strip(),
+                    cell.metadata.get("annotator", "").strip()
+                )
+                if descriptor:
+                    descriptors.setdefault(descriptor, []).append(i)
+        ANNOTATORS.check(descriptors)
+
+    def annotate(
+        self,
+        nb: NotebookNode,
+        resources: Dict,
+        i: int
+    ) -> Tuple[Sequence[NotebookNode], Dict, int]:
+        cell = nb.cells[i]
+        if _is_cell_markdown(cell) and "label" in cell.metadata and (
+            len(cell.metadata.label) > 0
+        ):
+            counter, unique = _get_label0(cell)
+            if len(cell.metadata.label) > 1:
+                log.error(
+                    "The only annotation scheme supported is for a cell adorned "
+                    f"with a single label. Cell {i} has {len(cell.metadata.label)} "
+                    "labels. We annotate here only according to "
+                    f"label `{counter}:{unique}'"
+                )
+            annotator = _get_annotator(
+                counter.strip(),
+                cell.metadata.get("annotator", "").strip()
+            )
+            with stage(resources, f"annotator:{annotator.__name__}"):
+                cells_new, resources, delta = annotator(nb, resources, i)
+            assert delta > 0
+            return cells_new, resources, delta
+        return [cell], resources, 1
+
+
+def _prepend_anchor(cell: NotebookNode) -> NotebookNode:
+    cell_new = copy_cell(cell)
+    text = "".join(cell.source)
+    counter, unique = _get_label0(cell)
+    cell_new["source"] = f'<a name="{_ref2anchor(counter, unique)}"></a>\n\n{text}'
+    return cell_new
+
+
+def unchanged(
+    notebook: NotebookNode,
+    resources: Dict,
+    i: int
+) -> Tuple[Sequence[NotebookNode], Dict, int]:
+    return [notebook.cells[i]], resources, 1
+
+
+def cut(
+    notebook: NotebookNode,
+    resources: Dict,
+    i: int
+) -> Tuple[Sequence[NotebookNode], Dict, int]:
+    cell = notebook.cells[i]
+    assert _is_cell_markdown(cell) and len(cell.metadata.get("label", {})) == 1
+    counter, unique = _get_label0(cell)
+    resources.setdefault("cuts", []).append(
+        {
+            counter: str(_dereference(resources, (counter, unique))),
+            "anchor": _ref2anchor(counter, unique),
+            "text": cell.source
+        }
+    )
+    return [], resources, 1
+
+
+def legend(
+    notebook: NotebookNode,
+    resources: Dict,
+    i: int
+) -> Tuple[Sequence[NotebookNode], Dict, int]:
+    cell_current = notebook.cells[i]
+    counter, unique = _get_label0(cell_current)
+    cell_new = _prepend_anchor(cell_current)
+    cell_new.metadata["tags"] = cell_new.metadata.get("tags", []) + [
+        "legendary",
+        counter
+    ]
+    cells_new = [cell_new]
+    i_legend = i + 1
+    if i_legend < len(notebook.cells) and "legend" in _cell_tags_norm(
+        notebook.cells[i_legend]
+    ):
+        cell_legend = copy_cell(notebook.cells[i_legend])
+        description = REFERABLE.get(counter, {}).get(
+            "name",
+            {"en": "resource {}", "fr": "ressource {}"}
+        ).get(
+            resources.get("language", "en"),
+            "resource {}"
+        ).capitalize().format(_dereference(resources, (counter, unique)))
+        cell_legend["source"] = (
+            f"{description} &mdash; {''.join(cell_legend['source'])}"
+        )
+        cells_new.append(cell_legend)
+
+    return cells_new, resources, len(cells_new)
+
+
+def margin(
+    notebook: NotebookNode,
+    resources: Dict,
+    i: int
+) -> Tuple[Sequence[NotebookNode], Dict, int]:
+    cell = copy_cell(notebook.cells[i])
+    number = _dereference(resources, cell)
+    text = "".join(cell.source)
+    cell["source"] = (
+        '<div class="annotation-container">'
+        f'<div class="annotated-main">{text}</div>'
+        f'<div class="annotation-margin">({number})</div>'
+        '</div>'
+    )
+    return [_prepend_anchor(cell)], resources, 1
+
+
+def number(
+    notebook: NotebookNode,
+    resources: Dict,
+    i: int
+) -> Tuple[Sequence[NotebookNode], Dict, int]:
+    cell = copy_cell(notebook.cells[i])
+    counter, unique = _get_label0(cell)
+    number = _dereference(resources, cell)
+    text = "".join(cell.source).strip()
+    token, rest = text.split(maxsplit=1)
+    cell["source"] = (
+        f'{token} <a name="{_ref2anchor(counter, unique)}"></a>{number}. {rest}'
+    )
+    return [cell], resources, 1
+
+
+# Cells of a notebook, whose references get solved as they are first accessed. This
+# lets annotators peek at the cells that follow the one they annotate, as they are
+# used to, within a single scan of the notebook.
+class _CellsSolving(Sequence[NotebookNode]):
+
+    def __init__(
+        self,
+        cells: Sequence[NotebookNode],
+        solver: Optional[Preprocessor],
+        resources: Dict
+    ) -> None:
+        self._cells = cells
+        self._solved: List[Optional[NotebookNode]] = [None] * len(cells)
+        self._solver = solver
+        self._resources = resources
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        cell = self._solved[index]
+        if cell is None:
+            cell = self._cells[index]
+            if self._solver is not None:
+                cell, self._resources = self._solver.preprocess_cell(
+                    cell,
+                    self._resources,
+                    index
+                )
+            self._solved[index] = cell
+        return cell
+
+
+# Runs the preprocessors of the article-html template in two scans of the notebook,
+# rather than one scan each: the first collects language and labels, the second
+# solves references, renders annotations, collects the abstract and removes tagged
+# cells. It is put in place of these preprocessors by ArticleHTMLExporter when its
+# `fused_pipeline' setting is on, and yields exactly the same notebook.
+class PipelineArticle(Preprocessor):
+
+    def __init__(
+        self,
+        language: Optional[CollectorLanguage] = None,
+        labels: Optional[CollectorLabels] = None,
+        references: Optional[SolverReferences] = None,
+        annotations: Optional[RendererAnnotations] = None,
+        abstract: Optional[CollectorAbstract] = None,
+        tag_remove: Optional[TagRemovePreprocessor] = None,
+        **kw: Any
+    ) -> None:
+        super().__init__(**kw)
+
+        def stage(p: Optional[Preprocessor], default: Type[Preprocessor]) -> Any:
+            if p is None:
+                return default(enabled=True)
+            return p if p.enabled else None
+
+        self.language = stage(language, CollectorLanguage)
+        self.labels = stage(labels, CollectorLabels)
+        self.references = stage(references, SolverReferences)
+        self.annotations = stage(annotations, RendererAnnotations)
+        self.abstract = stage(abstract, CollectorAbstract)
+        self.tag_remove = None
+        if tag_remove is not None and tag_remove.enabled and any(
+            [
+                tag_remove.remove_cell_tags,
+                tag_remove.remove_all_outputs_tags,
+                tag_remove.remove_single_output_tags,
+                tag_remove.remove_input_tags
+            ]
+        ):
+            self.tag_remove = tag_remove
+
+    def preprocess(self, nb: NotebookNode, resources: Dict) -> OutputPreprocessor:
+        if self.language is not None:
+            nb, resources = self.language.preprocess(nb, resources)
+        if self.labels is not None:
+            for index, cell in enumerate(nb.cells):
+                _, resources = self.labels.preprocess_cell(cell, resources, index)
+
+        if self.annotations is not None:
+            self.annotations.check(nb)
+        if self.references is not None:
+            self.references._begin()
+        cells = _CellsSolving(nb.cells, self.references, resources)
+        nb_solved = NotebookNode({k: v for k, v in nb.items() if k != "cells"})
+        dict.__setitem__(nb_solved, "cells", cells)
+        cells_new: List[NotebookNode] = []
+        index = 0
+        i = 0
+        while i < len(cells):
+            if self.annotations is None:
+                annotated, delta = [cells[i]], 1
+            else:
+                annotated, resources, delta = self.annotations.annotate(
+                    nb_solved,
+                    resources,
+                    i
+                )
+            for cell in annotated:
+                if self.abstract is not None:
+                    cell, resources = self.abstract.preprocess_cell(
+                        cell,
+                        resources,
+                        index
+                    )
+                if self.tag_remove is not None:
+                    if not self.tag_remove.check_cell_conditions(
+                        cell,
+                        resources,
+                        index
+                    ):
+                        index += 1
+                        continue
+                    cell, resources = self.tag_remove.preprocess_cell(
+                        cell,
+                        resources,
+                        index
+                    )
+                cells_new.append(cell)
+                index += 1
+            i += delta
+
+        if self.references is not None:
+            self.references._end()
+        nb_new = NotebookNode({k: v for k, v in nb.items() if k != "cells"})
+        nb_new["cells"] = cells_new
+        return nb_new, resources
@@ -0,0 +1,388 @@
+from argparse import ArgumentParser
+import ctypes
+import ctypes.util
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging as lg
+import os
+from pathlib import Path
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+from typing import *
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from .cache import CacheFragments
+from .incremental import IncrementalArticleHTMLExporter
+
+
+log = lg.getLogger(__name__)
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+_EVENT = struct.Struct("iIII")
+
+
+class Watcher(Protocol):
+
+    def wait(self, timeout: float) -> Set[Path]:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+# Watches directories through Linux's inotify, so that saves are noticed as they
+# happen, without polling.
+class WatcherInotify:
+
+    def __init__(self, dirs: Iterable[Path]) -> None:
+        name_libc = ctypes.util.find_library("c")
+        if not name_libc or not sys.platform.startswith("linux"):
+            raise OSError("inotify is not available on this platform")
+        libc = ctypes.CDLL(name_libc, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "Cannot initialize inotify")
+        self._dirs: Dict[int, Path] = {}
+        for dir_ in dirs:
+            wd = libc.inotify_add_watch(
+                self._fd,
+                os.fsencode(dir_),
+                IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            )
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"Cannot watch directory `{dir_}'")
+            self._dirs[wd] = dir_
+
+    def wait(self, timeout: float) -> Set[Path]:
+        changed: Set[Path] = set()
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return changed
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _, _, size = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + size].rstrip(b"\0").decode()
+            offset += size
+            if name.endswith(".ipynb") and wd in self._dirs:
+                changed.add(self._dirs[wd] / name)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+# Fallback for platforms without inotify.
+class WatcherPolling:
+
+    def __init__(self, dirs: Iterable[Path], interval: float = 0.1) -> None:
+        self._dirs = list(dirs)
+        self._interval = interval
+        self._mtimes = self._scan()
+
+    def _scan(self) -> Dict[Path, int]:
+        mtimes = {}
+        for dir_ in self._dirs:
+            for path in dir_.glob("*.ipynb"):
+                try:
+                    mtimes[path] = path.stat().st_mtime_ns
+                except OSError:
+                    continue
+        return mtimes
+
+    def wait(self, timeout: float) -> Set[Path]:
+        deadline = time.monotonic() + timeout
+        while True:
+            mtimes = self._scan()
+            changed = {
+                path for path, mtime in mtimes.items()
+                if self._mtimes.get(path) != mtime
+            } | (self._mtimes.keys() - mtimes.keys())
+            self._mtimes = mtimes
+            if changed or time.monotonic() >= deadline:
+                return changed
+            time.sleep(min(self._interval, max(0.0, deadline - time.monotonic())))
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(dirs: Iterable[Path]) -> Watcher:
+    dirs = list(dirs)
+    try:
+        return WatcherInotify(dirs)
+    except OSError as err:
+        log.info(f"Falling back to polling for changes ({err})")
+        return WatcherPolling(dirs)
+
+
+RELOADER = """\
+<script>
+(function() {
+    var source = new EventSource("/events?doc=%(doc)s&since=%(version)d");
+    source.onmessage = function() {
+        source.close();
+        window.location.reload();
+    };
+})();
+</script>
+"""
+
+
+class Document(NamedTuple):
+    html: str
+    version: int
+    latency_build: float
+    latency_push: float = 0.0
+
+
+# Keeps the notebooks under watch rendered in memory, with one warm exporter per
+# notebook, and notifies browsers as documents are rebuilt.
+class Preview:
+
+    def __init__(self, paths: Iterable[Union[str, Path]], debounce: float = 0.2):
+        self.debounce = debounce
+        self.notebooks: Dict[str, Path] = {}
+        self.dirs: Set[Path] = set()
+        for path_ in paths:
+            path = Path(path_).resolve()
+            if path.is_dir():
+                self.dirs.add(path)
+                for notebook in sorted(path.glob("*.ipynb")):
+                    self.notebooks[notebook.stem] = notebook
+            else:
+                self.dirs.add(path.parent)
+                self.notebooks[path.stem] = path
+        self.documents: Dict[str, Document] = {}
+        self._exporters: Dict[str, IncrementalArticleHTMLExporter] = {}
+        self._cache = CacheFragments()
+        self._changed = threading.Condition()
+
+    def build(self, path: Path) -> None:
+        path = path.resolve()
+        if any(path.parent == dir_ for dir_ in self.dirs):
+            self.notebooks.setdefault(path.stem, path)
+        name = path.stem
+        if self.notebooks.get(name) != path:
+            return
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            # The notebook was deleted or moved away.
+            with self._changed:
+                self._forget(name)
+            log.info(f"Dropped {name}, whose notebook is gone")
+            return
+        if name not in self._exporters:
+            self._exporters[name] = IncrementalArticleHTMLExporter()
+            self._exporters[name]._cache_render = self._cache
+        exporter = self._exporters[name]
+        try:
+            html, _ = exporter.from_filename(str(path))
+        except Exception:
+            log.exception(f"Failed to export `{path}'")
+            html = (
+                f"<html><body><h1>Failed to export {escape(str(path))}</h1>"
+                f"<pre>{escape(traceback.format_exc())}</pre></body></html>"
+            )
+        latency = max(0.0, time.time() - mtime)
+        with self._changed:
+            version = self.documents[name].version + 1 if name in self.documents else 1
+            self.documents[name] = Document(html, version, latency)
+            self._changed.notify_all()
+        log.info(
+            f"Rebuilt {name} (version {version}) {latency * 1000:.0f} ms after edit"
+        )
+
+    def build_all(self) -> None:
+        for path in list(self.notebooks.values()):
+            self.build(path)
+
+    def page(self, name: str) -> Optional[str]:
+        document = self.documents.get(name)
+        if document is None:
+            return None
+        reloader = RELOADER % {"doc": quote(name), "version": document.version}
+        i = document.html.rfind("</body>")
+        if i < 0:
+            return document.html + reloader
+        return document.html[:i] + reloader + document.html[i:]
+
+    def wait_version(self, name: str, since: int, timeout: float) -> int:
+        with self._changed:
+            self._changed.wait_for(
+                lambda: (
+                    name in self.documents and self.documents[name].version > since
+                ),
+                timeout
+            )
+            return self.documents[name].version if name in self.documents else 0
+
+    def _forget(self, name: str) -> None:
+        self.notebooks.pop(name, None)
+        self.documents.pop(name, None)
+        self._exporters.pop(name, None)
+
+    def pushed(self, name: str) -> None:
+        with self._changed:
+            document = self.documents.get(name)
+            if document is None:
+                return
+            try:
+                mtime = self.notebooks[name].stat().st_mtime
+            except OSError:
+                self._forget(name)
+                log.info(f"Dropped {name}, whose notebook is gone")
+                return
+            self.documents[name] = document._replace(
+                latency_push=max(0.0, time.time() - mtime)
+            )
+        log.info(
+            f"Pushed {name} to browser "
+            f"{self.documents[name].latency_push * 1000:.0f} ms after edit"
+        )
+
+    def status(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "version": document.version,
+                "latency_build": document.latency_build,
+                "latency_push": document.latency_push
+            }
+            for name, document in self.documents.items()
+        }
+
+    def watch(self, stop: threading.Event, watcher: Optional[Watcher] = None) -> None:
+        watcher = watcher or make_watcher(self.dirs)
+        try:
+            while not stop.is_set():
+                changed = watcher.wait(0.5)
+                if not changed:
+                    continue
+                # Editors often save in bursts: wait for things to settle down.
+                while more := watcher.wait(self.debounce):
+                    changed |= more
+                for path in sorted(changed):
+                    self.build(path)
+        finally:
+            watcher.close()
+
+    def server(self, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+        preview = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format: str, *args: Any) -> None:
+                log.debug(format % args)
+
+            def _send(self, code: int, content_type: str, body: str) -> None:
+                data = body.encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path == "/":
+                    items = "".join(
+                        f'<li><a href="/{quote(name)}.html">{escape(name)}</a></li>'
+                        for name in sorted(preview.notebooks)
+                    )
+                    self._send(200, "text/html", f"<html><body><ul>{items}</ul>")
+                elif url.path == "/status":
+                    self._send(200, "application/json", json.dumps(preview.status()))
+                elif url.path == "/events":
+                    self._events(parse_qs(url.query))
+                elif url.path.endswith(".html"):
+                    page = preview.page(unquote(url.path[1:-len(".html")]))
+                    if page is None:
+                        self._send(404, "text/plain", "No such document")
+                    else:
+                        self._send(200, "text/html", page)
+                else:
+                    self._send(404, "text/plain", "Not found")
+
+            def _events(self, query: Dict[str, List[str]]) -> None:
+                name = query.get("doc", [""])[0]
+                try:
+                    since = int(query.get("since", ["0"])[0])
+                except ValueError:
+                    self._send(400, "text/plain", "`since' must be an integer")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                try:
+                    while True:
+                        version = preview.wait_version(name, since, 15.0)
+                        if version > since:
+                            self.wfile.write(f"data: {version}\n\n".encode("utf-8"))
+                            self.wfile.flush()
+                            preview.pushed(name)
+                            return
+                        # Keeps the connection alive.
+                        self.wfile.write(b": ping\n\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = ArgumentParser(
+        description=(
+            "Serve live previews of notebooks rendered to article-html, refreshed in "
+            "the browser as the notebooks are saved."
+        )
+    )
+    parser.add_argument("paths", nargs="+", help="Notebooks or directories to watch.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("-p", "--port", type=int, default=8000, help="Port.")
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.2,
+        help="Quiet time, in seconds, to wait for after a save before rebuilding."
+    )
+    args = parser.parse_args(argv)
+    lg.basicConfig(level=lg.INFO, format="%(levelname)s %(message)s")
+
+    preview = Preview(args.paths, args.debounce)
+    preview.build_all()
+    server = preview.server(args.host, args.port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving previews on http://{args.host}:{server.server_address[1]}/")
+    stop = threading.Event()
+    try:
+        preview.watch(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,25 @@
 from pathlib import Path
+import re
 from typing import *  # noqa
 
 
 from nbconvert import NotebookExporter
+from nbformat import NotebookNode
 from traitlets.config import Config
 
 
+RX_ID_CELL = re.compile(r' id="cell-id=([^"]*)"')
+
+
 def export_notebook(name: str, config: Config) -> Tuple[str, Dict]:
     return NotebookExporter(config=config).from_filename(
         Path(__file__).parent / "notebooks" / name
     )
+
+
+# Cells the preprocessors copy lose their ID, and are given a random one on each
+# export: strips these from the HTML export of the notebook, keeping the IDs of its
+# own cells.
+def strip_ids(html: str, nb: NotebookNode) -> str:
+    ids = {cell.get("id") for cell in nb.cells}
+    return RX_ID_CELL.sub(lambda m: m[0] if m[1] in ids else "", html)
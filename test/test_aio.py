@@ -0,0 +1,71 @@
+import asyncio
+from pathlib import Path
+import time
+
+import nbformat
+import pytest
+from traitlets.config import Config
+
+from nbconvert_article_html.aio import ExporterAsync
+
+
+PATH_NOTEBOOK = Path(__file__).parent / "notebooks" / "references-notes.ipynb"
+
+
+def test_export_concurrently():
+    async def run():
+        async with ExporterAsync(processes=2) as exporter:
+            nb = nbformat.read(PATH_NOTEBOOK, as_version=4)
+            return await asyncio.gather(
+                exporter.from_filename(PATH_NOTEBOOK),
+                exporter.from_notebook_node(nb),
+                exporter.from_filename(PATH_NOTEBOOK, timeout=30.0)
+            )
+
+    results = asyncio.run(run())
+    for html, resources in results:
+        assert "note-link-external" in html
+        assert "labels" in resources
+    assert results[0][1]["metadata"]["name"] == "references-notes"
+
+
+def test_exporters_in_process_keep_own_config():
+    config = Config({"ArticleHTMLExporter": {"search_index": "embedded"}})
+
+    async def run():
+        async with ExporterAsync(processes=0, config=config) as searching:
+            async with ExporterAsync(processes=0) as plain:
+                await asyncio.gather(searching.warm_up(), plain.warm_up())
+                return await asyncio.gather(
+                    searching.from_filename(PATH_NOTEBOOK),
+                    plain.from_filename(PATH_NOTEBOOK),
+                    searching.from_filename(PATH_NOTEBOOK)
+                )
+
+    (html_a, _), (html_plain, _), (html_b, _) = asyncio.run(run())
+    assert 'id="article-html-search"' in html_a
+    assert 'id="article-html-search"' in html_b
+    assert 'id="article-html-search"' not in html_plain
+
+
+def slow(*_):
+    time.sleep(1.0)
+    return "", {}, 0.0
+
+
+def test_export_deadline(monkeypatch):
+    monkeypatch.setattr("nbconvert_article_html.batch.export_in_worker", slow)
+
+    async def run():
+        async with ExporterAsync(processes=0, timeout=0.1) as exporter:
+            nb = nbformat.read(PATH_NOTEBOOK, as_version=4)
+            with pytest.raises(asyncio.TimeoutError):
+                await exporter.from_notebook_node(nb)
+            # Queued behind the first, this one is withdrawn before it starts.
+            task = asyncio.ensure_future(exporter.from_notebook_node(nb, timeout=5.0))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(run())
@@ -0,0 +1,79 @@
+from importlib.metadata import EntryPoint
+from nbformat import NotebookNode
+from nbformat.v4 import new_markdown_cell, new_notebook
+import pytest
+from typing import *
+
+from nbconvert_article_html import (
+    legend,
+    PipelineArticle,
+    RegistryAnnotators,
+    RendererAnnotations
+)
+import nbconvert_article_html.annotators as annotators
+
+
+def boxed(
+    notebook: NotebookNode,
+    resources: Dict,
+    i: int
+) -> Tuple[Sequence[NotebookNode], Dict, int]:
+    return [notebook.cells[i]], resources, 1
+
+
+NOT_CALLABLE = 42
+
+
+def test_resolve_cached():
+    registry = RegistryAnnotators()
+    assert registry.resolve(".:legend") is legend
+    registry._resolved[".:legend"] = boxed
+    assert registry.resolve(".:legend") is boxed
+
+
+def test_resolve_entry_point(monkeypatch):
+    monkeypatch.setattr(
+        annotators,
+        "_entry_points",
+        lambda group: [
+            EntryPoint(name="boxed", value="test.test_annotators:boxed", group=group)
+        ]
+    )
+    assert RegistryAnnotators().resolve("boxed") is boxed
+
+
+def test_resolve_not_callable():
+    with pytest.raises(ValueError, match="not callable"):
+        RegistryAnnotators().resolve("test.test_annotators:NOT_CALLABLE")
+
+
+def labelled(counter: str, annotator: str) -> NotebookNode:
+    cell = new_markdown_cell(f"Some {counter}")
+    cell.metadata["label"] = {counter: f"{counter}-{annotator}"}
+    cell.metadata["annotator"] = annotator
+    return cell
+
+
+def test_check_reports_all():
+    nb = new_notebook(
+        cells=[
+            labelled("fig", "test.test_annotators:nope"),
+            labelled("fig", ".:legend"),
+            labelled("tab", "no_such_module:f"),
+            labelled("fig", "test.test_annotators:nope"),
+        ]
+    )
+    for preprocessor in [RendererAnnotations(), PipelineArticle()]:
+        with pytest.raises(ValueError) as err:
+            preprocessor.preprocess(nb, {})
+        message = str(err.value)
+        assert message.startswith("Cannot resolve 2 annotators")
+        assert "`test.test_annotators:nope' (cells 0, 3)" in message
+        assert "`no_such_module:f' (cells 2)" in message
+
+
+def test_unknown_counter_unchanged():
+    cell = new_markdown_cell("Anything")
+    cell.metadata["label"] = {"foo": "bar"}
+    nb, _ = RendererAnnotations().preprocess(new_notebook(cells=[cell]), {})
+    assert [c.source for c in nb.cells] == ["Anything"]
@@ -0,0 +1,84 @@
+import base64
+import nbformat
+from nbformat.v4 import new_code_cell, new_output
+from pathlib import Path
+import re
+from traitlets.config import Config
+from typing import *
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.batch import export_batch
+
+
+DIR_NOTEBOOKS = Path(__file__).parent / "notebooks"
+PNG_LARGE = base64.b64encode(b"\x89PNG large" + bytes(range(256)) * 4).decode()
+PNG_SMALL = base64.b64encode(b"\x89PNG small").decode()
+SVG = '<svg xmlns="http://www.w3.org/2000/svg"><rect width="1" height="1"/></svg>'
+
+
+def output_image(mime_type: str, data: str) -> nbformat.NotebookNode:
+    return new_output("display_data", data={mime_type: data})
+
+
+def notebook_figures() -> nbformat.NotebookNode:
+    nb = nbformat.read(DIR_NOTEBOOKS / "annotations-common.ipynb", as_version=4)
+    nb.cells += [
+        new_code_cell("logo()", outputs=[output_image("image/png", PNG_LARGE)]),
+        new_code_cell("logo()", outputs=[output_image("image/png", PNG_LARGE)]),
+        new_code_cell("dot()", outputs=[output_image("image/png", PNG_SMALL)]),
+        new_code_cell("shape()", outputs=[output_image("image/svg+xml", SVG)]),
+    ]
+    return nb
+
+
+def export(nb: nbformat.NotebookNode, **config: Any) -> Tuple[str, Dict]:
+    exporter = ArticleHTMLExporter(config=Config({"ArticleHTMLExporter": config}))
+    return exporter.from_notebook_node(nb)
+
+
+def test_assets_embedded_by_default():
+    html, resources = export(notebook_figures())
+    assert "assets" not in resources
+    assert html.count('src="data:image/png;base64,') == 3
+    assert 'src="data:image/svg+xml;base64,' in html
+
+
+def test_assets_deduplicated():
+    nb = notebook_figures()
+    html, resources = export(nb, assets_dir="assets", assets_inline_max=50)
+    names = sorted(resources["outputs"])
+    assert len(names) == 2
+    assert all(re.fullmatch(r"assets/[0-9a-f]{32}\.(png|svg)", name) for name in names)
+    name_png = next(name for name in names if name.endswith(".png"))
+    assert resources["outputs"][name_png] == base64.b64decode(PNG_LARGE)
+    assert html.count(f'src="{name_png}"') == 2
+    assert html.count('src="data:image/png;base64,') == 1
+    assert 'src="data:image/svg+xml' not in html
+    assert resources["assets"] == {
+        "unique": 2,
+        "references": 3,
+        "inline": 1,
+        "size": len(base64.b64decode(PNG_LARGE)) + len(SVG)
+    }
+    # The original notebook is left alone.
+    assert all(
+        "filenames" not in output.metadata
+        for cell in nb.cells
+        for output in cell.get("outputs", [])
+    )
+
+
+def test_assets_written_by_batch(tmp_path):
+    path = tmp_path / "figures.ipynb"
+    nbformat.write(notebook_figures(), path)
+    report = export_batch(
+        [path],
+        tmp_path / "output",
+        0,
+        config=Config({"ArticleHTMLExporter": {"assets_dir": "assets"}})
+    )
+    assert not report.failures
+    assets = list((tmp_path / "output" / "assets").iterdir())
+    assert len(assets) == 3
+    html = (tmp_path / "output" / "figures.html").read_text(encoding="utf-8")
+    assert all(f"assets/{asset.name}" in html for asset in assets)
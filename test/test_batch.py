@@ -0,0 +1,69 @@
+from pathlib import Path
+import shutil
+from traitlets.config import Config
+from typing import *
+
+from nbconvert_article_html.batch import Conversion, export_batch, main, make_pool
+
+
+DIR_NOTEBOOKS = Path(__file__).parent / "notebooks"
+
+
+def make_corpus(dir_: Path) -> Path:
+    dir_corpus = dir_ / "corpus"
+    (dir_corpus / "sub").mkdir(parents=True)
+    shutil.copy(DIR_NOTEBOOKS / "annotations-common.ipynb", dir_corpus)
+    shutil.copy(DIR_NOTEBOOKS / "references-notes.ipynb", dir_corpus / "sub")
+    (dir_corpus / "broken.ipynb").write_text("{ this is not JSON", encoding="utf-8")
+    return dir_corpus
+
+
+def run_test(tmp_path: Path, processes: Optional[int]) -> None:
+    dir_corpus = make_corpus(tmp_path)
+    dir_output = tmp_path / "output"
+    seen: List[Conversion] = []
+    report = export_batch([dir_corpus], dir_output, processes, on_result=seen.append)
+    assert len(report.conversions) == 3
+    assert len(seen) == 3
+    assert [f.source.name for f in report.failures] == ["broken.ipynb"]
+    assert (dir_output / "annotations-common.html").is_file()
+    assert (dir_output / "sub" / "references-notes.html").is_file()
+    assert "note-link-external" in (
+        dir_output / "sub" / "references-notes.html"
+    ).read_text(encoding="utf-8")
+    assert report.throughput > 0
+    assert "2 notebooks converted, 1 failed" in report.summary()
+
+
+def test_batch_serial(tmp_path):
+    run_test(tmp_path, 0)
+
+
+def test_batch_pool(tmp_path):
+    run_test(tmp_path, 2)
+
+
+def test_batch_config_file(tmp_path):
+    dir_corpus = make_corpus(tmp_path)
+    path_config = tmp_path / "config.py"
+    path_config.write_text(
+        'c.ArticleHTMLExporter.search_index = "embedded"\n',
+        encoding="utf-8"
+    )
+    dir_output = tmp_path / "output"
+    argv = [str(dir_corpus / "sub"), "-o", str(dir_output), "-j", "0"]
+    assert main(argv + ["-c", str(path_config)]) == 0
+    html = (dir_output / "references-notes.html").read_text(encoding="utf-8")
+    assert 'id="article-html-search"' in html
+
+
+def test_pools_in_process_keep_own_exporters():
+    def minify() -> bool:
+        from nbconvert_article_html.batch import _exporter_worker
+        return _exporter_worker().minify
+
+    config = Config({"ArticleHTMLExporter": {"minify": True}})
+    with make_pool(0, config) as pool_minify, make_pool(0, None) as pool_plain:
+        assert pool_minify.submit(minify).result()
+        assert not pool_plain.submit(minify).result()
+        assert pool_minify.submit(minify).result()
@@ -0,0 +1,21 @@
+import nbformat
+
+from benchmark.suite import compare, run_scenario
+from benchmark.synthetic import synthetic_notebook
+
+
+def test_synthetic_notebook_valid():
+    nb = synthetic_notebook(200, image_bytes=100, section_density=0.2, depth_max=4)
+    nbformat.validate(nb)
+    assert len(nb.cells) == 200
+    labels = [c for c in nb.cells if "label" in c.metadata]
+    assert any("sec" in c.metadata.label for c in labels)
+    assert any("^[" in c.source for c in nb.cells)
+
+
+def test_suite_scenario():
+    result = run_scenario("tiny", {"num_cells": 30}, repeat=1)
+    for stage in ["CollectorLabels", "SolverReferences", "template", "total"]:
+        assert stage in result["seconds"]
+    assert result["peak_memory"] > 0
+    assert compare({"scenarios": [result]}, {"scenarios": [result]}, 1.2) == []
@@ -0,0 +1,112 @@
+import nbformat
+from nbformat.v4 import new_markdown_cell, new_notebook
+import os
+from pathlib import Path
+import re
+from typing import *
+
+from nbconvert_article_html.book import export_book, IndexBook, NAME_INDEX
+
+
+def write_chapter(path: Path, *cells: Tuple[str, Dict]) -> None:
+    nb = new_notebook(
+        cells=[
+            new_markdown_cell(source, metadata={"label": label} if label else {})
+            for source, label in cells
+        ],
+        metadata={"language": "en"}
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nbformat.write(nb, path)
+
+
+def make_book(dir_: Path) -> Path:
+    dir_book = dir_ / "book"
+    write_chapter(
+        dir_book / "01-intro.ipynb",
+        ("# Introduction", {"sec": "intro"}),
+        ("## Scope", {"sec": "scope"}),
+        ("Methods are in section ^[](sec:methods).", {}),
+    )
+    write_chapter(
+        dir_book / "part" / "02-methods.ipynb",
+        ("# Methods", {"sec": "methods"}),
+        ("As scoped in section ^[](sec:scope), and ^[](sec:methods).", {}),
+        ("Unbound: ^[](sec:nowhere).", {}),
+    )
+    write_chapter(
+        dir_book / "03-results.ipynb",
+        ("# Results", {"sec": "results"}),
+        ("Nothing cited across chapters here.", {}),
+    )
+    return dir_book
+
+
+def links(path: Path) -> List[str]:
+    return re.findall(r'href="([^"]*)"', path.read_text(encoding="utf-8"))
+
+
+def touch(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_book_links_across_chapters(tmp_path):
+    dir_book = make_book(tmp_path)
+    dir_output = tmp_path / "html"
+    report = export_book([dir_book], dir_output, processes=0)
+    assert not report.failures
+    assert (report.chapters, report.scanned, len(report.conversions)) == (3, 3, 3)
+    assert "part/02-methods.html#sec-methods" in links(dir_output / "01-intro.html")
+    methods = dir_output / "part" / "02-methods.html"
+    assert "../01-intro.html#sec-scope" in links(methods)
+    assert "#sec-methods" in links(methods)
+    assert "#sec-nowhere" in links(methods)
+    assert ">1.1<" in methods.read_text(encoding="utf-8")
+    index = IndexBook.load(dir_output / NAME_INDEX)
+    assert index.chapters[str(dir_book / "01-intro.ipynb")].resolved == {
+        "sec:methods": ["part/02-methods.html", "1"]
+    }
+
+
+def test_book_rebuilds_only_affected_chapters(tmp_path):
+    dir_book = make_book(tmp_path)
+    dir_output = tmp_path / "html"
+    export_book([dir_book], dir_output, processes=0)
+
+    report = export_book([dir_book], dir_output, processes=0)
+    assert (report.scanned, len(report.conversions)) == (0, 0)
+    assert "3 up to date" in report.summary()
+
+    # Same contents: scanned again, but not converted.
+    touch(dir_book / "03-results.ipynb")
+    report = export_book([dir_book], dir_output, processes=0)
+    assert (report.scanned, len(report.conversions)) == (1, 0)
+
+    # Renumbers the section cited by the methods chapter.
+    write_chapter(
+        dir_book / "01-intro.ipynb",
+        ("# Introduction", {"sec": "intro"}),
+        ("## Background", {"sec": "background"}),
+        ("## Scope", {"sec": "scope"}),
+        ("Methods are in section ^[](sec:methods).", {}),
+    )
+    report = export_book([dir_book], dir_output, processes=0)
+    assert sorted(c.source.name for c in report.conversions) == [
+        "01-intro.ipynb",
+        "02-methods.ipynb"
+    ]
+    assert ">1.2<" in (dir_output / "part" / "02-methods.html").read_text(
+        encoding="utf-8"
+    )
+
+
+def test_book_pool_and_failures(tmp_path):
+    dir_book = make_book(tmp_path)
+    (dir_book / "04-broken.ipynb").write_text("{ not JSON", encoding="utf-8")
+    dir_output = tmp_path / "html"
+    report = export_book([dir_book], dir_output, processes=2)
+    assert [f.source.name for f in report.failures] == ["04-broken.ipynb"]
+    assert "part/02-methods.html#sec-methods" in links(dir_output / "01-intro.html")
+    report = export_book([dir_book], dir_output, processes=2)
+    assert [c.source.name for c in report.conversions] == ["04-broken.ipynb"]
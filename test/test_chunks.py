@@ -0,0 +1,79 @@
+import json
+from nbformat.v4 import new_markdown_cell, new_notebook
+import re
+from traitlets.config import Config
+from typing import *
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.chunks import split_document
+
+
+def notebook_sections():
+    return new_notebook(
+        cells=[
+            new_markdown_cell("Before any section, see ^[](sec:methods)."),
+            new_markdown_cell("# Introduction", metadata={"label": {"sec": "intro"}}),
+            new_markdown_cell("## Scope", metadata={"label": {"sec": "scope"}}),
+            new_markdown_cell(
+                "Methods follow in section ^[](sec:methods)^[](note:aside)."
+            ),
+            new_markdown_cell("An aside.", metadata={"label": {"note": "aside"}}),
+            new_markdown_cell("# Methods", metadata={"label": {"sec": "methods"}}),
+            new_markdown_cell("As scoped in section ^[](sec:scope)."),
+        ],
+        metadata={"language": "en"}
+    )
+
+
+def export(**config: Any) -> Tuple[str, Dict]:
+    exporter = ArticleHTMLExporter(config=Config({"ArticleHTMLExporter": config}))
+    return exporter.from_notebook_node(notebook_sections(), {"unique_key": "report"})
+
+
+def chunk_html(script: bytes) -> str:
+    m = re.fullmatch(r"articleHtmlChunk\(\d+, (.*)\);\n", script.decode("utf-8"), re.S)
+    assert m is not None
+    return json.loads(m[1])
+
+
+def test_chunks_split_at_top_sections():
+    html, resources = export(chunk_level=1)
+    assert resources["chunks"]["chunks"] == 2
+    assert sorted(resources["outputs"]) == [
+        "report_chunks/0000.js",
+        "report_chunks/0001.js"
+    ]
+    intro = chunk_html(resources["outputs"]["report_chunks/0000.js"])
+    methods = chunk_html(resources["outputs"]["report_chunks/0001.js"])
+    assert 'name="sec-intro"' in intro and 'name="sec-scope"' in intro
+    assert 'href="#sec-methods"' in intro
+    assert 'name="sec-methods"' in methods and 'href="#sec-scope"' in methods
+
+    assert html.count('<section class="article-html-chunk"') == 2
+    assert "Before any section" in html
+    assert "Introduction" not in html
+    assert "<template" not in html + intro + methods
+    anchors = json.loads(
+        re.search(r'id="article-html-anchors">(.*?)</script>', html)[1]
+    )
+    assert anchors["sec-intro"] == anchors["sec-scope"] == 0
+    assert anchors["sec-methods"] == 1
+    # Notes stay in the index page, where every chunk's links find them.
+    assert 'name="note-aside"' in html
+    assert 'href="#note-aside"' in intro
+
+
+def test_chunks_split_at_subsections():
+    _, resources = export(chunk_level=2)
+    assert resources["chunks"]["chunks"] == 3
+
+
+def test_chunks_off_by_default():
+    html, resources = export()
+    assert "chunks" not in resources
+    assert "article-html-chunk" not in html
+
+
+def test_split_without_sections():
+    html = "<html><body><p>Text</p></body></html>"
+    assert split_document(html, "doc_chunks") == (html, [])
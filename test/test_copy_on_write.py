@@ -0,0 +1,39 @@
+from copy import deepcopy
+import nbformat
+from pathlib import Path
+from typing import *
+
+from nbconvert_article_html import (
+    CollectorLabels,
+    copy_cell,
+    RendererAnnotations,
+    SolverReferences
+)
+
+
+def read_notebook(name: str) -> nbformat.NotebookNode:
+    return nbformat.read(Path(__file__).parent / "notebooks" / name, as_version=4)
+
+
+def test_copy_cell_shares_values():
+    cell = nbformat.v4.new_markdown_cell("Text", metadata={"tags": ["a"]})
+    cell["attachments"] = {"x.png": {"image/png": "AAAA"}}
+    copy = copy_cell(cell)
+    assert "id" not in copy
+    assert copy.attachments is cell.attachments
+    assert copy.metadata is not cell.metadata
+    assert copy.metadata == cell.metadata
+
+
+def test_preprocessors_leave_original_untouched():
+    nb = read_notebook("annotations-common.ipynb")
+    cells = list(nb.cells)
+    cells_original = deepcopy(cells)
+    resources: Dict = {"language": "en"}
+    nb, resources = CollectorLabels().preprocess(nb, resources)
+    nb, resources = SolverReferences().preprocess(nb, resources)
+    for cell, cell_solved in zip(cells, nb.cells):
+        assert (cell is cell_solved) == ("^[" not in cell.source)
+    nb_new, resources = RendererAnnotations().preprocess(nb, resources)
+    assert nb_new.metadata is nb.metadata
+    assert cells == cells_original
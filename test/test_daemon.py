@@ -0,0 +1,148 @@
+from pathlib import Path
+import threading
+import time
+
+import pytest
+
+from nbconvert_article_html.daemon import connect, Daemon, Overloaded, request
+
+
+PATH_NOTEBOOK = Path(__file__).parent / "notebooks" / "references-notes.ipynb"
+
+
+def serve(daemon, **kwargs):
+    server = daemon.server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_daemon_http():
+    daemon = Daemon(processes=0)
+    server = serve(daemon, port=0)
+    try:
+        address = f"127.0.0.1:{server.server_address[1]}"
+        html = request(address, PATH_NOTEBOOK.read_bytes())
+        assert "note-link-external" in html
+        with pytest.raises(RuntimeError, match="422"):
+            request(address, b"{ this is not JSON")
+        connection = connect(address)
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        assert response.status == 200
+        metrics = response.read().decode("utf-8")
+        assert '"ok": 1' in metrics
+        assert '"failed": 1' in metrics
+        assert '"p50"' in metrics
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+
+
+def test_daemon_unix_socket(tmp_path):
+    daemon = Daemon(processes=1)
+    path_socket = tmp_path / "daemon.sock"
+    server = serve(daemon, path_socket=path_socket)
+    try:
+        html = request(str(path_socket), PATH_NOTEBOOK.read_bytes())
+        assert "note-link-external" in html
+        assert daemon.report()["requests"]["ok"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
+
+
+def test_daemon_unix_socket_replaces_only_sockets(tmp_path):
+    daemon = Daemon(processes=0)
+    path_file = tmp_path / "daemon.sock"
+    path_file.write_text("precious")
+    try:
+        with pytest.raises(FileExistsError, match="not a socket"):
+            daemon.server(path_socket=path_file)
+        assert path_file.read_text() == "precious"
+        path_stale = tmp_path / "stale.sock"
+        daemon.server(path_socket=path_stale).server_close()
+        assert path_stale.is_socket()
+        server = serve(daemon, path_socket=path_stale)
+        try:
+            html = request(str(path_stale), PATH_NOTEBOOK.read_bytes())
+            assert "note-link-external" in html
+        finally:
+            server.shutdown()
+            server.server_close()
+    finally:
+        daemon.close()
+
+
+def test_daemon_queue_full_and_timeout(monkeypatch):
+    daemon = Daemon(processes=0, max_queue=0, timeout=0.2)
+    release = threading.Event()
+    monkeypatch.setattr(
+        "nbconvert_article_html.batch.export_in_worker",
+        lambda notebook: (release.wait(5.0), ("", {}, 0.0))[1]
+    )
+    try:
+        blocked = threading.Thread(
+            target=lambda: pytest.raises(Exception, daemon.convert, b"")
+        )
+        blocked.start()
+        while daemon.pending == 0:
+            time.sleep(0.01)
+        with pytest.raises(Overloaded):
+            daemon.convert(b"")
+        blocked.join()
+        counts = daemon.report()["requests"]
+        assert counts["rejected"] == 1
+        assert counts["timeout"] == 1
+    finally:
+        release.set()
+        daemon.close()
+
+
+def test_daemon_timeout_withdraws_queued_and_holds_running(monkeypatch):
+    daemon = Daemon(processes=0, max_queue=1, timeout=0.2)
+    release = threading.Event()
+    started = []
+
+    def export(notebook):
+        started.append(notebook)
+        release.wait(5.0)
+        return "", {}, 0.0
+
+    monkeypatch.setattr("nbconvert_article_html.batch.export_in_worker", export)
+    try:
+        running = threading.Thread(
+            target=lambda: pytest.raises(TimeoutError, daemon.convert, b"running")
+        )
+        running.start()
+        while not started:
+            time.sleep(0.01)
+        with pytest.raises(TimeoutError):
+            daemon.convert(b"queued")
+        running.join()
+        # The queued conversion was withdrawn, but the running one keeps its place.
+        assert daemon.pending == 1
+        release.set()
+        while daemon.pending > 0:
+            time.sleep(0.01)
+        assert started == [b"running"]
+        assert daemon.convert(b"next") == ""
+    finally:
+        release.set()
+        daemon.close()
+
+
+def test_daemon_bad_content_length():
+    daemon = Daemon(processes=0)
+    server = serve(daemon, port=0)
+    try:
+        connection = connect(f"127.0.0.1:{server.server_address[1]}")
+        connection.putrequest("POST", "/convert")
+        connection.putheader("Content-Length", "many")
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close()
@@ -0,0 +1,81 @@
+from pathlib import Path
+import pytest
+from typing import *
+
+import nbconvert_article_html.exporter as nah
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.markup import _deparagraphize_soup, deparagraphize
+
+
+DIR_NOTEBOOKS = Path(__file__).parent / "notebooks"
+
+
+def notes_rendered(monkeypatch, name: str) -> List[str]:
+    sources = []
+
+    def recording(source):
+        sources.append(source)
+        return deparagraphize(source)
+
+    monkeypatch.setattr(nah, "deparagraphize", recording)
+    ArticleHTMLExporter().from_filename(str(DIR_NOTEBOOKS / name))
+    return sources
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["references-notes.ipynb", "annotations-common.ipynb"]
+)
+def test_notes_notebooks_same_as_soup(monkeypatch, name):
+    sources = notes_rendered(monkeypatch, name)
+    assert sources
+    for source in sources:
+        assert deparagraphize(source) == _deparagraphize_soup(source)
+
+
+@pytest.mark.parametrize(
+    "markdown",
+    [
+        "Plain note.",
+        "Note with *emphasis*, **strength** and `code <tag>`.",
+        "Note with [a link](http://x.y?a=1&b=2).",
+        "Quotes \"double\" and 'single', R&D, a < b > c, & so on.",
+        "![Image](a.png \"Title's\")",
+        "First paragraph.\n\nSecond paragraph.",
+        "- Item\n- List",
+        "Math $x < y$ and HTML <span class=\"a  b\">span</span>.",
+        "Line<br>break and <abbr title='say \"hi\"'>abbr</abbr>.",
+        "Entities &mdash; &copy; &#169; &#x00e9; &nbsp; &unknown; &amp",
+        "Unbalanced <em>emphasis.",
+        "<!-- comment --> with <b><!-- nested --></b>",
+        "",
+    ]
+)
+def test_markdown_same_as_soup(markdown):
+    source = ArticleHTMLExporter().markdown2html({}, markdown)
+    assert deparagraphize(source) == _deparagraphize_soup(source)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "no paragraph",
+        "<div><p>in div</p></div>",
+        "<P>UP<BR></P>",
+        "<p>unclosed <em>em</p>",
+        "<p>open",
+        "<p><span>a<p>b</p></span></p>",
+        "<p>a</br>b</p>",
+        "<p><b>x</i></b></p>",
+        "<p>t<script>a<b</script></p>",
+        "<p><a x=\"1\" x=\"2\">t</a><input disabled></p>",
+        "<p>a &#0; &#xD800; b</p>",
+        "<p><span/>x</p>",
+        "<!DOCTYPE html><p>x</p>",
+        "<p>a<em>x</em>  <em>x</em></p>",
+        "<p>a<em>x</em>\n \n<em>x</em>\t</p>",
+        "<p>a<!--c-->  \xa0<span>\t</span><pre> <b>x</b>  </pre></p>",
+    ]
+)
+def test_markup_same_as_soup(source):
+    assert deparagraphize(source) == _deparagraphize_soup(source)
@@ -0,0 +1,49 @@
+import io
+from nbformat.v4 import new_code_cell, new_notebook
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+
+
+def notebook_code(*sources: str, language: str = "python"):
+    return new_notebook(
+        cells=[new_code_cell(source) for source in sources],
+        metadata={"language_info": {"name": language}}
+    )
+
+
+def test_highlight_cached_across_exports():
+    nb = notebook_code("x = 1", "print(x)", "x = 1")
+    exporter = ArticleHTMLExporter()
+    html_first, resources = exporter.from_notebook_node(nb)
+    assert resources["highlight_cache"]["highlight_code"] == {"hits": 1, "misses": 2}
+    html_second, resources = exporter.from_notebook_node(nb)
+    assert resources["highlight_cache"]["highlight_code"] == {"hits": 3, "misses": 0}
+    assert resources["highlight_cache"]["clean_html"]["misses"] == 0
+    assert html_first == html_second
+
+
+def test_highlight_keyed_by_lexer():
+    exporter = ArticleHTMLExporter()
+    exporter.from_notebook_node(notebook_code("x = 1"))
+    _, resources = exporter.from_notebook_node(notebook_code("x = 1", language="R"))
+    assert resources["highlight_cache"]["highlight_code"] == {"hits": 0, "misses": 1}
+
+
+def test_highlight_cache_on_disk(tmp_path):
+    c = Config()
+    c.ArticleHTMLExporter.render_cache_dir = str(tmp_path / "cache")
+    nb = notebook_code("import os", "os.getcwd()")
+    html_first, _ = ArticleHTMLExporter(config=c).from_notebook_node(nb)
+    assert list((tmp_path / "cache" / "highlight").glob("*/*.txt"))
+    html_second, resources = ArticleHTMLExporter(config=c).from_notebook_node(nb)
+    assert resources["highlight_cache"]["highlight_code"] == {"hits": 2, "misses": 0}
+    assert html_first == html_second
+    assert html_first == ArticleHTMLExporter().from_notebook_node(nb)[0]
+
+
+def test_highlight_cache_streamed():
+    nb = notebook_code("x = 1", "x = 1")
+    exporter = ArticleHTMLExporter()
+    resources = exporter.stream_from_notebook_node(nb, io.StringIO())
+    assert resources["highlight_cache"]["highlight_code"] == {"hits": 1, "misses": 1}
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from typing import *
+
+import nbconvert_article_html
+
+
+# Cumulative import time of the package alone, in microseconds, as reported by
+# python -X importtime. Importing nbconvert takes several hundred milliseconds.
+BUDGET_IMPORT = 50_000
+HEAVY = ["bs4", "jinja2", "mistune", "nbconvert", "nbformat", "traitlets"]
+
+
+def import_fresh(statement: str) -> Tuple[List[str], Dict[str, int]]:
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"{statement}; import sys; print(' '.join(sys.modules))"
+        ],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    cumulative = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, us_cumulative, name = line.split("|")
+            if us_cumulative.strip().isdigit():
+                cumulative[name.strip()] = int(us_cumulative)
+    return process.stdout.split(), cumulative
+
+
+def test_import_defers_heavy_dependencies():
+    modules, cumulative = import_fresh("import nbconvert_article_html")
+    assert not set(HEAVY) & set(modules)
+    assert cumulative["nbconvert_article_html"] < BUDGET_IMPORT
+
+
+def test_names_resolve_on_first_use():
+    modules, _ = import_fresh(
+        "from nbconvert_article_html import ArticleHTMLExporter"
+    )
+    assert "nbconvert" in modules
+    assert "nbconvert_article_html.exporter" in modules
+
+
+def test_exports_every_name():
+    for name in nbconvert_article_html.__all__:
+        assert getattr(nbconvert_article_html, name) is not None
+    assert set(nbconvert_article_html.__all__) <= set(dir(nbconvert_article_html))
+
+
+def test_annotators_resolve_against_package():
+    from nbconvert_article_html.preprocessors import _get_annotator
+    assert _get_annotator("fig") is nbconvert_article_html.legend
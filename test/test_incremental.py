@@ -0,0 +1,90 @@
+from copy import deepcopy
+import nbformat
+from pathlib import Path
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.incremental import (
+    IncrementalArticleHTMLExporter,
+    StateIncremental
+)
+
+from . import RX_ID_CELL, strip_ids
+
+
+def read_notebook(name: str) -> nbformat.NotebookNode:
+    return nbformat.read(Path(__file__).parent / "notebooks" / name, as_version=4)
+
+
+def export_full(nb: nbformat.NotebookNode) -> str:
+    return strip_ids(ArticleHTMLExporter().from_notebook_node(nb)[0], nb)
+
+
+def test_incremental_reuses_unchanged_cells():
+    nb = read_notebook("annotations-common.ipynb")
+    exporter = IncrementalArticleHTMLExporter()
+    html, resources = exporter.from_notebook_node(nb)
+    assert resources["incremental"]["reused"] == 0
+    assert strip_ids(html, nb) == export_full(nb)
+    assert "article-html-cell" not in html
+
+    nb_edited = deepcopy(nb)
+    nb_edited.cells[2].source = "Let's remember^[](note:forgetting) our families."
+    html, resources = exporter.from_notebook_node(nb_edited)
+    assert resources["incremental"]["rendered"] == 1
+    assert resources["incremental"]["reused"] > 0
+    assert strip_ids(html, nb_edited) == export_full(nb_edited)
+
+
+def test_incremental_renumbering():
+    nb = read_notebook("references-simple.ipynb")
+    exporter = IncrementalArticleHTMLExporter()
+    exporter.from_notebook_node(nb)
+
+    nb_edited = deepcopy(nb)
+    i = next(
+        i for i, cell in enumerate(nb_edited.cells)
+        if "eq" in cell.metadata.get("label", {})
+    )
+    nb_edited.cells.insert(
+        i,
+        nbformat.v4.new_markdown_cell(
+            "$$e = mc^2$$",
+            metadata={"label": {"eq": "einstein"}}
+        )
+    )
+    html, resources = exporter.from_notebook_node(nb_edited)
+    assert "eq:quadratic" in resources["incremental"]["renumbered"]
+    assert resources["incremental"]["affected"]
+    assert strip_ids(html, nb_edited) == export_full(nb_edited)
+
+
+def test_incremental_state_persists(tmp_path):
+    nb = read_notebook("annotations-common.ipynb")
+    exporter = IncrementalArticleHTMLExporter()
+    exporter.from_notebook_node(nb)
+    exporter.state.save(tmp_path / "state.json")
+
+    exporter_new = IncrementalArticleHTMLExporter()
+    exporter_new.state = StateIncremental.load(tmp_path / "state.json")
+    _, resources = exporter_new.from_notebook_node(nb)
+    assert resources["incremental"]["rendered"] == 0
+
+
+def test_incremental_keeps_ids_of_cells_alike():
+    nb = nbformat.v4.new_notebook(
+        cells=[
+            nbformat.v4.new_code_cell("x = 1", id="aaa"),
+            nbformat.v4.new_markdown_cell("Between.", id="bbb"),
+            nbformat.v4.new_code_cell("x = 1", id="ccc"),
+        ],
+        metadata={"language": "en"}
+    )
+    html_full, _ = ArticleHTMLExporter().from_notebook_node(nb)
+    ids_full = RX_ID_CELL.findall(html_full)
+    assert ids_full == ["aaa", "bbb", "ccc"]
+    exporter = IncrementalArticleHTMLExporter()
+    for num_reused in [0, 3]:
+        html, resources = exporter.from_notebook_node(nb)
+        assert resources["incremental"]["reused"] == num_reused
+        assert RX_ID_CELL.findall(html) == ids_full
+        assert html == html_full
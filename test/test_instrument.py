@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+import pstats
+import pytest
+import sys
+from traitlets.config import Config
+import tracemalloc
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.instrument import Timings
+
+
+PATH_NOTEBOOK = str(Path(__file__).parent / "notebooks" / "annotations-common.ipynb")
+
+
+def export(**settings) -> dict:
+    c = Config()
+    for name, value in settings.items():
+        setattr(c.ArticleHTMLExporter, name, value)
+    return ArticleHTMLExporter(config=c).from_filename(PATH_NOTEBOOK)[1]
+
+
+def test_no_instrumentation_by_default():
+    assert "timings" not in export()
+
+
+def test_instrument_stages():
+    timings = export(instrument=True, instrument_memory=True)["timings"]
+    for name in [
+        "export",
+        "template",
+        "preprocessor:CollectorLabels",
+        "preprocessor:SolverReferences",
+        "preprocessor:RendererAnnotations",
+        "annotator:cut",
+        "annotator:legend",
+        "annotator:margin",
+        "annotator:number",
+        "filter:markdown2html",
+        "filter:deparagraphize"
+    ]:
+        assert name in timings
+        assert timings[name]["calls"] > 0
+        assert timings[name]["seconds"] >= 0.0
+    assert timings["annotator:number"]["calls"] == 3
+    assert timings["export"]["bytes"] != 0
+    assert timings["export"]["seconds"] >= timings["template"]["seconds"]
+
+
+def test_profile_chrome_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    resources = export(profile_output=str(path))
+    trace = json.loads(path.read_text())
+    names = {event["name"] for event in trace["traceEvents"]}
+    assert "export" in names
+    assert "annotator:legend" in names
+    assert "timings" in resources
+
+
+def test_profile_cprofile(tmp_path):
+    path = tmp_path / "export.prof"
+    export(profile_output=str(path))
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason="No tracemalloc.reset_peak")
+def test_memory_allocated_though_freed():
+    size = 10 * 2 ** 20
+    timings = Timings(memory=True)
+    tracemalloc.start()
+    try:
+        with timings.stage("outer"):
+            with timings.stage("before"):
+                pass
+            with timings.stage("inner"):
+                buffer = bytearray(size)
+                del buffer
+            with timings.stage("after"):
+                pass
+    finally:
+        tracemalloc.stop()
+    assert timings["inner"]["bytes"] >= size
+    assert timings["outer"]["bytes"] >= size
+    assert timings["after"]["bytes"] < size
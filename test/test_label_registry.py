@@ -0,0 +1,75 @@
+import nbformat
+from pathlib import Path
+import pytest
+from typing import *
+
+from nbconvert_article_html import (
+    CollectorLabels,
+    LabelRegistry,
+    NUM_LEVELS_COUNTER_HIERARCHY,
+    REFERABLE,
+    SolverReferences
+)
+
+
+DIR_NOTEBOOKS = Path(__file__).parent / "notebooks"
+
+
+def registry() -> LabelRegistry:
+    return LabelRegistry(REFERABLE, NUM_LEVELS_COUNTER_HIERARCHY)
+
+
+def test_registry_numbers_hierarchically():
+    labels = registry()
+    for unique, source in [("a", "# A"), ("b", "## B"), ("c", "## C"), ("d", "# D")]:
+        labels.add("sec", unique, labels.level("sec", source))
+    labels.add("fig", "x", labels.level("fig", "Anything"))
+    assert labels == {
+        "sec": {"a": "1", "b": "1.1", "c": "1.2", "d": "2"},
+        "fig": {"x": "1"}
+    }
+    assert labels.vector("sec", "c") == (1, 2)
+    assert labels.number("sec", "nope", "??") == "??"
+    assert labels.number("nope", "a") == ""
+    assert labels.level("sec", "No heading") is None
+
+
+def test_registry_formats_lazily():
+    labels = registry()
+    labels.add("eq", "e")
+    slots = labels["eq"]
+    assert slots.numbers == {}
+    assert labels.number("eq", "e") == "1"
+    assert slots.numbers == {0: "1"}
+
+
+def test_registry_invalid_hierarchy():
+    labels = LabelRegistry({"sec": {"hierarchy": r"^#+"}}, 3)
+    with pytest.raises(ValueError):
+        labels.level("sec", "# Heading")
+
+
+def test_registry_reverse_lookups():
+    nb = nbformat.read(DIR_NOTEBOOKS / "references-simple.ipynb", as_version=4)
+    resources: Dict = {}
+    nb, resources = CollectorLabels().preprocess(nb, resources)
+    nb, resources = SolverReferences().preprocess(nb, resources)
+    labels = resources["labels"]
+    assert isinstance(labels, LabelRegistry)
+    assert labels.cell("eq", "exponential") == 3
+    assert labels.citing("eq", "exponential") == [4]
+    assert labels.citing("eq", "quadratic") == [4]
+    assert labels.citing("eq", "nope") == []
+
+
+def test_registry_citing_kept_up_to_date():
+    labels = LabelRegistry({}, 3)
+    labels.add("eq", "e", index=0)
+    citing = labels.citing("eq", "e")
+    labels.cite("eq", "e", 2)
+    labels.cite("eq", "e", 2)
+    labels.cite("eq", "e", 5)
+    labels.cite("eq", "unbound", 5)
+    assert citing == [2, 5]
+    assert labels.citing("eq", "e") is citing
+    assert labels.citing("eq", "unbound") == []
@@ -0,0 +1,124 @@
+import base64
+import io
+import json
+import nbformat
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_output
+from pathlib import Path
+import pytest
+import random
+import re
+from traitlets.config import Config
+from typing import *
+
+from benchmark.synthetic import random_bytes
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.lazy import _elide, Payloads, PREFIX_MARKER, read_lazy
+
+from . import strip_ids
+
+
+DIR_NOTEBOOKS = Path(__file__).parent / "notebooks"
+
+
+def notebook_large_images() -> nbformat.NotebookNode:
+    rng = random.Random(0)
+    nb = nbformat.read(DIR_NOTEBOOKS / "annotations-common.ipynb", as_version=4)
+    for size in [10, 3000, 20000]:
+        data = {
+            "image/png": base64.b64encode(random_bytes(rng, size)).decode(),
+            "image/jpeg": base64.encodebytes(random_bytes(rng, size)).decode(),
+            "text/plain": "<Figure>"
+        }
+        nb.cells.append(
+            new_code_cell("plot()", outputs=[new_output("display_data", data=data)])
+        )
+    # Looks like an image payload, but is part of the source of a cell.
+    nb.cells.append(new_markdown_cell('Not a payload: \\"image/png": "' + "A" * 5000))
+    return nb
+
+
+@pytest.fixture
+def path_notebook(tmp_path: Path) -> Path:
+    path = tmp_path / "large.ipynb"
+    nbformat.write(notebook_large_images(), path)
+    return path
+
+
+def exporter(**config: Any) -> ArticleHTMLExporter:
+    return ArticleHTMLExporter(config=Config({"ArticleHTMLExporter": config}))
+
+
+@pytest.mark.parametrize("size_chunk", [7, 100, 2 ** 20])
+def test_elide_leaves_large_payloads(path_notebook, size_chunk):
+    raw = path_notebook.read_bytes()
+    payloads = Payloads(io.BytesIO(raw))
+    skeleton = _elide(io.BytesIO(raw), payloads, 1000, size_chunk)
+    assert len(payloads.spans) == 4
+    assert len(skeleton) < len(raw) - 4 * 3000
+    nb = json.loads(skeleton)
+    original = json.loads(raw)
+    for cell, cell_original in zip(nb["cells"], original["cells"]):
+        for output, output_original in zip(
+            cell.get("outputs", []),
+            cell_original.get("outputs", [])
+        ):
+            data = {k: payloads.resolve(v) for k, v in output["data"].items()}
+            assert data == output_original["data"]
+        if cell["cell_type"] == "markdown":
+            assert cell["source"] == cell_original["source"]
+
+
+def test_read_lazy_keeps_small_payloads(path_notebook):
+    nb, payloads = read_lazy(str(path_notebook), threshold=50000)
+    assert not payloads.spans
+    assert nb == nbformat.read(path_notebook, as_version=4)
+
+
+@pytest.mark.parametrize("size", [1, 7, 40, 10000])
+def test_payloads_feed_splices_across_chunks(path_notebook, size):
+    nb, payloads = read_lazy(str(path_notebook), threshold=1000)
+    text = json.dumps(nb)
+    assert PREFIX_MARKER in text
+    fed = "".join(
+        "".join(payloads.feed(text[i:i + size])) for i in range(0, len(text), size)
+    ) + payloads.flush()
+    payloads.close()
+    assert fed == payloads.splice(text)
+    assert PREFIX_MARKER not in fed
+
+
+def test_low_memory_same_as_normal(path_notebook):
+    html, _ = exporter().from_filename(str(path_notebook))
+    html_lazy, resources = exporter(
+        low_memory=True,
+        low_memory_threshold=1000
+    ).from_filename(str(path_notebook))
+    assert "payloads" not in resources
+    assert PREFIX_MARKER not in html_lazy
+    nb = nbformat.read(path_notebook, as_version=4)
+    assert strip_ids(html_lazy, nb) == strip_ids(html, nb)
+
+
+def test_low_memory_stream_same_as_normal(path_notebook):
+    html, _ = exporter().from_filename(str(path_notebook))
+    sink = io.StringIO()
+    exporter(low_memory=True, low_memory_threshold=1000).stream_from_filename(
+        str(path_notebook),
+        sink
+    )
+    streamed = sink.getvalue()
+    assert PREFIX_MARKER not in streamed
+    images = re.findall(r'src="(data:[^"]*)"', streamed)
+    assert images == re.findall(r'src="(data:[^"]*)"', html)
+
+
+def test_low_memory_assets_stored(path_notebook):
+    config = {"assets_dir": "assets", "assets_inline_max": 100}
+    _, resources = exporter(**config).from_filename(str(path_notebook))
+    _, resources_lazy = exporter(
+        low_memory=True,
+        low_memory_threshold=1000,
+        **config
+    ).from_filename(str(path_notebook))
+    assert resources_lazy["outputs"] == resources["outputs"]
+    assert resources_lazy["assets"] == resources["assets"]
@@ -0,0 +1,93 @@
+import nbformat
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_notebook, new_output
+import pytest
+from traitlets.config import Config
+from typing import *
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.cache import CacheFragments
+from nbconvert_article_html.mathml import finish_document, MARK_PENDING, RendererMath
+
+
+pytest.importorskip("latex2mathml")
+
+
+def notebook_math(*extra: str) -> nbformat.NotebookNode:
+    return new_notebook(
+        cells=[
+            new_markdown_cell(
+                "Inline $a<b$, displayed $$\\frac{1}{2}$$, price \\$5, `$code$`."
+            ),
+            new_markdown_cell("$$E = mc^2$$", metadata={"label": {"eq": "energy"}}),
+            new_markdown_cell("See equation ^[](eq:energy)."),
+            new_code_cell(
+                "show()",
+                outputs=[new_output("display_data", data={"text/latex": "$\\alpha$"})]
+            ),
+            *[new_markdown_cell(source) for source in extra]
+        ],
+        metadata={"language": "en"}
+    )
+
+
+def export(nb: nbformat.NotebookNode, **config: Any) -> Tuple[str, Dict]:
+    exporter = ArticleHTMLExporter(
+        config=Config({"ArticleHTMLExporter": {"math_prerender": True, **config}})
+    )
+    return exporter.from_notebook_node(nb)
+
+
+def test_math_typeset_without_mathjax():
+    html, resources = export(notebook_math())
+    assert resources["math"] == {"typeset": 4, "pending": 0, "mathjax": False}
+    assert "MathJax" not in html
+    assert "article-html-math" not in html
+    assert "<mfrac>" in html
+    assert '<div class="annotated-main"><math display="block"' in html
+    assert "price $5" in html
+    assert "<code>$code$</code>" in html
+
+
+def test_math_left_to_mathjax_by_default():
+    html, resources = ArticleHTMLExporter().from_notebook_node(notebook_math())
+    assert "math" not in resources
+    assert "MathJax" in html
+    assert "<math" not in html
+
+
+def test_math_untypesettable_keeps_mathjax():
+    html, resources = export(notebook_math("Unknown $\\frobnicate{x}$ command."))
+    assert resources["math"] == {"typeset": 4, "pending": 1, "mathjax": True}
+    assert "MathJax" in html
+    assert "$\\frobnicate{x}$" in html
+    assert MARK_PENDING not in html
+
+
+def test_math_cached():
+    cache = CacheFragments()
+    renderer = RendererMath(cache)
+    mathml = renderer.render("x^2", False)
+    assert mathml is not None and "<msup>" in mathml
+    misses = cache.misses
+    assert renderer.render("x^2", False) == mathml
+    assert cache.misses == misses
+    assert renderer.render("x^2", True) != mathml
+
+
+def test_math_render_html_skips_verbatim():
+    renderer = RendererMath()
+    html = renderer.render_html("<p>$x$</p><pre>$y$</pre><code>\\(z\\)</code>")
+    assert html.startswith('<p><math xmlns="http://www.w3.org/1998/Math/MathML"')
+    assert html.endswith("<pre>$y$</pre><code>\\(z\\)</code>")
+
+
+def test_finish_document():
+    head = (
+        "<!--article-html-mathjax--><script>MathJax</script>"
+        "<!--/article-html-mathjax-->"
+    )
+    assert finish_document(f"{head}<math></math>") == ("<math></math>", 0)
+    assert finish_document(f"{head}{MARK_PENDING}$x$") == (
+        "<script>MathJax</script>$x$",
+        1
+    )
@@ -0,0 +1,80 @@
+import gzip
+import nbformat
+from pathlib import Path
+import re
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.minify import (
+    minify_css,
+    minify_html,
+    prune_css,
+    usage_document
+)
+
+from . import strip_ids
+
+
+PATH_NOTEBOOK = Path(__file__).parent / "notebooks" / "references-notes.ipynb"
+
+
+def test_minify_css():
+    css = """
+    /* Comment */
+    a :hover , b > c { color : red ; background: url("x y.png") ; }
+    @media (max-width: 10px) { .x { margin : 0 } }
+    .z:not(.q) { width: calc(1px + 2px); }
+    """
+    assert minify_css(css) == (
+        'a :hover,b>c{color:red;background:url("x y.png")}'
+        "@media (max-width:10px){.x{margin:0}}"
+        ".z:not(.q){width:calc(1px + 2px)}"
+    )
+
+
+def test_prune_css():
+    usage = usage_document(
+        '<div class="y z" id="main"><b><i>x</i></b></div><style>.w{}</style>'
+    )
+    css = (
+        ".w{a:1}.y .z,.w{a:2}#main>b{a:3}#other{a:4}b:not(.w){a:5}u{a:6}"
+        "@media print{.w{a:7}}@media screen{i[title]{a:8}}"
+        "@font-face{font-family:F}.jp-RenderedMermaid{a:9}"
+    )
+    assert prune_css(css, usage) == (
+        ".y .z{a:2}#main>b{a:3}b:not(.w){a:5}@media screen{i[title]{a:8}}"
+        "@font-face{font-family:F}.jp-RenderedMermaid{a:9}",
+        4
+    )
+    assert prune_css(css, usage, re.compile(r"^u$"))[1] == 3
+
+
+def test_minify_html():
+    html = (
+        "<html>\n <body>\n  <!-- Comment -->\n  <p>Hello   <b>you</b>\n there</p>\n"
+        "<pre>  a\n   b</pre>\n <style>\n p { margin: 0 }\n .no { margin: 0 }</style>"
+        "\n</body>\n</html>"
+    )
+    minified, report = minify_html(html)
+    assert minified == (
+        "<html><body><p>Hello <b>you</b>\nthere</p><pre>  a\n   b</pre>"
+        "<style>p{margin:0}</style></body></html>"
+    )
+    assert report.size == len(html)
+    assert report.size_minified == len(minified)
+    assert report.rules_pruned == 1
+
+
+def test_export_minified_compressed():
+    html, _ = ArticleHTMLExporter().from_filename(str(PATH_NOTEBOOK))
+    exporter = ArticleHTMLExporter(minify=True, compress=["gz"])
+    minified, resources = exporter.from_filename(str(PATH_NOTEBOOK))
+    nb = nbformat.read(PATH_NOTEBOOK, as_version=4)
+    assert strip_ids(minified, nb) == strip_ids(minify_html(html)[0], nb)
+    assert gzip.decompress(
+        resources["outputs"]["./references-notes.html.gz"]
+    ) == minified.encode("utf-8")
+    report = resources["minify"]
+    assert report["size"] == len(html.encode("utf-8"))
+    assert report["size_minified"] == len(minified.encode("utf-8"))
+    assert report["size_gz"] < report["size_minified"] < report["size"]
+    assert report["rules_pruned"] > 0
@@ -0,0 +1,101 @@
+import json
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_notebook
+import re
+from traitlets.config import Config
+from typing import *
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.navigation import words
+from nbconvert_article_html.preprocessors import NUM_LEVELS_COUNTER_HIERARCHY
+
+
+def notebook_sections():
+    return new_notebook(
+        cells=[
+            new_markdown_cell("Preamble about *apples*."),
+            new_markdown_cell("# Introduction", metadata={"label": {"sec": "intro"}}),
+            new_markdown_cell("Apples and pears; see ^[](sec:methods)."),
+            new_markdown_cell("## Scope", metadata={"label": {"sec": "scope"}}),
+            new_markdown_cell("Données brutes."),
+            new_markdown_cell("# *Methods*", metadata={"label": {"sec": "methods"}}),
+            new_code_cell("pears = load_pears()"),
+        ],
+        metadata={"language": "en", "title": "Fruit"}
+    )
+
+
+def export(**config: Any) -> Tuple[str, Dict]:
+    exporter = ArticleHTMLExporter(config=Config({"ArticleHTMLExporter": config}))
+    return exporter.from_notebook_node(notebook_sections(), {"unique_key": "fruit"})
+
+
+def sections_holding(search: Dict, word: str) -> List[int]:
+    sections: List[int] = []
+    for delta in search["terms"].get(word, []):
+        sections.append(delta + (sections[-1] if sections else 0))
+    return sections
+
+
+def test_table_of_contents():
+    html, resources = export(table_of_contents=True)
+    assert resources["contents"] == [
+        {"anchor": "sec-intro", "number": "1", "level": 1, "title": "Introduction"},
+        {"anchor": "sec-scope", "number": "1.1", "level": 2, "title": "Scope"},
+        {"anchor": "sec-methods", "number": "2", "level": 1, "title": "*Methods*"},
+    ]
+    assert "search" not in resources
+    assert (
+        '<li class="contents-level-2"><a href="#sec-scope">1.1. Scope</a></li>' in html
+    )
+    assert '<a href="#sec-methods">2. <em>Methods</em></a>' in html
+    assert 'id="article-html-search"' not in html
+    depth = NUM_LEVELS_COUNTER_HIERARCHY
+    assert resources["contents_depth"] == depth
+    assert f"nav.contents .contents-level-{depth} {{" in html
+    assert f"nav.contents .contents-level-{depth + 1} {{" not in html
+
+
+def test_search_index_embedded():
+    html, resources = export(search_index="embedded")
+    search = resources["search"]
+    assert search["sections"] == [
+        ["", "", "Fruit"],
+        ["sec-intro", "1", "Introduction"],
+        ["sec-scope", "1.1", "Scope"],
+        ["sec-methods", "2", "Methods"],
+    ]
+    assert sections_holding(search, "apples") == [0, 1]
+    assert sections_holding(search, "pears") == [1, 3]
+    assert sections_holding(search, "donnees") == [2]
+    assert sections_holding(search, "load_pears") == []
+    assert "sec" not in search["terms"]
+    embedded = re.search(r'id="article-html-search">(.*?)</script>', html)
+    assert embedded is not None and json.loads(embedded[1]) == search
+    assert '<div class="article-html-search" hidden="">' in html
+    assert "contents" not in resources
+
+
+def test_search_index_sidecar():
+    html, resources = export(search_index="sidecar")
+    assert json.loads(resources["outputs"]["./fruit.search.json"]) == (
+        resources["search"]
+    )
+    assert 'id="article-html-search" data-src="fruit.search.json"></script>' in html
+
+
+def test_navigation_off_by_default():
+    html, resources = export()
+    assert "contents" not in resources and "search" not in resources
+    assert '<nav class="contents">' not in html
+    assert 'id="article-html-search"' not in html
+    assert "nav.contents" not in html and ".article-html-search" not in html
+
+
+def test_words():
+    assert list(words("Résumé: 2024 x1 <b>ÉTÉ</b>, a naïve_test")) == [
+        "resume",
+        "x1",
+        "ete",
+        "naive",
+        "test"
+    ]
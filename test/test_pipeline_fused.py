@@ -0,0 +1,46 @@
+import nbformat
+from pathlib import Path
+import pytest
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter, PipelineArticle
+
+from . import strip_ids
+
+
+DIR_ROOT = Path(__file__).parent.parent
+NOTEBOOKS = sorted((DIR_ROOT / "test" / "notebooks").glob("*.ipynb")) + sorted(
+    (DIR_ROOT / "examples").glob("*.ipynb")
+)
+
+
+def test_fused_replaces_template_preprocessors():
+    c = Config()
+    c.ArticleHTMLExporter.fused_pipeline = True
+    names = [
+        type(p).__name__
+        for p in ArticleHTMLExporter(config=c)._preprocessors
+        if p.enabled
+    ]
+    assert "PipelineArticle" in names
+    assert "CollectorLabels" not in names
+    assert names.count("TagRemovePreprocessor") == 1
+
+
+@pytest.mark.parametrize("path", NOTEBOOKS, ids=[p.name for p in NOTEBOOKS])
+def test_fused_identical_to_chain(path):
+    html_chain, resources_chain = ArticleHTMLExporter().from_filename(str(path))
+    c = Config()
+    c.ArticleHTMLExporter.fused_pipeline = True
+    html_fused, resources_fused = ArticleHTMLExporter(config=c).from_filename(
+        str(path)
+    )
+    nb = nbformat.read(path, as_version=4)
+    assert strip_ids(html_fused, nb) == strip_ids(html_chain, nb)
+    for key in ["labels", "cuts", "abstract", "language"]:
+        assert resources_fused.get(key) == resources_chain.get(key)
+
+
+def test_fused_standalone_defaults():
+    assert PipelineArticle().tag_remove is None
+    assert PipelineArticle().labels is not None
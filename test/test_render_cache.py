@@ -0,0 +1,67 @@
+import nbformat
+from pathlib import Path
+from traitlets.config import Config
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.cache import CacheFragments
+
+from . import strip_ids
+
+
+PATH_NOTEBOOK = str(Path(__file__).parent / "notebooks" / "references-notes.ipynb")
+NOTEBOOK = nbformat.read(PATH_NOTEBOOK, as_version=4)
+
+
+def test_cache_memory_hits_on_second_export():
+    exporter = ArticleHTMLExporter()
+    html_first, resources = exporter.from_filename(PATH_NOTEBOOK)
+    assert resources["render_cache"]["hits"] == 0
+    assert resources["render_cache"]["misses"] > 0
+    html_second, resources = exporter.from_filename(PATH_NOTEBOOK)
+    assert resources["render_cache"]["misses"] == 0
+    assert resources["render_cache"]["hits"] > 0
+    assert strip_ids(html_first, NOTEBOOK) == strip_ids(html_second, NOTEBOOK)
+
+
+def test_cache_disk_shared_across_exporters(tmp_path):
+    c = Config()
+    c.ArticleHTMLExporter.render_cache_dir = str(tmp_path / "cache")
+    html_first, _ = ArticleHTMLExporter(config=c).from_filename(PATH_NOTEBOOK)
+    html_second, resources = ArticleHTMLExporter(config=c).from_filename(
+        PATH_NOTEBOOK
+    )
+    assert resources["render_cache"]["misses"] == 0
+    assert strip_ids(html_first, NOTEBOOK) == strip_ids(html_second, NOTEBOOK)
+    assert strip_ids(html_first, NOTEBOOK) == strip_ids(
+        ArticleHTMLExporter().from_filename(PATH_NOTEBOOK)[0],
+        NOTEBOOK
+    )
+
+
+def test_cache_eviction_memory():
+    cache = CacheFragments(size_max_memory=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    assert cache.get("a") == "12345"
+    cache.put("c", "12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+
+
+def test_cache_eviction_disk(tmp_path):
+    cache = CacheFragments(tmp_path, size_max_memory=0, size_max_disk=100)
+    for i in range(10):
+        cache.put(f"{i:02d}key", "x" * 30)
+    sizes = [p.stat().st_size for p in tmp_path.glob("*/*.txt")]
+    assert sum(sizes) <= 100
+    assert cache.get("09key") == "x" * 30
+    assert cache.get("00key") is None
+
+
+def test_cache_disk_overwrite_counted_once(tmp_path):
+    cache = CacheFragments(tmp_path, size_max_memory=0, size_max_disk=1000)
+    for _ in range(10):
+        cache.put("00key", "x" * 30)
+    cache.put("01key", "y" * 30)
+    assert cache._size_disk == 60
+    assert cache.get("00key") == "x" * 30
@@ -68,3 +68,27 @@ def test_references_notes():
             )
         }
     )
+
+
+def test_unbound_references_reported_at_once(caplog):
+    from nbconvert_article_html import CollectorLabels, SolverReferences
+    from nbformat.v4 import new_markdown_cell, new_notebook
+
+    nb = new_notebook(
+        cells=[
+            new_markdown_cell("$$x$$", metadata={"label": {"eq": "x"}}),
+            new_markdown_cell("^[](eq:x), ^[](eq:nope) and ^[](fig:gone)."),
+            new_markdown_cell("Again ^[](eq:nope), and ^[](eq:x)."),
+        ]
+    )
+    nb, resources = CollectorLabels().preprocess(nb, {})
+    nb, resources = SolverReferences().preprocess(nb, resources)
+    assert nb.cells[1].source == (
+        "[1](#eq-x), [??](#eq-nope) and [??](#fig-gone)."
+    )
+    errors = [r.getMessage() for r in caplog.records if r.levelname == "ERROR"]
+    assert errors == [
+        "3 references to 2 unbound labels: `eq:nope' in cells 1, 2; "
+        "`fig:gone' in cells 1"
+    ]
+    assert resources["labels"].citing("eq", "x") == [1, 2]
@@ -0,0 +1,96 @@
+from bs4 import BeautifulSoup
+import io
+import nbformat
+from nbformat.v4 import new_code_cell, new_markdown_cell, new_output
+from pathlib import Path
+import socket
+import threading
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.incremental import IncrementalArticleHTMLExporter
+from nbconvert_article_html.markup import StreamAccessible
+
+from . import strip_ids
+
+
+DIR_NOTEBOOKS = Path(__file__).parent / "notebooks"
+PNG = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="  # noqa
+
+
+def normalized(html: str, nb: nbformat.NotebookNode) -> str:
+    return strip_ids(str(BeautifulSoup(html, features="html.parser")), nb)
+
+
+def notebook_with_image() -> nbformat.NotebookNode:
+    nb = nbformat.read(DIR_NOTEBOOKS / "annotations-common.ipynb", as_version=4)
+    nb.cells.append(new_markdown_cell("Figure below."))
+    nb.cells.append(
+        new_code_cell(
+            "plot()",
+            outputs=[new_output("display_data", data={"image/png": PNG})]
+        )
+    )
+    return nb
+
+
+def test_stream_text_same_as_render():
+    nb = notebook_with_image()
+    exporter = ArticleHTMLExporter()
+    html, _ = exporter.from_notebook_node(nb)
+    sink = io.StringIO()
+    resources = exporter.stream_from_notebook_node(nb, sink)
+    streamed = sink.getvalue()
+    assert 'alt="No description has been provided for this image"' in streamed
+    assert 'tabindex="0"' in streamed
+    assert normalized(streamed, nb) == strip_ids(html, nb)
+    assert "render_cache" in resources
+
+
+def test_stream_bytes_from_filename():
+    path = DIR_NOTEBOOKS / "references-notes.ipynb"
+    exporter = ArticleHTMLExporter()
+    html, _ = exporter.from_filename(str(path))
+    sink = io.BytesIO()
+    resources = exporter.stream_from_filename(str(path), sink)
+    assert resources["metadata"]["name"] == "references-notes"
+    nb = nbformat.read(path, as_version=4)
+    assert normalized(sink.getvalue().decode("utf-8"), nb) == strip_ids(html, nb)
+
+
+def test_stream_socket():
+    left, right = socket.socketpair()
+    received = []
+    reader = threading.Thread(
+        target=lambda: received.append(right.makefile("rb").read())
+    )
+    reader.start()
+    with left:
+        ArticleHTMLExporter().stream_from_notebook_node(notebook_with_image(), left)
+        left.shutdown(socket.SHUT_WR)
+    reader.join()
+    right.close()
+    assert received[0].rstrip().endswith(b"</html>")
+
+
+def test_stream_accessible_chunks_cut_in_tags():
+    stream = StreamAccessible()
+    chunks = ['<p>x</p><im', 'g src="a>b"', ">", '<div class="jp-Cell-inputWrapper">']
+    html = "".join(stream.feed(chunk) for chunk in chunks) + stream.close()
+    assert html == (
+        '<p>x</p><img src="a>b" alt="No description has been provided for this '
+        'image"><div class="jp-Cell-inputWrapper" tabindex="0">'
+    )
+    assert stream.num_alt_missing == 1
+
+
+def test_incremental_streams_whole():
+    nb = notebook_with_image()
+    exporter = IncrementalArticleHTMLExporter()
+    html, _ = exporter.from_notebook_node(nb)
+    state = exporter.state
+    sink = io.StringIO()
+    resources = exporter.stream_from_notebook_node(nb, sink)
+    assert "incremental" not in resources
+    assert "article-html-cell" not in sink.getvalue()
+    assert normalized(sink.getvalue(), nb) == strip_ids(html, nb)
+    assert exporter.state is state
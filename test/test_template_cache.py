@@ -0,0 +1,54 @@
+from jinja2 import DictLoader, Environment
+import nbformat
+from pathlib import Path
+
+from nbconvert_article_html import ArticleHTMLExporter
+from nbconvert_article_html.cache import cache_bytecode, CacheBytecode
+
+from . import strip_ids
+
+
+PATH_NOTEBOOK = Path(__file__).parent / "notebooks" / "references-notes.ipynb"
+
+
+def export(exporter: ArticleHTMLExporter) -> str:
+    html, _ = exporter.from_filename(str(PATH_NOTEBOOK))
+    return strip_ids(html, nbformat.read(PATH_NOTEBOOK, as_version=4))
+
+
+def test_exporters_share_compiled_templates(tmp_path):
+    cache = cache_bytecode(tmp_path)
+    expected = export(ArticleHTMLExporter())
+    assert export(ArticleHTMLExporter(template_cache_dir=str(tmp_path))) == expected
+    assert cache.misses > 0
+    misses = cache.misses
+    assert export(ArticleHTMLExporter(template_cache_dir=str(tmp_path))) == expected
+    assert cache.misses == misses
+    assert cache.hits >= misses
+
+
+def test_compiled_templates_on_disk(tmp_path):
+    exporter = ArticleHTMLExporter(template_cache_dir=str(tmp_path))
+    expected = export(exporter)
+    assert list(tmp_path.glob("*.cache"))
+    cache = CacheBytecode(tmp_path)
+    exporter = ArticleHTMLExporter()
+    exporter.environment.bytecode_cache = cache
+    assert export(exporter) == expected
+    assert cache.misses == 0
+    assert cache.hits > 0
+
+
+def test_changed_source_recompiled(tmp_path):
+    cache = CacheBytecode(tmp_path)
+    for source, expected in [
+        ("a{{ x }}", "a1"),
+        ("b{{ x }}", "b1"),
+        ("a{{ x }}", "a1")
+    ]:
+        environment = Environment(
+            loader=DictLoader({"t.j2": source}),
+            bytecode_cache=cache
+        )
+        assert environment.get_template("t.j2").render(x=1) == expected
+    assert cache.stats() == {"hits": 1, "misses": 2}
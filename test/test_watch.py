@@ -0,0 +1,109 @@
+from pathlib import Path
+import shutil
+import sys
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from nbconvert_article_html.watch import Preview, WatcherInotify, WatcherPolling
+
+
+PATH_NOTEBOOK = Path(__file__).parent / "notebooks" / "references-notes.ipynb"
+
+
+def touch_notebook(path: Path) -> None:
+    text = path.read_text(encoding="utf-8")
+    path.write_text(text.replace("set aside", "put aside"), encoding="utf-8")
+
+
+def run_watcher(make, tmp_path):
+    path = tmp_path / "doc.ipynb"
+    shutil.copy(PATH_NOTEBOOK, path)
+    watcher = make([tmp_path])
+    try:
+        assert watcher.wait(0.05) == set()
+        time.sleep(0.02)
+        touch_notebook(path)
+        (tmp_path / "other.txt").write_text("ignored")
+        assert watcher.wait(2.0) == {path}
+    finally:
+        watcher.close()
+
+
+def test_watcher_polling(tmp_path):
+    run_watcher(lambda dirs: WatcherPolling(dirs, 0.01), tmp_path)
+
+
+def test_watcher_inotify(tmp_path):
+    if not sys.platform.startswith("linux"):
+        pytest.skip("inotify is specific to Linux")
+    run_watcher(WatcherInotify, tmp_path)
+
+
+def test_watcher_polling_deleted(tmp_path):
+    path = tmp_path / "doc.ipynb"
+    shutil.copy(PATH_NOTEBOOK, path)
+    watcher = WatcherPolling([tmp_path], 0.01)
+    path.unlink()
+    assert watcher.wait(1.0) == {path}
+
+
+def test_preview_rebuilds_and_notifies(tmp_path):
+    path = tmp_path / "doc.ipynb"
+    shutil.copy(PATH_NOTEBOOK, path)
+    preview = Preview([tmp_path], debounce=0.05)
+    preview.build_all()
+    assert preview.documents["doc"].version == 1
+    server = preview.server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stop = threading.Event()
+    watching = threading.Thread(
+        target=preview.watch,
+        args=(stop, WatcherPolling([tmp_path], 0.01))
+    )
+    watching.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        page = urlopen(f"{url}/doc.html").read().decode("utf-8")
+        assert "EventSource" in page
+        assert "set aside" in page
+
+        touch_notebook(path)
+        events = urlopen(f"{url}/events?doc=doc&since=1", timeout=10).read()
+        assert events.startswith(b"data: 2")
+        assert "put aside" in urlopen(f"{url}/doc.html").read().decode("utf-8")
+        assert preview.status()["doc"]["latency_push"] > 0
+        with pytest.raises(HTTPError, match="400"):
+            urlopen(f"{url}/events?doc=doc&since=x", timeout=10)
+
+        path.unlink()
+        preview.pushed("doc")
+        preview.build(path)
+        assert "doc" not in preview.documents and "doc" not in preview.notebooks
+        with pytest.raises(HTTPError, match="404"):
+            urlopen(f"{url}/doc.html")
+    finally:
+        stop.set()
+        watching.join()
+        server.shutdown()
+
+
+def test_preview_names_quoted(tmp_path):
+    path = tmp_path / "Démo EN.ipynb"
+    shutil.copy(PATH_NOTEBOOK, path)
+    preview = Preview([path])
+    preview.build_all()
+    server = preview.server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        index = urlopen(f"{url}/").read().decode("utf-8")
+        assert 'href="/D%C3%A9mo%20EN.html"' in index
+        page = urlopen(f"{url}/D%C3%A9mo%20EN.html").read().decode("utf-8")
+        assert "doc=D%C3%A9mo%20EN&since=1" in page
+    finally:
+        server.shutdown()
+        server.server_close()